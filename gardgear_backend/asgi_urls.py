@@ -0,0 +1,22 @@
+"""
+URL configuration for requests served under ASGI (settings.ASGI_ROOT_URLCONF).
+
+The read endpoints below are served by async views (mainapp.async_views);
+every other URL, and every other method on these ones, resolves through
+the regular ROOT_URLCONF.
+"""
+
+from django.conf import settings
+from django.urls import include, path
+
+from mainapp.async_views import async_viewset_view
+
+urlpatterns = [
+    path("api/teams/", async_viewset_view),
+    path("api/users/technicians/", async_viewset_view),
+    path("api/maintenance-requests/by_status/", async_viewset_view),
+    path("api/maintenance-requests/calendar/", async_viewset_view),
+    path("api/notifications/", async_viewset_view),
+    path("api/notifications/unread_count/", async_viewset_view),
+    path("", include(settings.ROOT_URLCONF)),
+]
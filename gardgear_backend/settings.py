@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from decouple import config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -51,6 +53,10 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    "mainapp.metrics.MetricsMiddleware",  # outermost, so it times everything
+    "mainapp.instrumentation.QueryInstrumentationMiddleware",
+    "mainapp.replicas.ReplicaRoutingMiddleware",  # before anything that reads the database
+    "mainapp.async_views.AsyncURLConfMiddleware",  # before CommonMiddleware checks APPEND_SLASH
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -63,6 +69,8 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = "gardgear_backend.urls"
+# Hot read endpoints served by async views under ASGI (mainapp.async_views)
+ASGI_ROOT_URLCONF = "gardgear_backend.asgi_urls" if config("ASYNC_READ_VIEWS", default=True, cast=bool) else None
 
 TEMPLATES = [
     {
@@ -85,13 +93,64 @@ WSGI_APPLICATION = "gardgear_backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite is tuned for several workers writing at once; every value can be
+# overridden from .env. WAL lets reads run alongside the single writer,
+# busy_timeout makes a writer wait for the lock instead of failing with
+# "database is locked", and IMMEDIATE transactions take the write lock at
+# BEGIN, so two transactions that read and then write cannot deadlock on the
+# lock upgrade. foreign_keys is switched on by Django for every connection.
+SQLITE_PRAGMAS = {
+    "journal_mode": config("SQLITE_JOURNAL_MODE", default="WAL"),
+    "synchronous": config("SQLITE_SYNCHRONOUS", default="NORMAL"),
+    "busy_timeout": config("SQLITE_BUSY_TIMEOUT_MS", default=5000, cast=int),
+    "cache_size": config("SQLITE_CACHE_SIZE", default=-65536, cast=int),  # negative: KiB, so 64 MiB per connection
+    "mmap_size": config("SQLITE_MMAP_SIZE", default=268435456, cast=int),  # bytes
+    "temp_store": config("SQLITE_TEMP_STORE", default="MEMORY"),
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": config("SQLITE_PATH", default=str(BASE_DIR / "db.sqlite3")),
+        "OPTIONS": {
+            "init_command": ";".join(f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()),
+            "transaction_mode": config("SQLITE_TRANSACTION_MODE", default="IMMEDIATE"),
+        },
+    }
+}
+
+# Read replica for GET API traffic (mainapp.replicas). Point SQLITE_REPLICA_PATH
+# at a copy of the database to try it locally (manage.py sync_replica refreshes
+# the copy), or add a "replica" entry for e.g. a PostgreSQL standby by hand.
+SQLITE_REPLICA_PATH = config("SQLITE_REPLICA_PATH", default="")
+if SQLITE_REPLICA_PATH:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": SQLITE_REPLICA_PATH,
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["mainapp.replicas.PrimaryReplicaRouter"]
+REPLICA_DATABASE = "replica"  # alias; ignored while it is not configured
+REPLICA_ROUTED_PATHS = ["/api/"]
+# Always on the primary: a sync token moves past rows a lagging replica has
+# not received yet, so the client would never get them
+REPLICA_PRIMARY_PATHS = ["/api/sync/"]
+REPLICA_STICKY_SECONDS = 10  # reads stay on the primary this long after a client writes
+
+
+# Cache
+# LocMem is per process, which is enough: generation-cache keys carry the
+# database state they were built from (mainapp.cache), so a write by any
+# process makes the entries of every process unreachable.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
 
+GENERATION_CACHE_TIMEOUT = 3600  # seconds; frees entries no write has made unreachable yet
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -160,9 +219,29 @@ REST_FRAMEWORK = {
         # 'rest_framework.permissions.IsAuthenticated', # Locked down by default in prod
     ],
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'mainapp.pagination.AsyncPageNumberPagination',
     'PAGE_SIZE': 10,
 }
 
+# Opt-in keyset pagination (?cursor=) on the request and notification lists
+CURSOR_PAGINATION_MAX_PAGE_SIZE = 100
+CURSOR_PAGINATION_ESTIMATE_CAP = 10000  # rows counted for ?estimate_count=1 outside PostgreSQL
+
+# Live change feed (/api/events/, Server-Sent Events served under ASGI)
+# Swap the broker for a cross-worker implementation when running several workers
+EVENT_BROKER = 'mainapp.events.InProcessBroker'
+EVENT_STREAM_KEEPALIVE = 15  # seconds between keepalive comments on idle streams
+
+# Delta sync (/api/sync/)
+SYNC_MAX_ROWS = 1000  # per collection and call; has_more tells clients to call again
+SYNC_SETTLE_SECONDS = 2  # rows changed more recently wait for the next call
+SYNC_TOMBSTONE_RETENTION_DAYS = 30  # older tokens get 410 and must reload everything
 
+# Per-request SQL instrumentation (mainapp.instrumentation)
+SERVER_TIMING_HEADER = True  # db/view/serialize/total durations on every response
+SLOW_REQUEST_MS = 500  # log requests slower than this...
+SLOW_REQUEST_QUERIES = 50  # ...or running more SQL statements than this
+SLOW_QUERY_MS = 100  # log single statements slower than this
 
+# Prometheus metrics (/metrics) are per process unless the server launcher sets
+# PROMETHEUS_MULTIPROC_DIR for its workers (see gunicorn.conf.py and mainapp.metrics)
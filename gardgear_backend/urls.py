@@ -23,10 +23,13 @@ from django.views.generic import TemplateView
 from django.views.static import serve
 import os
 
+from mainapp.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("mainapp.urls")),
     path("api-auth/", include("rest_framework.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 # Serve static and media files in development
@@ -0,0 +1,29 @@
+"""gunicorn settings: ``gunicorn -c gunicorn.conf.py gardgear_backend.wsgi``
+
+Workers share their Prometheus metrics through PROMETHEUS_MULTIPROC_DIR
+(see mainapp.metrics). The directory is emptied before the workers start
+and each worker that exits is marked dead, so samples of earlier runs and
+of replaced workers are not added to the current ones.
+"""
+import os
+import shutil
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+
+# Set here, in the master, so every forked worker inherits it
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', str(BASE_DIR / 'metrics'))
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
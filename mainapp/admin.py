@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest
+from .models import MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest, MaintenanceSchedule
 
 
 @admin.register(MaintenanceTeam)
@@ -31,3 +31,12 @@ class MaintenanceRequestAdmin(admin.ModelAdmin):
     search_fields = ['subject', 'equipment__name']
     date_hierarchy = 'created_at'
     raw_id_fields = ['equipment', 'technician']
+
+
+@admin.register(MaintenanceSchedule)
+class MaintenanceScheduleAdmin(admin.ModelAdmin):
+    list_display = ['id', 'subject', 'equipment', 'interval', 'unit', 'start_date', 'materialized_until', 'is_active']
+    list_filter = ['is_active', 'unit']
+    search_fields = ['subject', 'equipment__name', 'equipment__serial_number']
+    raw_id_fields = ['equipment', 'technician']
+    readonly_fields = ['materialized_until', 'materialized_hours']
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class MainappConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "mainapp"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from . import signals  # noqa: F401
+        from .instrumentation import install_query_wrapper
+        from .search import install_search_indexes
+
+        post_migrate.connect(install_search_indexes, sender=self)
+        connection_created.connect(install_query_wrapper)
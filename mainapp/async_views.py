@@ -0,0 +1,115 @@
+"""Async serving of the read endpoints that fan out to many queries.
+
+Under WSGI a request holds its worker thread for as long as its queries
+run. Under ASGI, AsyncURLConfMiddleware resolves requests against
+``ASGI_ROOT_URLCONF``, which sends a handful of hot GET endpoints to
+``async_viewset_view``. That view runs the viewset's ``a<action>`` coroutine
+(see AsyncReadMixin) on the event loop, going through the same
+authentication, permission, throttling, content negotiation and exception
+handling steps as DRF's dispatch, and renders the JSON there too. The
+bodies, ETags and generation-cache entries are the ones the sync view
+produces.
+
+Whatever the coroutine cannot answer the same way goes to the regular DRF
+view: other methods, actions without an async twin, the browsable API and
+requests with an Authorization header (HTTP Basic checks the password
+against the database).
+"""
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse
+from django.urls import resolve
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+
+def sync_view(request, match):
+    request.resolver_match = match
+    return sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+
+@csrf_exempt  # like every DRF view; SessionAuthentication checks CSRF itself
+async def async_viewset_view(request, *args, **kwargs):
+    """Serve a GET through the ``a<action>`` twin of the DRF route's action"""
+    match = resolve(request.path_info, urlconf=settings.ROOT_URLCONF)
+    # Metrics and logs label the request like the sync view
+    request.resolver_match = match
+    drf_view = match.func
+    action = drf_view.actions.get('get')
+    if (request.method != 'GET' or not hasattr(drf_view.cls, f'a{action}')
+            or 'HTTP_AUTHORIZATION' in request.META):
+        return await sync_view(request, match)
+
+    # What ViewSetMixin.as_view() and APIView.dispatch() do, with awaits
+    viewset = drf_view.cls(**drf_view.initkwargs)
+    viewset.action_map = drf_view.actions
+    for method, method_action in drf_view.actions.items():
+        setattr(viewset, method, getattr(viewset, method_action))
+    viewset.args, viewset.kwargs = match.args, match.kwargs
+    drf_request = viewset.initialize_request(request, *match.args, **match.kwargs)
+    viewset.request = drf_request
+    viewset.headers = viewset.default_response_headers
+    try:
+        # The session user, loaded without blocking the event loop
+        drf_request.user = await request.auser()
+        drf_request.auth = None
+        viewset.initial(drf_request, *match.args, **match.kwargs)
+        if drf_request.accepted_renderer.format != 'json':
+            return await sync_view(request, match)
+        response = await getattr(viewset, f'a{action}')(drf_request, *match.args, **match.kwargs)
+    except Exception as exc:
+        response = viewset.handle_exception(exc)
+    response = viewset.finalize_response(drf_request, response, *match.args, **match.kwargs)
+    return render(request, response)
+
+
+def render(request, response):
+    """``response`` rendered into a plain HttpResponse
+
+    The ASGI handler renders template responses in a worker thread; JSON
+    does not need the thread hop.
+    """
+    if not isinstance(response, Response):
+        return response
+    recorder = getattr(request, '_query_recorder', None)
+    if recorder is not None:
+        # Time it as "serialize", as QueryInstrumentationMiddleware does for sync views
+        recorder.render_started = perf_counter()
+        response.add_post_render_callback(recorder.rendered)
+    response.render()
+
+    rendered = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        rendered[header] = value
+    rendered.cookies = response.cookies
+    return rendered
+
+
+class AsyncURLConfMiddleware:
+    """Resolve requests served under ASGI against ``ASGI_ROOT_URLCONF``"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.urlconf = settings.ASGI_ROOT_URLCONF
+
+    def route(self, request):
+        if self.urlconf and isinstance(request, ASGIRequest):
+            request.urlconf = self.urlconf
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        self.route(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.route(request)
+        return await self.get_response(request)
@@ -0,0 +1,151 @@
+"""Batched create/update/delete of maintenance requests.
+
+Operations are validated together: ids of the rows being changed and of
+every referenced equipment, team and technician are loaded with one query
+per model, and nothing is written unless every operation is valid. The
+writes then take one bulk_create, one bulk_update and one DELETE inside a
+single transaction.
+
+bulk_create and bulk_update skip model signals and ``auto_now``, so this
+module sets ``updated_at`` and publishes change events itself. Deletes go
+through the regular collector, so tombstones and events are recorded by
+the signal handlers as usual.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MaintenanceRequest
+from .serializers import MaintenanceRequestBulkSerializer, PrefetchedPrimaryKeyRelatedField
+from .signals import publish_requests_on_commit
+
+OPERATIONS = ('create', 'update', 'delete')
+
+
+class BulkValidationError(Exception):
+    """At least one operation is invalid; ``results`` holds the per-item outcome"""
+
+    def __init__(self, results):
+        super().__init__('Invalid bulk operations')
+        self.results = results
+
+
+def as_id(value):
+    """``value`` as a primary key, or None if it is not an integer"""
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def prefetch_related_objects(operations):
+    """{model: {pk: instance}} for every related id referenced by the operations' data"""
+    prefetched = {}
+    for name, field in MaintenanceRequestBulkSerializer().fields.items():
+        if not isinstance(field, PrefetchedPrimaryKeyRelatedField):
+            continue
+        ids = {
+            as_id(operation['data'].get(name))
+            for operation in operations
+            if isinstance(operation, dict) and isinstance(operation.get('data'), dict)
+        }
+        ids.discard(None)
+        queryset = field.get_queryset()
+        prefetched[queryset.model] = queryset.in_bulk(ids) if ids else {}
+    return prefetched
+
+
+def apply_operations(operations, context=None):
+    """Validate and apply ``operations``; returns one result dict per operation, in order
+
+    Raises BulkValidationError (after writing nothing) if any operation is invalid.
+    """
+    with transaction.atomic():
+        target_ids = [
+            as_id(operation.get('id')) for operation in operations
+            if isinstance(operation, dict) and operation.get('op') in ('update', 'delete')
+        ]
+        existing = MaintenanceRequest.objects.select_for_update().in_bulk(
+            [pk for pk in target_ids if pk is not None]
+        )
+        context = {**(context or {}), 'prefetched': prefetch_related_objects(operations)}
+
+        results, creates, updates, deletes = [], [], [], []
+        seen = set()
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict):
+                results.append({'index': index, 'ok': False, 'errors': {'non_field_errors': ['Expected an object.']}})
+                continue
+            op = operation.get('op')
+            result = {'index': index, 'op': op, 'id': operation.get('id'), 'ok': True}
+            results.append(result)
+            errors = {}
+
+            if op not in OPERATIONS:
+                errors['op'] = [f"Must be one of {', '.join(OPERATIONS)}."]
+            instance = None
+            if op in ('update', 'delete'):
+                pk = as_id(operation.get('id'))
+                if pk is None:
+                    errors['id'] = ['A valid integer is required.']
+                elif pk in seen:
+                    errors['id'] = ['Appears more than once in this batch.']
+                elif pk not in existing:
+                    errors['id'] = ['Not found.']
+                else:
+                    seen.add(pk)
+                    instance = existing[pk]
+                    result['id'] = pk
+            data = operation.get('data', {})
+            if op in ('create', 'update') and not isinstance(data, dict):
+                errors['data'] = ['Expected an object.']
+
+            if not errors and op in ('create', 'update'):
+                serializer = MaintenanceRequestBulkSerializer(
+                    instance, data=data, partial=op == 'update', context=context
+                )
+                if serializer.is_valid():
+                    if op == 'create':
+                        creates.append((result, serializer.validated_data))
+                    else:
+                        updates.append((instance, serializer.validated_data))
+                else:
+                    errors = serializer.errors
+            elif not errors and op == 'delete':
+                deletes.append(instance.pk)
+
+            if errors:
+                result['ok'] = False
+                result['errors'] = errors
+
+        if not all(result['ok'] for result in results):
+            raise BulkValidationError(results)
+
+        created = MaintenanceRequest.objects.bulk_create(
+            [MaintenanceRequest(**data) for _, data in creates]
+        )
+        for (result, _), instance in zip(creates, created):
+            result['id'] = instance.pk
+
+        now = timezone.now()
+        fields = {'updated_at'}
+        for instance, data in updates:
+            for attr, value in data.items():
+                setattr(instance, attr, value)
+            instance.updated_at = now
+            fields.update(data)
+        if updates:
+            MaintenanceRequest.objects.bulk_update(
+                [instance for instance, _ in updates], sorted(fields)
+            )
+
+        if deletes:
+            MaintenanceRequest.objects.filter(pk__in=deletes).delete()
+
+        if created:
+            publish_requests_on_commit('maintenance_request.created', [instance.pk for instance in created])
+        if updates:
+            publish_requests_on_commit('maintenance_request.updated', [instance.pk for instance, _ in updates])
+
+    return results
@@ -0,0 +1,142 @@
+"""Generation cache for read-mostly reference data.
+
+A model's generation is read from the database on every lookup: its row
+count, its latest ``updated_at`` and its latest tombstone. Any committed
+insert, update or delete changes it, whichever worker, management command
+or bulk writer made it, so nothing has to be told about writes and the
+cache can stay per process. Cached payloads are keyed by the generations
+of all the models they are built from, so a change makes every dependent
+entry unreachable at once and nothing stale is ever served. The same
+aggregates are the ETag / Last-Modified validators of the read endpoints
+(see mainapp.conditional).
+
+Payloads are only stored from reads on the primary, so what the cache
+holds never depends on how far a replica lags. Replica reads still use
+entries the primary stored under the generations they see.
+"""
+import functools
+import hashlib
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from rest_framework.response import Response
+
+from .metrics import CACHE_LOOKUPS
+from .models import Tombstone
+from .replicas import reading_from_replica
+
+ROW_STATE = {'count': Count('pk'), 'last': Max('updated_at')}
+# The highest id stands in for the count, which pruning would lower
+TOMBSTONE_STATE = {'count': Max('id'), 'last': Max('deleted_at')}
+
+
+def tombstones_of(models):
+    return Tombstone.objects.filter(model__in=[model._meta.model_name for model in models]).order_by()
+
+
+def data_state(querysets, models):
+    """Count and latest change of each queryset, then of the tombstones of ``models``"""
+    return [
+        *(queryset.order_by().aggregate(**ROW_STATE) for queryset in querysets),
+        tombstones_of(models).aggregate(**TOMBSTONE_STATE),
+    ]
+
+
+async def adata_state(querysets, models):
+    """data_state for async code"""
+    return [
+        *[await queryset.order_by().aaggregate(**ROW_STATE) for queryset in querysets],
+        await tombstones_of(models).aaggregate(**TOMBSTONE_STATE),
+    ]
+
+
+def state_fingerprint(state):
+    return [f"{part['count']}:{part['last'] and part['last'].isoformat()}" for part in state]
+
+
+def get_generations(models):
+    """Current generation of each model, and of their deletions"""
+    return state_fingerprint(data_state([model.objects.all() for model in models], models))
+
+
+async def aget_generations(models):
+    """get_generations for async code"""
+    return state_fingerprint(await adata_state([model.objects.all() for model in models], models))
+
+
+class GenerationCacheMixin:
+    """Cached serialized payloads for a viewset, keyed by ``cache_dependencies`` generations
+
+    Place it after ConditionalGetMixin in the bases so 304 handling still
+    runs first. ``list`` is cached when ``cache_list`` is set; custom
+    actions opt in with ``@generation_cached``.
+    """
+    cache_dependencies = ()
+    cache_list = False
+
+    def cache_key(self, generations):
+        path = hashlib.md5(self.request.get_full_path().encode()).hexdigest()
+        return f"resp:{self.basename}:{self.action}:{':'.join(map(str, generations))}:{path}"
+
+    def cache_hit(self, data):
+        CACHE_LOOKUPS.labels(self.basename, 'hit').inc()
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def cached_response(self, respond):
+        key = self.cache_key(get_generations(self.cache_dependencies))
+        data = cache.get(key)
+        if data is not None:
+            return self.cache_hit(data)
+
+        CACHE_LOOKUPS.labels(self.basename, 'miss').inc()
+        response = respond()
+        if response.status_code == 200 and not reading_from_replica():
+            cache.set(key, response.data, timeout=getattr(settings, 'GENERATION_CACHE_TIMEOUT', 3600))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    async def acached_response(self, respond):
+        """cached_response for async actions; ``respond`` returns an awaitable"""
+        key = self.cache_key(await aget_generations(self.cache_dependencies))
+        data = await cache.aget(key)
+        if data is not None:
+            return self.cache_hit(data)
+
+        CACHE_LOOKUPS.labels(self.basename, 'miss').inc()
+        response = await respond()
+        if response.status_code == 200 and not reading_from_replica():
+            await cache.aset(key, response.data, timeout=getattr(settings, 'GENERATION_CACHE_TIMEOUT', 3600))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if not self.cache_list:
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(
+            lambda: super(GenerationCacheMixin, self).list(request, *args, **kwargs)
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        if not self.cache_list:
+            return await super().alist(request, *args, **kwargs)
+        return await self.acached_response(
+            lambda: super(GenerationCacheMixin, self).alist(request, *args, **kwargs)
+        )
+
+
+def generation_cached(view_method):
+    """Serve a custom action (sync or async) of a GenerationCacheMixin viewset from the cache"""
+    if iscoroutinefunction(view_method):
+        @functools.wraps(view_method)
+        async def async_wrapper(self, request, *args, **kwargs):
+            return await self.acached_response(lambda: view_method(self, request, *args, **kwargs))
+        return async_wrapper
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        return self.cached_response(lambda: view_method(self, request, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,133 @@
+import functools
+import hashlib
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .cache import adata_state, data_state, state_fingerprint
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified support for viewset read endpoints
+
+    Validators come from a COUNT + MAX(updated_at) aggregate over the
+    filtered queryset (plus the same for ``etag_dependencies``, the related
+    models whose fields appear in the payload) and the latest tombstone of
+    those models, so a matching ``If-None-Match`` / ``If-Modified-Since``
+    gets a 304 before anything is serialized. Everything is read from the
+    database, so writes from any worker or management command count, and
+    deletes move Last-Modified forward.
+    """
+    etag_dependencies = ()
+
+    def validator_querysets(self, queryset):
+        return [queryset, *(model.objects.all() for model in self.etag_dependencies)]
+
+    def validator_models(self, queryset):
+        return [queryset.model, *self.etag_dependencies]
+
+    def validators_from_state(self, state):
+        last_modified = max((part['last'] for part in state if part['last']), default=None)
+        user = self.request.user
+        fingerprint = '|'.join([
+            self.request.get_full_path(),
+            self.request.accepted_media_type or '',
+            str(user.pk if user.is_authenticated else ''),
+            *state_fingerprint(state),
+        ])
+        return hashlib.md5(fingerprint.encode()).hexdigest(), last_modified
+
+    def get_validators(self, queryset):
+        return self.validators_from_state(
+            data_state(self.validator_querysets(queryset), self.validator_models(queryset))
+        )
+
+    async def aget_validators(self, queryset):
+        return self.validators_from_state(
+            await adata_state(self.validator_querysets(queryset), self.validator_models(queryset))
+        )
+
+    def not_modified_response(self, etag, last_modified):
+        """304 response if the client's copy is current, else None"""
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return get_conditional_response(
+            self.request._request, etag=quote_etag(etag), last_modified=timestamp
+        )
+
+    def add_validators(self, response, etag, last_modified):
+        if response.status_code in (200, 304):
+            response['ETag'] = quote_etag(etag)
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(int(last_modified.timestamp()))
+            patch_vary_headers(response, ['Accept', 'Cookie'])
+            # Let browsers keep the copy but revalidate it on every use
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def conditional_response(self, queryset, respond):
+        """Return 304 if the client's copy is current, otherwise ``respond()`` with validators"""
+        etag, last_modified = self.get_validators(queryset)
+        response = self.not_modified_response(etag, last_modified)
+        if response is None:
+            response = respond()
+        return self.add_validators(response, etag, last_modified)
+
+    async def aconditional_response(self, queryset, respond):
+        """conditional_response for async actions; ``respond`` returns an awaitable"""
+        etag, last_modified = await self.aget_validators(queryset)
+        response = self.not_modified_response(etag, last_modified)
+        if response is None:
+            response = await respond()
+        return self.add_validators(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.filter_queryset(self.get_queryset()),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aconditional_response(
+            await self.afilter_queryset(self.get_queryset()),
+            lambda: super(ConditionalGetMixin, self).alist(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError):
+            # Let the regular retrieve produce its 404
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(
+            queryset,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+
+def conditional(view_method):
+    """Add ETag / Last-Modified handling to a custom GET action of a ConditionalGetMixin viewset
+
+    Validators cover the viewset's whole filtered queryset, a superset of what
+    any action returns, so they change whenever the action's output can.
+    Works on async actions too.
+    """
+    if iscoroutinefunction(view_method):
+        @functools.wraps(view_method)
+        async def async_wrapper(self, request, *args, **kwargs):
+            return await self.aconditional_response(
+                await self.afilter_queryset(self.get_queryset()),
+                lambda: view_method(self, request, *args, **kwargs),
+            )
+        return async_wrapper
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.filter_queryset(self.get_queryset()),
+            lambda: view_method(self, request, *args, **kwargs),
+        )
+    return wrapper
@@ -0,0 +1,99 @@
+"""Change feed broker behind the /api/events/ Server-Sent Events stream.
+
+Model signals publish events from sync code; subscribers are SSE
+connections waiting on their own asyncio loop. The broker class is
+chosen by ``settings.EVENT_BROKER`` so a cross-worker backend (e.g. one
+built on Redis pub/sub) can replace the in-process default.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """One connected client and the events it is interested in"""
+
+    def __init__(self, loop, team_id=None, user_id=None, max_queue=100):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.team_id = team_id
+        self.user_id = user_id
+        self.overflowed = False
+
+    def wants(self, event):
+        # Notifications only ever go to their recipient
+        if event['type'].startswith('notification.'):
+            return self.user_id is not None and event['user'] == self.user_id
+        return self.team_id is None or event['team'] == self.team_id
+
+    def deliver(self, event):
+        """Queue an event; must run on the subscriber's loop"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client: tell it to resync instead of growing without bound
+            self.overflowed = True
+
+
+class BaseBroker:
+    """Keeps the subscriptions of this process and dispatches events to them.
+
+    Subclasses that fan out across processes override ``publish`` to send the
+    event over their transport and call ``dispatch`` when one arrives.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self, team_id=None, user_id=None):
+        """Register a subscription on the running event loop"""
+        subscription = Subscription(asyncio.get_running_loop(), team_id=team_id, user_id=user_id)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def publish(self, event):
+        self.dispatch(event)
+
+    def dispatch(self, event):
+        """Hand an event to every local subscriber that wants it (thread-safe)"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if not subscription.wants(event):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has been closed
+                self.unsubscribe(subscription)
+
+
+class InProcessBroker(BaseBroker):
+    """Default broker: events reach clients connected to the same worker process"""
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker configured by settings.EVENT_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'EVENT_BROKER', 'mainapp.events.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
@@ -0,0 +1,119 @@
+"""Streaming CSV / NDJSON export for list endpoints.
+
+Rows are read from a server-side cursor (``iterator(chunk_size=...)``)
+through the viewset's values() serializer and written out one chunk at a
+time, so memory use does not grow with the size of the export. Django
+buffers a synchronous iterator completely when serving it under ASGI
+(and an asynchronous one under WSGI), so the body is produced by an
+async generator for ASGI requests and a plain generator otherwise.
+"""
+import csv
+import io
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import renderers
+from rest_framework.decorators import action
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """Selects CSV export (``?format=csv``); only error payloads are rendered here"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for key, value in (data or {}).items():
+            writer.writerow([key, value if isinstance(value, str) else json.dumps(value, cls=DjangoJSONEncoder)])
+        return buffer.getvalue()
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Selects newline-delimited JSON export (``?format=ndjson``); only error payloads are rendered here"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder) + '\n'
+
+
+def encode_csv(rows, columns, header=False):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def encode_ndjson(rows, columns, header=False):
+    return ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+
+
+ENCODERS = {'csv': encode_csv, 'ndjson': encode_ndjson}
+
+
+def stream_rows(values_serializer, queryset, export_format, chunk_size):
+    """Encoded chunks of ``queryset`` rows rendered by ``values_serializer``"""
+    encode = ENCODERS[export_format]
+    columns = [name for name, _ in values_serializer.columns]
+    rows = values_serializer.values(queryset).iterator(chunk_size=chunk_size)
+    header = encode([], columns, header=True)
+    if header:
+        yield header
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield encode(values_serializer.to_representation(chunk), columns)
+            chunk = []
+    if chunk:
+        yield encode(values_serializer.to_representation(chunk), columns)
+
+
+async def astream_rows(values_serializer, queryset, export_format, chunk_size):
+    """Async counterpart of ``stream_rows`` for responses served under ASGI"""
+    encode = ENCODERS[export_format]
+    columns = [name for name, _ in values_serializer.columns]
+    header = encode([], columns, header=True)
+    if header:
+        yield header
+    chunk = []
+    async for row in values_serializer.values(queryset).aiterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield encode(values_serializer.to_representation(chunk), columns)
+            chunk = []
+    if chunk:
+        yield encode(values_serializer.to_representation(chunk), columns)
+
+
+class ExportMixin:
+    """``export`` action streaming the filtered list as CSV (default) or NDJSON
+
+    Needs ``get_values_serializer()`` (ValuesListMixin). The format comes
+    from ``?format=csv|ndjson`` or the Accept header; every list filter,
+    ``?search=`` and ``?ordering=`` apply as usual.
+    """
+    export_chunk_size = 2000
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        export_format = request.accepted_renderer.format
+        queryset = self.filter_queryset(self.get_queryset())
+        fast = self.get_values_serializer()
+        stream = astream_rows if isinstance(request._request, ASGIRequest) else stream_rows
+
+        response = StreamingHttpResponse(
+            stream(fast, queryset, export_format, self.export_chunk_size),
+            content_type=f'{request.accepted_renderer.media_type}; charset=utf-8',
+        )
+        filename = f'{self.basename}-{timezone.localdate():%Y%m%d}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
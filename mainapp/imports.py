@@ -0,0 +1,179 @@
+"""Bulk import of equipment from CSV or NDJSON.
+
+Records are processed in batches of ``batch_size``. Each record is
+validated on its own, with no database access per record: the maintenance
+team is resolved by name from a map loaded once, and serial numbers are
+checked against the database with one query per batch. Valid records are
+written with one bulk_create per batch, which becomes an upsert on
+``serial_number`` when ``upsert`` is set. An upsert only overwrites the
+columns a record gives, so a file with fewer columns keeps the rest of the
+existing rows; records are grouped by their set of columns for that.
+Invalid records are reported and skipped without stopping the import.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.serializers import ValidationError, as_serializer_error
+
+from .models import MaintenanceTeam, Equipment, MaintenanceRequest
+from .serializers import EquipmentImportSerializer
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def read_records(stream, file_format):
+    """Yield one dict per CSV row or NDJSON line of a binary ``stream``"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        for row in csv.DictReader(text):
+            # Empty cells mean "not given", so model defaults still apply
+            yield {key: value for key, value in row.items() if key and value not in ('', None)}
+    elif file_format == 'ndjson':
+        for line in text:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+    else:
+        raise ValueError(f'Unsupported format: {file_format}')
+
+
+def guess_format(filename):
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'csv'
+
+
+class EquipmentImporter:
+    """Validates and writes equipment records; counts and errors accumulate across ``run`` calls"""
+
+    def __init__(self, upsert=False, batch_size=1000):
+        self.upsert = upsert
+        self.batch_size = batch_size
+        self.teams = {
+            name.casefold(): pk for pk, name in MaintenanceTeam.objects.values_list('id', 'team_name')
+        }
+        # One serializer for every record: building its fields is far costlier than validating
+        self.serializer = EquipmentImportSerializer()
+        self.seen_serials = set()
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+
+    def report(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+    def error(self, record_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'record': record_number, 'errors': errors})
+
+    def run(self, records):
+        """Import an iterable of record dicts; returns the report"""
+        records = enumerate(records, start=1)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+        return self.report()
+
+    def validate(self, record_number, record):
+        """(unsaved Equipment, names of the fields the record gives), or None if invalid"""
+        if not isinstance(record, dict):
+            self.error(record_number, {'non_field_errors': ['Expected an object.']})
+            return None
+        data = dict(record)
+        data.pop('id', None)
+        team_name = data.pop('maintenance_team_name', None) or data.pop('maintenance_team', None)
+        team_name = str(team_name).strip() if team_name is not None else ''
+        team_id = self.teams.get(team_name.casefold())
+
+        try:
+            validated_data = self.serializer.run_validation(data)
+            errors = {}
+        except ValidationError as e:
+            validated_data = None
+            errors = as_serializer_error(e)
+        if not team_name:
+            errors['maintenance_team'] = ['This field is required.']
+        elif team_id is None:
+            errors['maintenance_team'] = [f'Unknown team "{team_name}".']
+        if not errors and validated_data['serial_number'] in self.seen_serials:
+            errors['serial_number'] = ['Appears more than once in this file.']
+        if errors:
+            self.error(record_number, errors)
+            return None
+        self.seen_serials.add(validated_data['serial_number'])
+        return Equipment(maintenance_team_id=team_id, **validated_data), frozenset(validated_data)
+
+    def import_batch(self, batch):
+        valid = []
+        for record_number, record in batch:
+            result = self.validate(record_number, record)
+            if result is not None:
+                valid.append((record_number, *result))
+
+        # Retry once if a serial number is taken concurrently between the check and the insert
+        for attempt in range(2):
+            if not valid:
+                return
+            existing = set(
+                Equipment.objects.filter(
+                    serial_number__in=[instance.serial_number for _, instance, _ in valid]
+                ).values_list('serial_number', flat=True)
+            )
+            if not self.upsert:
+                for record_number, instance, _ in valid:
+                    if instance.serial_number in existing:
+                        self.error(record_number, {
+                            'serial_number': ['Equipment with this serial number already exists.']
+                        })
+                valid = [entry for entry in valid if entry[1].serial_number not in existing]
+                if not valid:
+                    return
+            instances = [instance for _, instance, _ in valid]
+            try:
+                with transaction.atomic():
+                    if self.upsert:
+                        groups = {}
+                        for _, instance, fields in valid:
+                            groups.setdefault(fields, []).append(instance)
+                        for fields, group in groups.items():
+                            Equipment.objects.bulk_create(
+                                group,
+                                update_conflicts=True,
+                                unique_fields=['serial_number'],
+                                update_fields=[
+                                    field for field in EquipmentImportSerializer.Meta.fields
+                                    if field in fields and field != 'serial_number'
+                                ] + ['maintenance_team', 'updated_at'],
+                            )
+                        # Requests show the equipment's name; without signals, touch them
+                        # here so delta sync sends them again
+                        if existing:
+                            MaintenanceRequest.objects.filter(
+                                equipment__serial_number__in=existing
+                            ).update(updated_at=timezone.now())
+                    else:
+                        Equipment.objects.bulk_create(instances)
+            except IntegrityError:
+                if self.upsert or attempt:
+                    raise
+                continue
+            updated = sum(1 for instance in instances if instance.serial_number in existing)
+            self.updated += updated
+            self.created += len(instances) - updated
+            return
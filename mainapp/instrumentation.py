@@ -0,0 +1,194 @@
+"""Per-request SQL instrumentation.
+
+QueryInstrumentationMiddleware times every SQL statement of a request
+through an execute wrapper and reports, for each request:
+
+* a ``Server-Timing`` header (shown in the browser's network panel) with
+  ``db`` (SQL time, with the query count), ``serialize`` (rendering the
+  response body), ``view`` (everything else) and ``total``;
+* a ``slow_request`` log line when the request took longer than
+  ``SLOW_REQUEST_MS`` or ran more than ``SLOW_REQUEST_QUERIES`` statements,
+  naming the statement it repeated most (the usual N+1 signature);
+* a ``slow_query`` log line for every statement slower than ``SLOW_QUERY_MS``.
+
+Log lines go to the ``mainapp.instrumentation`` logger as one JSON object
+each, with the SQL normalized (literals replaced, IN lists collapsed) so
+lines group by statement shape. Per statement the cost is two
+perf_counter() calls and a dict update; SQL is only normalized for
+statements that end up in the log.
+
+Django keeps one connection per thread, and under ASGI the queries of a
+request run on a worker thread rather than where the middleware runs. So
+``record_query`` is put on every connection when it is opened and finds
+the request's recorder through a context variable, which asgiref carries
+over into those threads.
+"""
+import json
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current_recorder = ContextVar('query_recorder', default=None)
+
+_PLACEHOLDER = re.compile(r'%s|\?')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """``sql`` with parameters and literals as ``?`` and IN lists as ``IN (...)``"""
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else None
+
+
+def log_event(event, **fields):
+    logger.warning(json.dumps({'event': event, **fields}, default=str))
+
+
+class QueryRecorder:
+    """execute_wrapper collecting the count, time and repeats of one request's SQL"""
+
+    def __init__(self, request, slow_query_seconds):
+        self.request = request
+        self.slow_query_seconds = slow_query_seconds
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.render_started = None
+        self.render_finished = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            self.statements[sql] += 1
+            if elapsed >= self.slow_query_seconds:
+                log_event(
+                    'slow_query',
+                    view=view_name(self.request),
+                    path=self.request.path,
+                    database=context['connection'].alias,
+                    duration_ms=round(elapsed * 1000, 1),
+                    sql=normalize_sql(sql),
+                )
+
+    def rendered(self, response):
+        self.render_finished = perf_counter()
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """connection_created handler adding ``record_query`` to each new connection"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class QueryInstrumentationMiddleware:
+    """Count and time the SQL of each request; see the module docstring"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.server_timing = settings.SERVER_TIMING_HEADER
+        self.slow_request_seconds = settings.SLOW_REQUEST_MS / 1000
+        self.slow_request_queries = settings.SLOW_REQUEST_QUERIES
+        self.slow_query_seconds = settings.SLOW_QUERY_MS / 1000
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = perf_counter()
+        recorder = request._query_recorder = QueryRecorder(request, self.slow_query_seconds)
+        token = _current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        started = perf_counter()
+        recorder = request._query_recorder = QueryRecorder(request, self.slow_query_seconds)
+        token = _current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook; time that as "serialize"
+        recorder = getattr(request, '_query_recorder', None)
+        if recorder is not None:
+            recorder.render_started = perf_counter()
+            response.add_post_render_callback(recorder.rendered)
+        return response
+
+    def finish(self, request, response, recorder, started):
+        total = perf_counter() - started
+        serialize = 0.0
+        if recorder.render_started is not None and recorder.render_finished is not None:
+            serialize = recorder.render_finished - recorder.render_started
+        view = max(0.0, total - recorder.duration - serialize)
+
+        if self.server_timing:
+            timing = ', '.join([
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"',
+                f'view;dur={view * 1000:.1f}',
+                f'serialize;dur={serialize * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+            if response.has_header('Server-Timing'):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response['Server-Timing'] = timing
+
+        if total >= self.slow_request_seconds or recorder.count > self.slow_request_queries:
+            fields = {}
+            if recorder.statements:
+                sql, repeats = recorder.statements.most_common(1)[0]
+                if repeats > 1:
+                    fields = {'most_repeated_sql': normalize_sql(sql), 'most_repeated_count': repeats}
+            log_event(
+                'slow_request',
+                view=view_name(request),
+                method=request.method,
+                path=request.path,
+                status=response.status_code,
+                duration_ms=round(total * 1000, 1),
+                db_ms=round(recorder.duration * 1000, 1),
+                serialize_ms=round(serialize * 1000, 1),
+                queries=recorder.count,
+                **fields,
+            )
+        return response
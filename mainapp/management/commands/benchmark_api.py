@@ -0,0 +1,266 @@
+import json
+import platform
+import subprocess
+import time
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from mainapp.models import MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest
+from mainapp.urls import router
+from mainapp.management.commands.generate_data import Command as GenerateData
+
+# Whole-table downloads, not latency-sensitive endpoints
+SKIPPED_ACTIONS = {'export'}
+
+# Regressions smaller than this are treated as noise whatever the ratio
+NOISE_FLOOR_MS = 1.0
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, SQL query count and response size of every API GET endpoint at several data scales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            type=int,
+            nargs='+',
+            default=[1000, 100000, 1000000],
+            help='Numbers of maintenance requests to benchmark at'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Timed requests per endpoint'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=2,
+            help='Untimed requests per endpoint before measuring'
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmark-results.json',
+            help='JSON file the results are written to'
+        )
+        parser.add_argument(
+            '--compare',
+            help='Earlier results file; exit with an error if an endpoint regressed'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.25,
+            help='Relative p50 latency increase reported as a regression (default 0.25)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the generated data'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes generating maintenance requests while seeding'
+        )
+        parser.add_argument(
+            '--database-file',
+            default='benchmark.sqlite3',
+            help='SQLite file the benchmark data is kept in (other engines use their test database)'
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the benchmark database, so the next run only tops the data up'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+
+        # Never seed millions of rows into the real database
+        old_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = options['database_file']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=options['keepdb'])
+        try:
+            results = {}
+            for scale in sorted(options['scales']):
+                self.seed(scale, options)
+                results[str(scale)] = self.run_scale(scale, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {'meta': self.meta(options), 'results': results}
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'✓ Results written to {options["output"]}'))
+
+        if baseline is not None:
+            self.compare(baseline, report, options['threshold'])
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'seed': options['seed'],
+        }
+
+    def seed(self, scale, options):
+        """Top the benchmark database up to ``scale`` maintenance requests"""
+        generator = GenerateData(stdout=self.stdout, stderr=self.stderr)
+        generator.configure(options['seed'] + scale, 5000)
+        if not MaintenanceTeam.objects.exists():
+            teams = generator.generate_teams(8)
+            generator.generate_users(1000, teams)
+            generator.generate_equipment(5000, teams)
+
+        missing = scale - MaintenanceRequest.objects.count()
+        if missing > 0:
+            self.stdout.write(f'Seeding {missing:,} maintenance requests for the {scale:,} scale...')
+            equipment = list(Equipment.objects.order_by('id'))
+            generator.generate_requests(missing, equipment, options['workers'])
+
+    def endpoints(self):
+        """(name, url, params) for every GET endpoint of the router, plus common list variants"""
+        team_id = (
+            MaintenanceRequest.objects.order_by().values('team').annotate(count=Count('id'))
+            .order_by('-count').values_list('team', flat=True).first()
+        )
+        today = timezone.localdate()
+        detail_ids = {
+            'team': MaintenanceTeam.objects.values_list('id', flat=True).first(),
+            'user': UserProfile.objects.values_list('id', flat=True).first(),
+            'equipment': Equipment.objects.values_list('id', flat=True).first(),
+            'maintenance-request': MaintenanceRequest.objects.values_list('id', flat=True).first(),
+        }
+        params = {
+            'user-by-team': {'team_id': team_id},
+            'equipment-by-team': {'team_id': team_id},
+            'maintenance-request-calendar': {'start': today, 'end': today + timedelta(days=34)},
+        }
+
+        for _, viewset, basename in router.registry:
+            if hasattr(viewset, 'list'):
+                yield f'{basename}-list', reverse(f'{basename}-list'), {}
+            if hasattr(viewset, 'retrieve') and detail_ids.get(basename):
+                yield f'{basename}-detail', reverse(f'{basename}-detail', args=[detail_ids[basename]]), {}
+            for extra in viewset.get_extra_actions():
+                if 'get' not in extra.mapping or extra.__name__ in SKIPPED_ACTIONS:
+                    continue
+                name = f'{basename}-{extra.url_name}'
+                if extra.detail:
+                    if not detail_ids.get(basename):
+                        continue
+                    url = reverse(name, args=[detail_ids[basename]])
+                else:
+                    url = reverse(name)
+                yield name, url, params.get(name, {})
+
+        requests_url = reverse('maintenance-request-list')
+        yield 'maintenance-request-list[status]', requests_url, {'status': 'In Progress'}
+        yield 'maintenance-request-list[team]', requests_url, {'team': team_id}
+        yield 'maintenance-request-list[search]', requests_url, {'search': 'hydraulic'}
+        yield 'maintenance-request-list[page=50]', requests_url, {'page': 50}
+        yield 'maintenance-request-list[cursor]', requests_url, {'cursor': ''}
+
+    def run_scale(self, scale, options):
+        client = Client()
+        technician = User.objects.filter(profile__role='technician').first()
+        if technician:
+            client.force_login(technician)
+
+        self.stdout.write(f'\nScale: {scale:,} maintenance requests')
+        self.stdout.write(f"{'endpoint':<42}{'status':>7}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'queries':>9}{'KiB':>9}")
+        results = {}
+        for name, url, params in self.endpoints():
+            for _ in range(options['warmup']):
+                client.get(url, params)
+            # Query capture slows requests down a little, so count on a separate request.
+            # Every request clears the query log, so start the capture from an empty one.
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url, params)
+            timings = []
+            for _ in range(options['iterations']):
+                started = time.perf_counter()
+                client.get(url, params)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+
+            result = {
+                'url': url,
+                'params': {key: str(value) for key, value in params.items()},
+                'status': response.status_code,
+                'p50_ms': round(percentile(timings, 0.50), 3),
+                'p90_ms': round(percentile(timings, 0.90), 3),
+                'p99_ms': round(percentile(timings, 0.99), 3),
+                'mean_ms': round(sum(timings) / len(timings), 3),
+                'queries': len(queries),
+                'bytes': len(response.content),
+            }
+            results[name] = result
+            self.stdout.write(
+                f"{name:<42}{result['status']:>7}{result['p50_ms']:>9.1f}{result['p90_ms']:>9.1f}"
+                f"{result['p99_ms']:>9.1f}{result['queries']:>9}{result['bytes'] / 1024:>9.1f}"
+            )
+        return results
+
+    def compare(self, baseline, report, threshold):
+        regressions = []
+        for scale, endpoints in report['results'].items():
+            for name, result in endpoints.items():
+                before = baseline.get('results', {}).get(scale, {}).get(name)
+                if before is None:
+                    continue
+                slower = result['p50_ms'] - before['p50_ms']
+                if slower > NOISE_FLOOR_MS and result['p50_ms'] > before['p50_ms'] * (1 + threshold):
+                    regressions.append(
+                        f"{scale} {name}: p50 {before['p50_ms']:.1f} -> {result['p50_ms']:.1f} ms"
+                    )
+                if result['queries'] > before['queries']:
+                    regressions.append(
+                        f"{scale} {name}: queries {before['queries']} -> {result['queries']}"
+                    )
+
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(f'  {line}'))
+            raise CommandError(f'{len(regressions)} regressions against {baseline["meta"].get("commit")}')
+        self.stdout.write(self.style.SUCCESS('✓ No regressions against the baseline'))
@@ -0,0 +1,276 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from mainapp.models import MaintenanceRequest, Notification
+from mainapp.management.commands.generate_data import Command as GenerateData
+
+# Same server, once as ASGI (async views) and once as WSGI in uvicorn's thread pool
+SERVERS = {
+    'asgi': ['gardgear_backend.asgi:application'],
+    'wsgi': ['gardgear_backend.wsgi:application', '--interface', 'wsgi'],
+}
+
+# Runs uvicorn in-process after making every SQL statement wait --db-latency-ms
+# first, standing in for the network round trip to a database server
+SERVER_BOOTSTRAP = """
+import os, sys, time
+import uvicorn
+from django.db.backends.signals import connection_created
+
+delay = float(os.environ['BENCHMARK_DB_LATENCY_MS']) / 1000
+
+def round_trip(execute, sql, params, many, context):
+    time.sleep(delay)
+    return execute(sql, params, many, context)
+
+def add_round_trip(sender, connection, **kwargs):
+    # Fired on every reconnect of the same (per-thread) connection object
+    if round_trip not in connection.execute_wrappers:
+        connection.execute_wrappers.append(round_trip)
+
+if delay:
+    connection_created.connect(add_round_trip)
+uvicorn.main.main(args=sys.argv[1:])
+"""
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def read_response(reader):
+    """Status code of one HTTP/1.1 response, after reading its body"""
+    status = int((await reader.readline()).split()[1])
+    length, chunked = 0, False
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value:
+            chunked = True
+    if not chunked:
+        await reader.readexactly(length)
+        return status
+    while size := int((await reader.readline()).split(b';')[0], 16):
+        await reader.readexactly(size + 2)
+    await reader.readline()
+    return status
+
+
+class Command(BaseCommand):
+    help = 'Throughput of the hot read endpoints under ASGI (async views) vs WSGI, one uvicorn worker each'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            nargs='+',
+            default=[1, 16, 64],
+            help='Keep-alive connections sending requests back to back'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Seconds of load per server and concurrency level'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20000,
+            help='Maintenance requests seeded before the run'
+        )
+        parser.add_argument(
+            '--servers',
+            nargs='+',
+            choices=list(SERVERS),
+            default=list(SERVERS),
+            help='Server interfaces to benchmark'
+        )
+        parser.add_argument(
+            '--db-latency-ms',
+            type=float,
+            default=0,
+            help='Delay added to every SQL statement in the servers, to model a database across the network'
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+            help='Port the servers listen on, one at a time'
+        )
+        parser.add_argument(
+            '--database-file',
+            default='async-benchmark.sqlite3',
+            help='SQLite file created for the run and deleted afterwards'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the generated data'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The servers are pointed at a seeded SQLite file, so this needs SQLite')
+
+        old_name = connection.settings_dict['NAME']
+        connection.settings_dict['TEST']['NAME'] = options['database_file']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            session = self.seed(options)
+            paths = self.paths()
+            connections.close_all()
+            self.stdout.write(
+                f"\n{'server':<8}{'conns':>6}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}"
+            )
+            for server in options['servers']:
+                with self.server(server, options):
+                    for concurrency in options['concurrency']:
+                        self.run_load(server, concurrency, paths, session, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            for suffix in ('-wal', '-shm'):
+                if os.path.exists(options['database_file'] + suffix):
+                    os.remove(options['database_file'] + suffix)
+
+    def seed(self, options):
+        """Seed the database; returns the session cookie of a technician with notifications"""
+        self.stdout.write(f"Seeding {options['requests']:,} maintenance requests...")
+        generator = GenerateData(stdout=self.stdout, stderr=self.stderr)
+        generator.configure(options['seed'], 5000)
+        teams = generator.generate_teams(8)
+        generator.generate_users(200, teams)
+        equipment = generator.generate_equipment(1000, teams)
+        generator.generate_requests(options['requests'], equipment, 1)
+
+        technician = User.objects.filter(profile__role='technician').first()
+        related = list(MaintenanceRequest.objects.filter(technician=technician)[:50])
+        Notification.objects.bulk_create(
+            Notification(recipient=technician, related_request=request, message=f'Reminder: {request.subject}',
+                         is_read=index % 3 == 0)
+            for index, request in enumerate(related)
+        )
+        client = Client()
+        client.force_login(technician)
+        return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def paths(self):
+        today = timezone.localdate()
+        return [
+            '/api/teams/',
+            '/api/users/technicians/',
+            '/api/maintenance-requests/by_status/',
+            f'/api/maintenance-requests/calendar/?start={today}&end={today + timedelta(days=34)}',
+            '/api/notifications/',
+            '/api/notifications/unread_count/',
+        ]
+
+    @contextmanager
+    def server(self, name, options):
+        """Run uvicorn with one worker against the seeded database"""
+        with tempfile.TemporaryDirectory() as metrics_dir, tempfile.TemporaryFile() as log:
+            env = {
+                **os.environ,
+                'SQLITE_PATH': os.path.abspath(options['database_file']),
+                'PROMETHEUS_MULTIPROC_DIR': metrics_dir,
+                'BENCHMARK_DB_LATENCY_MS': str(options['db_latency_ms']),
+            }
+            # Slow-request log lines would drown the table; the log is shown if startup fails
+            process = subprocess.Popen(
+                [sys.executable, '-c', SERVER_BOOTSTRAP, *SERVERS[name], '--port', str(options['port']),
+                 '--workers', '1', '--no-access-log', '--log-level', 'warning'],
+                cwd=settings.BASE_DIR, env=env, stderr=log,
+            )
+            try:
+                try:
+                    self.wait_for_port(options['port'], process)
+                except CommandError:
+                    log.seek(0)
+                    self.stderr.write(log.read().decode(errors='replace'))
+                    raise
+                yield process
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+    def wait_for_port(self, port, process):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'Server exited with status {process.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Server did not start listening on port {port}')
+
+    def run_load(self, server, concurrency, paths, session, options):
+        latencies, errors = asyncio.run(self.load(concurrency, paths, session, options))
+        latencies.sort()
+        self.stdout.write(
+            f"{server:<8}{concurrency:>6}{len(latencies) / options['duration']:>9.0f}"
+            f"{percentile(latencies, 0.5) * 1000:>9.1f}{percentile(latencies, 0.99) * 1000:>9.1f}{errors:>8}"
+        )
+
+    async def load(self, concurrency, paths, session, options):
+        """Requests from ``concurrency`` keep-alive connections until the deadline"""
+        port = options['port']
+        latencies, errors = [], 0
+        requests = [
+            (
+                f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nAccept: application/json\r\n'
+                f'Cookie: {settings.SESSION_COOKIE_NAME}={session}\r\n\r\n'
+            ).encode()
+            for path in paths
+        ]
+
+        async def client(worker, deadline):
+            nonlocal errors
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            index = worker
+            try:
+                while time.monotonic() < deadline:
+                    started = time.perf_counter()
+                    writer.write(requests[index % len(requests)])
+                    await writer.drain()
+                    status = await read_response(reader)
+                    if status == 200:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors += 1
+                    index += 1
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                errors += 1
+            finally:
+                writer.close()
+
+        # Untimed warm-up: imports, caches and SQLite pages
+        await asyncio.gather(*(client(worker, time.monotonic() + 1) for worker in range(len(paths))))
+        latencies.clear()
+        errors = 0
+        deadline = time.monotonic() + options['duration']
+        await asyncio.gather(*(client(worker, deadline) for worker in range(concurrency)))
+        return latencies, errors
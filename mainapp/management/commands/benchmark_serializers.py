@@ -0,0 +1,122 @@
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from mainapp.models import MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest
+from mainapp.serializers import (
+    MaintenanceRequestSerializer, MaintenanceRequestValuesSerializer,
+    EquipmentSerializer, EquipmentValuesSerializer,
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/sec of the model serializers and the values() fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 100000],
+            help='Row counts to benchmark'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per measurement; the best one is reported'
+        )
+
+    def handle(self, *args, **options):
+        # Seed inside a transaction that is always rolled back, so the
+        # benchmark never leaves rows behind in the configured database.
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, options):
+        sizes = sorted(options['sizes'])
+        self.stdout.write(f'Seeding {sizes[-1]} maintenance requests (rolled back afterwards)...')
+        self.seed(sizes[-1])
+
+        self.stdout.write(f"{'model':<20}{'rows':>8}{'serializer rows/s':>20}{'values() rows/s':>18}{'speedup':>10}")
+        for size in sizes:
+            for label, model_serializer, values_serializer, queryset in [
+                ('MaintenanceRequest', MaintenanceRequestSerializer, MaintenanceRequestValuesSerializer,
+                 MaintenanceRequest.objects.select_related('equipment', 'team', 'technician')),
+                ('Equipment', EquipmentSerializer, EquipmentValuesSerializer,
+                 Equipment.objects.select_related('maintenance_team').order_by('id')),
+            ]:
+                queryset = queryset[:size]
+                fast = values_serializer()
+                slow_seconds, slow_data = self.measure(
+                    lambda: model_serializer(queryset.all(), many=True).data, options['repeat']
+                )
+                fast_seconds, fast_data = self.measure(
+                    lambda: fast.to_representation(fast.values(queryset.all())), options['repeat']
+                )
+                if json.dumps(slow_data) != json.dumps(fast_data):
+                    self.stdout.write(self.style.ERROR(f'{label}: fast path output differs!'))
+                rows = len(fast_data)
+                self.stdout.write(
+                    f"{label:<20}{rows:>8}{rows / slow_seconds:>20,.0f}"
+                    f"{rows / fast_seconds:>18,.0f}{slow_seconds / fast_seconds:>9.1f}x"
+                )
+
+    def measure(self, build, repeat):
+        best, data = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = build()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
+
+    def seed(self, count):
+        teams = MaintenanceTeam.objects.bulk_create(
+            [MaintenanceTeam(team_name=f'Bench Team {i}') for i in range(10)]
+        )
+        users = User.objects.bulk_create(
+            [User(username=f'bench-tech-{i}', first_name='Bench', last_name=str(i)) for i in range(50)]
+        )
+        UserProfile.objects.bulk_create(
+            [UserProfile(user=user, role='technician', team=teams[i % 10]) for i, user in enumerate(users)]
+        )
+        equipment_count = min(count, 10000)
+        equipment = Equipment.objects.bulk_create(
+            [
+                Equipment(
+                    name=f'Bench Machine {i}', serial_number=f'BENCH-{i:06d}', department='Production',
+                    location='Building A', purchase_date=date(2020, 1, 1),
+                    maintenance_team=teams[i % 10],
+                )
+                for i in range(equipment_count)
+            ],
+            batch_size=1000,
+        )
+        statuses = [key for key, _ in MaintenanceRequest.STATUS_CHOICES]
+        today = date.today()
+        MaintenanceRequest.objects.bulk_create(
+            (
+                MaintenanceRequest(
+                    subject=f'Bench request {i}', request_type='Corrective',
+                    equipment=equipment[i % equipment_count], team=teams[i % 10],
+                    technician=users[i % 50] if i % 3 else None, status=statuses[i % 4],
+                    scheduled_date=today + timedelta(days=i % 60), due_date=today + timedelta(days=i % 90),
+                    duration_hours=Decimal('2.50'),
+                )
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
@@ -0,0 +1,171 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Max, Min
+from mainapp.models import MaintenanceTeam, MaintenanceRequest
+from mainapp.management.commands.generate_data import Command as GenerateData
+from mainapp.views import MaintenanceRequestViewSet
+
+# Django's own SQLite behaviour (rollback journal, deferred transactions)
+DEFAULT_OPTIONS = {}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_worker(worker, start_at, duration, write_ratio, id_range, seed):
+    """Mixed reads and status changes until the deadline; returns latencies and error count"""
+    rng = random.Random(f'{seed}:{worker}')
+    statuses = [key for key, _ in MaintenanceRequest.STATUS_CHOICES]
+    team_ids = list(MaintenanceTeam.objects.values_list('id', flat=True))
+    fast = MaintenanceRequestViewSet.values_serializer_class()
+    reads, writes, errors = [], [], 0
+
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                # A Kanban drag: read the card, then change its status
+                with transaction.atomic():
+                    request = MaintenanceRequest.objects.get(pk=rng.randint(*id_range))
+                    request.status = rng.choice(statuses)
+                    request.save(update_fields=['status', 'updated_at'])
+                writes.append(time.perf_counter() - started)
+            else:
+                queryset = MaintenanceRequestViewSet.queryset.filter(team_id=rng.choice(team_ids))
+                fast.to_representation(list(fast.values(queryset)[:20]))
+                reads.append(time.perf_counter() - started)
+        except MaintenanceRequest.DoesNotExist:
+            continue
+        except OperationalError:
+            errors += 1
+    connection.close()
+    return reads, writes, errors
+
+
+class Command(BaseCommand):
+    help = 'Mixed read/write load on a SQLite database from several processes, tuned profile vs Django defaults'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=8,
+            help='Concurrent worker processes'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Seconds of load per profile'
+        )
+        parser.add_argument(
+            '--write-ratio',
+            type=float,
+            default=0.2,
+            help='Share of operations that change a request (default 0.2)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20000,
+            help='Maintenance requests seeded before the run'
+        )
+        parser.add_argument(
+            '--profiles',
+            nargs='+',
+            choices=['tuned', 'default'],
+            default=['tuned', 'default'],
+            help='"tuned" uses the OPTIONS from settings, "default" plain Django SQLite settings'
+        )
+        parser.add_argument(
+            '--database-file',
+            default='sqlite-benchmark.sqlite3',
+            help='SQLite file created for the run and deleted afterwards'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the data and the operation mix'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark only applies to SQLite')
+
+        tuned_options = dict(connection.settings_dict['OPTIONS'])
+        old_name = connection.settings_dict['NAME']
+        connection.settings_dict['TEST']['NAME'] = options['database_file']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            id_range = self.seed(options)
+            self.stdout.write(
+                f"\n{options['processes']} processes, {options['write_ratio']:.0%} writes, "
+                f"{options['duration']:g}s per profile"
+            )
+            self.stdout.write(
+                f"{'profile':<10}{'ops/s':>9}{'reads/s':>9}{'writes/s':>10}{'read p50':>10}"
+                f"{'read p99':>10}{'write p50':>11}{'write p99':>11}{'errors':>8}"
+            )
+            for profile in options['profiles']:
+                connection.settings_dict['OPTIONS'] = tuned_options if profile == 'tuned' else DEFAULT_OPTIONS
+                self.run_profile(profile, id_range, options)
+        finally:
+            connection.settings_dict['OPTIONS'] = tuned_options
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            for suffix in ('-wal', '-shm'):
+                if os.path.exists(options['database_file'] + suffix):
+                    os.remove(options['database_file'] + suffix)
+
+    def seed(self, options):
+        self.stdout.write(f"Seeding {options['requests']:,} maintenance requests...")
+        generator = GenerateData(stdout=self.stdout, stderr=self.stderr)
+        generator.configure(options['seed'], 5000)
+        teams = generator.generate_teams(8)
+        generator.generate_users(200, teams)
+        equipment = generator.generate_equipment(1000, teams)
+        generator.generate_requests(options['requests'], equipment, 1)
+        bounds = MaintenanceRequest.objects.aggregate(low=Min('id'), high=Max('id'))
+        return bounds['low'], bounds['high']
+
+    def run_profile(self, profile, id_range, options):
+        # WAL sticks to the database file, so switch the journal mode once up
+        # front; workers changing it while others are connected would fail
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=%s' % ('WAL' if profile == 'tuned' else 'DELETE'))
+        # Forked workers must not share the parent's SQLite handle
+        connections.close_all()
+        processes = options['processes']
+        start_at = time.time() + 1
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [
+                pool.submit(
+                    run_worker, worker, start_at, options['duration'], options['write_ratio'],
+                    id_range, options['seed'],
+                )
+                for worker in range(processes)
+            ]
+            results = [future.result() for future in futures]
+
+        reads = sorted(latency for worker_reads, _, _ in results for latency in worker_reads)
+        writes = sorted(latency for _, worker_writes, _ in results for latency in worker_writes)
+        errors = sum(worker_errors for _, _, worker_errors in results)
+        duration = options['duration']
+        self.stdout.write(
+            f"{profile:<10}{(len(reads) + len(writes)) / duration:>9.0f}{len(reads) / duration:>9.0f}"
+            f"{len(writes) / duration:>10.0f}"
+            f"{percentile(reads, 0.5) * 1000:>8.1f}ms{percentile(reads, 0.99) * 1000:>8.1f}ms"
+            f"{percentile(writes, 0.5) * 1000:>9.1f}ms{percentile(writes, 0.99) * 1000:>9.1f}ms"
+            f"{errors:>8}"
+        )
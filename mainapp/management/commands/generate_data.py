@@ -1,12 +1,176 @@
-from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
-from mainapp.models import MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest
-from faker import Faker
+import math
 import random
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import timedelta
 from decimal import Decimal
 
-fake = Faker()
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from mainapp.models import (
+    MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest, MaintenanceSchedule, Notification,
+)
+
+TEAM_TYPES = [
+    'Electrical', 'Mechanical', 'HVAC', 'Plumbing', 'IT Support',
+    'Facility Maintenance', 'Equipment Repair', 'Preventive Maintenance'
+]
+
+DEPARTMENTS = [key for key, _ in Equipment.DEPARTMENT_CHOICES]
+
+EQUIPMENT_CATALOG = [
+    {'name': 'CNC Vertical Center', 'prefix': 'CNC-VC'},
+    {'name': 'Industrial Robot Arm', 'prefix': 'ROB-AR'},
+    {'name': 'Heavy Duty Conveyor', 'prefix': 'CON-HD'},
+    {'name': 'Electric Forklift', 'prefix': 'FL-EL'},
+    {'name': 'Rotary Screw Compressor', 'prefix': 'CMP-RS'},
+    {'name': 'Diesel Generator 500kVA', 'prefix': 'GEN-DS'},
+    {'name': 'Hydraulic Press 100T', 'prefix': 'PRS-HY'},
+    {'name': 'MIG Welding Station', 'prefix': 'WLD-MG'},
+    {'name': 'Precision Lathe', 'prefix': 'LTH-PR'},
+    {'name': '5-Axis Milling Machine', 'prefix': 'MLL-5A'},
+    {'name': 'CNC Press Brake', 'prefix': 'BRK-CN'},
+    {'name': 'Surface Grinder', 'prefix': 'GRD-SF'},
+    {'name': 'Radial Drill Press', 'prefix': 'DRL-RD'},
+    {'name': 'Industrial 3D Printer', 'prefix': 'PRT-3D'},
+    {'name': 'Fiber Laser Cutter', 'prefix': 'LSR-FB'},
+    {'name': 'Injection Molder 200T', 'prefix': 'INJ-20'},
+    {'name': 'Vacuum Furnace', 'prefix': 'FUR-VC'},
+    {'name': 'Powder Coating Booth', 'prefix': 'BTH-PC'},
+    {'name': 'Overhead Crane 10T', 'prefix': 'CRN-OV'},
+    {'name': 'Auto-Palletizer', 'prefix': 'PLT-AU'}
+]
+
+SUBJECTS = {
+    'Corrective': [
+        'Repair required for {}',
+        '{} malfunction',
+        'Emergency repair - {}',
+        '{} not functioning properly',
+        'Breakdown: {}',
+    ],
+    'Preventive': [
+        'Scheduled maintenance for {}',
+        'Preventive service - {}',
+        'Routine inspection: {}',
+        '{} quarterly maintenance',
+        'Annual service for {}',
+    ],
+}
+
+STATUSES = ['New', 'In Progress', 'Repaired', 'Scrap']
+
+# Status weights by request age in days: recent requests are still open,
+# old ones have almost all been closed
+STATUS_WEIGHTS_BY_AGE = [
+    (3, [70, 25, 5, 0]),
+    (14, [30, 40, 25, 5]),
+    (60, [8, 17, 65, 10]),
+    (None, [2, 3, 83, 12]),
+]
+
+HISTORY_DAYS = 730
+
+# Request generation context of a worker process (see generate_request_rows)
+_context = None
+
+
+def set_request_context(context):
+    global _context
+    _context = context
+
+
+def generate_request_rows(chunk_index, start, count):
+    """Plain tuples for requests ``start`` to ``start + count``, reproducible from the seed and chunk index
+
+    Runs in worker processes, so it only uses the context set by
+    ``set_request_context`` and never touches the database. Each chunk
+    covers its own slice of the history, so chunks come out in created_at
+    order, as ids and created_at go together in a real table.
+    """
+    ctx = _context
+    rng = random.Random(f"{ctx['seed']}:requests:{chunk_index}")
+    now = ctx['now']
+    span = HISTORY_DAYS * 86400
+    low, high = start / ctx['total'], (start + count) / ctx['total']
+    rows = []
+    for _ in range(count):
+        # More requests in recent months, mostly on weekdays during working hours
+        while True:
+            created_at = now - timedelta(seconds=span * (1 - rng.uniform(low, high) ** 0.6))
+            if created_at.weekday() < 5 or rng.random() < 0.25:
+                break
+        hour = min(max(int(rng.gauss(11, 3)), 6), 20)
+        created_at = min(created_at.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60)), now)
+
+        equipment_id, equipment_name, team_id = rng.choices(ctx['equipment'], cum_weights=ctx['equipment_weights'])[0]
+        request_type = 'Preventive' if rng.random() < 0.3 else 'Corrective'
+        age = (now - created_at).days
+        weights = next(weights for limit, weights in STATUS_WEIGHTS_BY_AGE if limit is None or age < limit)
+        status = rng.choices(STATUSES, weights=weights)[0]
+
+        technician_id = None
+        if rng.random() < (0.4 if status == 'New' else 0.95):
+            candidates = ctx['technicians_by_team'].get(team_id) or ctx['technicians']
+            if candidates:
+                technician_id = rng.choice(candidates)
+
+        # Corrective work is scheduled right away, preventive work weeks ahead
+        lead_days = rng.randint(0, 3) if request_type == 'Corrective' else rng.randint(7, 45)
+        scheduled_date = created_at.date() + timedelta(days=lead_days)
+        due_date = scheduled_date + timedelta(days=rng.randint(1, 14))
+        duration_hours = min(max(rng.lognormvariate(math.log(3), 0.7), 0.5), 48.0)
+        updated_at = created_at + (now - created_at) * rng.random() if status != 'New' else created_at
+
+        rows.append((
+            rng.choice(SUBJECTS[request_type]).format(equipment_name), request_type, equipment_id,
+            team_id, technician_id, status, scheduled_date, f'{duration_hours:.2f}', due_date,
+            created_at, updated_at,
+        ))
+    rows.sort(key=lambda row: row[9])
+    return rows
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """Keep the created_at/updated_at values we set instead of auto_now(_add) overwriting them"""
+    fields = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)
+              or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Progress:
+    """Progress and throughput readout, printed at most once a second"""
+
+    def __init__(self, stdout, label, total):
+        self.stdout = stdout
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.started = self.last = time.perf_counter()
+
+    def advance(self, count):
+        self.done += count
+        now = time.perf_counter()
+        if now - self.last >= 1 or self.done == self.total:
+            self.last = now
+            rate = self.done / (now - self.started) if now > self.started else 0
+            percent = self.done / self.total * 100 if self.total else 100
+            self.stdout.write(f'  {self.label}: {self.done:,}/{self.total:,} ({percent:.0f}%), {rate:,.0f} rows/s')
 
 
 class Command(BaseCommand):
@@ -42,15 +206,41 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing data before generating new data'
         )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Random seed; the same seed on the same day generates the same data'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk_create batch'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes generating maintenance requests (inserts stay in this process)'
+        )
+
+    def configure(self, seed, batch_size):
+        """Set up the seeded generators (also used by benchmark_api to seed its database)"""
+        self.rng = random.Random(seed)
+        self.fake = Faker()
+        self.fake.seed_instance(seed)
+        self.seed = seed
+        self.batch_size = batch_size
 
     def handle(self, *args, **options):
+        seed = options['seed'] if options['seed'] is not None else random.randrange(2 ** 32)
+        self.stdout.write(f'Using seed {seed}')
+        self.configure(seed, options['batch_size'])
+        started = time.perf_counter()
+
         if options['clear']:
             self.stdout.write('Clearing existing data...')
-            MaintenanceRequest.objects.all().delete()
-            Equipment.objects.all().delete()
-            UserProfile.objects.all().delete()
-            User.objects.exclude(is_superuser=True).delete()
-            MaintenanceTeam.objects.all().delete()
+            self.clear()
             self.stdout.write(self.style.SUCCESS('✓ Cleared existing data'))
 
         # Generate Maintenance Teams
@@ -70,194 +260,174 @@ class Command(BaseCommand):
 
         # Generate Maintenance Requests
         self.stdout.write('Generating maintenance requests...')
-        requests = self.generate_requests(options['requests'], equipment_list, teams, users)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(requests)} maintenance requests'))
+        created = self.generate_requests(options['requests'], equipment_list, options['workers'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Created {created} maintenance requests'))
 
-        self.stdout.write(self.style.SUCCESS('\n✓ Data generation complete!'))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Data generation complete in {elapsed:.1f}s!'))
+
+    def clear(self):
+        """Delete generated data with set-based DELETEs instead of per-row collection
+
+        Raw deletes skip the per-row signals, so no tombstones are written:
+        after a reset clients are expected to start over with a full sync.
+        Tables are emptied children first, so foreign keys hold throughout.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {Notification._meta.db_table} WHERE related_request_id IS NOT NULL'
+                f' OR recipient_id IN (SELECT id FROM {User._meta.db_table} WHERE NOT is_superuser)'
+            )
+            for model in (MaintenanceRequest, MaintenanceSchedule, Equipment, UserProfile):
+                cursor.execute(f'DELETE FROM {model._meta.db_table}')
+            # Users and teams are few, and users have cascades outside this app
+            User.objects.exclude(is_superuser=True).delete()
+            MaintenanceTeam.objects.all().delete()
 
     def generate_teams(self, count):
         """Generate maintenance teams"""
-        team_types = [
-            'Electrical', 'Mechanical', 'HVAC', 'Plumbing', 'IT Support',
-            'Facility Maintenance', 'Equipment Repair', 'Preventive Maintenance'
-        ]
-        
-        teams = []
+        existing = set(MaintenanceTeam.objects.values_list('team_name', flat=True))
+        names = []
         for i in range(count):
-            if i < len(team_types):
-                team_name = f"{team_types[i]} Team"
-            else:
-                team_name = f"{fake.catch_phrase()} Team"
-            
-            team = MaintenanceTeam.objects.create(team_name=team_name)
-            teams.append(team)
-        
-        return teams
+            name = f'{TEAM_TYPES[i]} Team' if i < len(TEAM_TYPES) else f'{self.fake.catch_phrase()} Team'
+            while name in existing:
+                name = f'{self.fake.catch_phrase()} Team'
+            existing.add(name)
+            names.append(name)
+        return MaintenanceTeam.objects.bulk_create([MaintenanceTeam(team_name=name) for name in names])
 
     def generate_users(self, count, teams):
         """Generate users with roles distributed as 60% user, 30% technician, 10% manager"""
-        users = []
         roles = ['user'] * 12 + ['technician'] * 6 + ['manager'] * 2  # Distribution pattern
-        
-        for i in range(count):
-            # Create Django User
-            username = fake.user_name() + str(random.randint(100, 999))
-            first_name = fake.first_name()
-            last_name = fake.last_name()
-            email = f"{username}@{fake.domain_name()}"
-            
-            user = User.objects.create_user(
-                username=username,
-                first_name=first_name,
-                last_name=last_name,
-                email=email,
-                password='password123'  # Default password for testing
-            )
-            
-            # Create UserProfile
-            role = roles[i % len(roles)]
-            team = random.choice(teams) if teams else None
-            avatar_url = fake.image_url() if random.random() > 0.5 else None
-            
-            profile = UserProfile.objects.create(
-                user=user,
-                role=role,
-                team=team,
-                avatar_url=avatar_url
-            )
-            
-            users.append(user)
-        
+        # Hashing once instead of per user: PBKDF2 is deliberately slow
+        password = make_password('password123')  # Default password for testing
+        offset = (User.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        progress = Progress(self.stdout, 'users', count)
+
+        users = []
+        for start in range(0, count, self.batch_size):
+            batch = []
+            for i in range(start, min(start + self.batch_size, count)):
+                first_name = self.fake.first_name()
+                last_name = self.fake.last_name()
+                # The index keeps usernames unique without a lookup per user
+                username = f'{first_name.lower()}.{last_name.lower()}{offset + i}'
+                batch.append(User(
+                    username=username,
+                    first_name=first_name,
+                    last_name=last_name,
+                    email=f'{username}@{self.fake.domain_name()}',
+                    password=password,
+                ))
+            with transaction.atomic():
+                batch = User.objects.bulk_create(batch)
+                UserProfile.objects.bulk_create([
+                    UserProfile(
+                        user=user,
+                        role=roles[(start + i) % len(roles)],
+                        team=self.rng.choice(teams) if teams else None,
+                        avatar_url=self.fake.image_url() if self.rng.random() > 0.5 else None,
+                    )
+                    for i, user in enumerate(batch)
+                ])
+            users.extend(batch)
+            progress.advance(len(batch))
         return users
 
     def generate_equipment(self, count, teams):
         """Generate equipment items"""
+        if not teams:
+            self.stdout.write(self.style.WARNING('Cannot generate equipment without teams'))
+            return []
+        offset = (Equipment.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        today = timezone.localdate()
+        progress = Progress(self.stdout, 'equipment', count)
+
         equipment_list = []
-        departments = [
-            'Engineering', 'Manufacturing', 'Quality Control', 'Research & Development',
-            'Production', 'Warehouse', 'Shipping', 'Maintenance', 'IT & Admin', 'Facilities'
-        ]
-        
-        # More realistic equipment data with models
-        equipment_catalog = [
-            {'name': 'CNC Vertical Center', 'prefix': 'CNC-VC'},
-            {'name': 'Industrial Robot Arm', 'prefix': 'ROB-AR'},
-            {'name': 'Heavy Duty Conveyor', 'prefix': 'CON-HD'},
-            {'name': 'Electric Forklift', 'prefix': 'FL-EL'},
-            {'name': 'Rotary Screw Compressor', 'prefix': 'CMP-RS'},
-            {'name': 'Diesel Generator 500kVA', 'prefix': 'GEN-DS'},
-            {'name': 'Hydraulic Press 100T', 'prefix': 'PRS-HY'},
-            {'name': 'MIG Welding Station', 'prefix': 'WLD-MG'},
-            {'name': 'Precision Lathe', 'prefix': 'LTH-PR'},
-            {'name': '5-Axis Milling Machine', 'prefix': 'MLL-5A'},
-            {'name': 'CNC Press Brake', 'prefix': 'BRK-CN'},
-            {'name': 'Surface Grinder', 'prefix': 'GRD-SF'},
-            {'name': 'Radial Drill Press', 'prefix': 'DRL-RD'},
-            {'name': 'Industrial 3D Printer', 'prefix': 'PRT-3D'},
-            {'name': 'Fiber Laser Cutter', 'prefix': 'LSR-FB'},
-            {'name': 'Injection Molder 200T', 'prefix': 'INJ-20'},
-            {'name': 'Vacuum Furnace', 'prefix': 'FUR-VC'},
-            {'name': 'Powder Coating Booth', 'prefix': 'BTH-PC'},
-            {'name': 'Overhead Crane 10T', 'prefix': 'CRN-Ov'},
-            {'name': 'Auto-Palletizer', 'prefix': 'PLT-AU'}
-        ]
-        
-        for i in range(count):
-            item = random.choice(equipment_catalog)
-            name = item['name']
-            
-            # Generate a consistent serial number format
-            serial_number = f"{item['prefix']}-{fake.bothify(text='####-???').upper()}"
-            
-            department = random.choice(departments)
-            owner_name = fake.name()
-            location = f"Building {random.choice(['A', 'B', 'C'])}, Floor {random.randint(1, 3)}, Area {random.choice(['North', 'South', 'East', 'West'])}"
-            
-            # Random dates
-            purchase_date = fake.date_between(start_date='-5y', end_date='today')
-            warranty_end = fake.date_between(start_date=purchase_date, end_date='+3y')
-            
-            team = random.choice(teams) if teams else None
-            is_active = random.random() > 0.05  # 95% active
-            
-            equipment = Equipment.objects.create(
-                name=name,
-                serial_number=serial_number,
-                department=department,
-                owner_name=owner_name,
-                location=location,
-                purchase_date=purchase_date,
-                warranty_end=warranty_end,
-                maintenance_team=team,
-                is_active=is_active
-            )
-            
-            equipment_list.append(equipment)
-        
+        for start in range(0, count, self.batch_size):
+            batch = []
+            for i in range(start, min(start + self.batch_size, count)):
+                item = self.rng.choice(EQUIPMENT_CATALOG)
+                purchase_date = today - timedelta(days=self.rng.randint(0, 5 * 365))
+                batch.append(Equipment(
+                    name=item['name'],
+                    # Consistent serial number format, unique through the index
+                    serial_number=f"{item['prefix']}-{offset + i:07d}-{self.fake.bothify(text='???').upper()}",
+                    department=self.rng.choice(DEPARTMENTS),
+                    owner_name=self.fake.name(),
+                    location=(f"Building {self.rng.choice('ABC')}, Floor {self.rng.randint(1, 3)}, "
+                              f"Area {self.rng.choice(['North', 'South', 'East', 'West'])}"),
+                    purchase_date=purchase_date,
+                    warranty_end=purchase_date + timedelta(days=self.rng.randint(365, 3 * 365)),
+                    maintenance_team=self.rng.choice(teams),
+                    is_active=self.rng.random() > 0.05,  # 95% active
+                ))
+            equipment_list.extend(Equipment.objects.bulk_create(batch))
+            progress.advance(len(batch))
         return equipment_list
 
-    def generate_requests(self, count, equipment_list, teams, users):
-        """Generate maintenance requests"""
-        if not equipment_list or not teams:
+    def generate_requests(self, count, equipment_list, workers):
+        """Generate maintenance requests, optionally building the rows in a process pool"""
+        if not equipment_list:
             self.stdout.write(self.style.WARNING('Cannot generate requests without equipment and teams'))
-            return []
-        
-        requests = []
-        request_types = ['Corrective', 'Preventive']
-        statuses = ['New', 'In Progress', 'Repaired', 'Scrap']
-        status_weights = [40, 30, 20, 10]  # Distribution percentages
-        
-        # Get technicians
-        technician_profiles = UserProfile.objects.filter(role='technician')
-        technician_users = [profile.user for profile in technician_profiles] if technician_profiles.exists() else users[:5]
-        
-        for i in range(count):
-            equipment = random.choice(equipment_list)
-            team = equipment.maintenance_team
-            
-            # Subject based on request type
-            request_type = random.choices(request_types, weights=[70, 30])[0]
-            
-            if request_type == 'Corrective':
-                subjects = [
-                    f'Repair required for {equipment.name}',
-                    f'{equipment.name} malfunction',
-                    f'Emergency repair - {equipment.name}',
-                    f'{equipment.name} not functioning properly',
-                    f'Breakdown: {equipment.name}'
-                ]
+            return 0
+
+        technicians_by_team = defaultdict(list)
+        technicians = []
+        for user_id, team_id in UserProfile.objects.filter(role='technician').values_list('user_id', 'team_id'):
+            technicians.append(user_id)
+            technicians_by_team[team_id].append(user_id)
+
+        # A few machines break down far more often than the rest
+        weights = [self.rng.paretovariate(1.5) for _ in equipment_list]
+        cum_weights = []
+        total = 0
+        for weight in weights:
+            total += weight
+            cum_weights.append(total)
+
+        context = {
+            'seed': self.seed,
+            # History ends at the start of today so a seed gives the same data all day
+            'now': timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0),
+            'equipment': [(e.id, e.name, e.maintenance_team_id) for e in equipment_list],
+            'equipment_weights': cum_weights,
+            'technicians': technicians,
+            'technicians_by_team': dict(technicians_by_team),
+            'total': count,
+        }
+        chunks = [
+            (index, start, min(self.batch_size, count - start))
+            for index, start in enumerate(range(0, count, self.batch_size))
+        ]
+        progress = Progress(self.stdout, 'requests', count)
+
+        with explicit_timestamps(MaintenanceRequest):
+            if workers > 1:
+                with ProcessPoolExecutor(workers, initializer=set_request_context, initargs=(context,)) as pool:
+                    # Keep only a few chunks in flight so memory stays bounded
+                    pending = deque()
+                    for chunk in chunks:
+                        pending.append(pool.submit(generate_request_rows, *chunk))
+                        if len(pending) >= workers * 2:
+                            self.insert_requests(pending.popleft().result(), progress)
+                    while pending:
+                        self.insert_requests(pending.popleft().result(), progress)
             else:
-                subjects = [
-                    f'Scheduled maintenance for {equipment.name}',
-                    f'Preventive service - {equipment.name}',
-                    f'Routine inspection: {equipment.name}',
-                    f'{equipment.name} quarterly maintenance',
-                    f'Annual service for {equipment.name}'
-                ]
-            
-            subject = random.choice(subjects)
-            status = random.choices(statuses, weights=status_weights)[0]
-            
-            # Assign technician (70% chance)
-            technician = random.choice(technician_users) if random.random() > 0.3 and technician_users else None
-            
-            # Dates
-            scheduled_date = fake.date_between(start_date='-30d', end_date='+60d')
-            due_date = scheduled_date + timedelta(days=random.randint(1, 14))
-            duration_hours = Decimal(random.uniform(1.0, 24.0)).quantize(Decimal('0.01'))
-            
-            request = MaintenanceRequest.objects.create(
-                subject=subject,
-                request_type=request_type,
-                equipment=equipment,
-                team=team,
-                technician=technician,
-                status=status,
-                scheduled_date=scheduled_date,
-                duration_hours=duration_hours,
-                due_date=due_date
+                set_request_context(context)
+                for chunk in chunks:
+                    self.insert_requests(generate_request_rows(*chunk), progress)
+        return progress.done
+
+    def insert_requests(self, rows, progress):
+        MaintenanceRequest.objects.bulk_create([
+            MaintenanceRequest(
+                subject=subject, request_type=request_type, equipment_id=equipment_id, team_id=team_id,
+                technician_id=technician_id, status=status, scheduled_date=scheduled_date,
+                duration_hours=Decimal(duration_hours), due_date=due_date,
+                created_at=created_at, updated_at=updated_at,
             )
-            
-            requests.append(request)
-        
-        return requests
+            for (subject, request_type, equipment_id, team_id, technician_id, status,
+                 scheduled_date, duration_hours, due_date, created_at, updated_at) in rows
+        ])
+        progress.advance(len(rows))
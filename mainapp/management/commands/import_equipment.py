@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from mainapp.imports import EquipmentImporter, guess_format, read_records
+
+
+class Command(BaseCommand):
+    help = 'Import equipment from a CSV or NDJSON file (teams are matched by name)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file to import')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='File format (default: guessed from the extension)'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Update equipment whose serial number already exists instead of rejecting it'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of records validated and inserted per batch'
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or guess_format(options['path'])
+        importer = EquipmentImporter(upsert=options['upsert'], batch_size=options['batch_size'])
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = importer.run(read_records(stream, file_format))
+        except OSError as e:
+            raise CommandError(f'Cannot read {options["path"]}: {e}')
+        except UnicodeDecodeError:
+            raise CommandError('File is not valid UTF-8; records before the invalid data were imported')
+        elapsed = time.perf_counter() - started
+
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f"  record {error['record']}: {error['errors']}"))
+        if report['error_count'] > len(report['errors']):
+            self.stdout.write(f"  ... {report['error_count'] - len(report['errors'])} more errors not shown")
+
+        processed = report['created'] + report['updated'] + report['error_count']
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Created {report['created']}, updated {report['updated']}, "
+            f"rejected {report['error_count']} records in {elapsed:.2f}s "
+            f"({processed / elapsed * 60 if elapsed else 0:,.0f} records/min)"
+        ))
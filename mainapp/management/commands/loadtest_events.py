@@ -0,0 +1,150 @@
+import asyncio
+import json
+import resource
+import statistics
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Hold many idle /api/events/ connections open against a running ASGI server'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://127.0.0.1:8000/api/events/',
+            help='Event stream URL of the running server (e.g. uvicorn gardgear_backend.asgi:application)'
+        )
+        parser.add_argument(
+            '--connections',
+            type=int,
+            default=2000,
+            help='Number of concurrent SSE connections to open'
+        )
+        parser.add_argument(
+            '--duration',
+            type=int,
+            default=30,
+            help='Seconds to keep the connections idle once they are all open'
+        )
+        parser.add_argument(
+            '--touch-request',
+            type=int,
+            help='PATCH this maintenance request once connected and measure fan-out latency'
+        )
+        parser.add_argument(
+            '--server-pid',
+            type=int,
+            help='PID of the server worker, to report its resident memory'
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Only plain http:// URLs are supported')
+
+        # Each connection needs a file descriptor
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = min(hard, options['connections'] + 256)
+        if soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+        asyncio.run(self.run(url, options))
+
+    async def run(self, url, options):
+        total = options['connections']
+        connected = asyncio.Event()
+        received = []
+        state = {'open': 0, 'failed': 0, 'touched_at': None}
+        handshake_slots = asyncio.Semaphore(200)
+
+        async def client():
+            try:
+                async with handshake_slots:
+                    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+                    writer.write(
+                        f"GET {url.path or '/'}{'?' + url.query if url.query else ''} HTTP/1.1\r\n"
+                        f"Host: {url.netloc}\r\nAccept: text/event-stream\r\n\r\n".encode()
+                    )
+                    await writer.drain()
+                    while b'connected' not in await reader.readline():
+                        pass
+            except (OSError, asyncio.IncompleteReadError):
+                state['failed'] += 1
+                return
+            state['open'] += 1
+            if state['open'] + state['failed'] == total:
+                connected.set()
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    if line.startswith(b'event: maintenance_request') and state['touched_at']:
+                        received.append(time.perf_counter() - state['touched_at'])
+            finally:
+                state['open'] -= 1
+                writer.close()
+
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(client()) for _ in range(total)]
+        try:
+            await asyncio.wait_for(connected.wait(), timeout=120)
+        except asyncio.TimeoutError:
+            pass
+        self.stdout.write(
+            f"Opened {state['open']}/{total} connections in {time.perf_counter() - started:.2f}s "
+            f"({state['failed']} failed)"
+        )
+        self.report_memory(options)
+
+        if options['touch_request']:
+            await self.touch(url, options['touch_request'], state)
+            await asyncio.sleep(5)
+            if received:
+                received.sort()
+                self.stdout.write(
+                    f"Event delivered to {len(received)}/{state['open']} clients: "
+                    f"p50={statistics.median(received) * 1000:.1f}ms "
+                    f"p99={received[int(len(received) * 0.99) - 1] * 1000:.1f}ms"
+                )
+            else:
+                self.stdout.write(self.style.WARNING('No client received the event'))
+
+        self.stdout.write(f"Holding connections idle for {options['duration']}s...")
+        await asyncio.sleep(options['duration'])
+        self.stdout.write(f"{state['open']} connections still open after idling")
+        self.report_memory(options)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def touch(self, url, request_id, state):
+        """Re-save a request through the API so the server broadcasts an update"""
+        endpoint = f"{url.scheme}://{url.netloc}/api/maintenance-requests/{request_id}/"
+
+        def patch():
+            with urllib.request.urlopen(endpoint) as response:
+                current = json.load(response)
+            body = json.dumps({'status': current['status']}).encode()
+            request = urllib.request.Request(
+                endpoint, data=body, method='PATCH', headers={'Content-Type': 'application/json'}
+            )
+            state['touched_at'] = time.perf_counter()
+            urllib.request.urlopen(request).close()
+
+        await asyncio.get_running_loop().run_in_executor(None, patch)
+
+    def report_memory(self, options):
+        if not options['server_pid']:
+            return
+        try:
+            with open(f"/proc/{options['server_pid']}/status") as status:
+                rss = next(line for line in status if line.startswith('VmRSS'))
+        except (OSError, StopIteration):
+            return
+        self.stdout.write(f"Server {rss.strip()}")
@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from mainapp.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS'
+
+    def handle(self, *args, **options):
+        days = getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30)
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'✓ Deleted {deleted} tombstones older than {days} days'))
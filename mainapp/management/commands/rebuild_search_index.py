@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from mainapp.search import SEARCH_INDEXES, SUPPORTED_VENDORS
+
+
+class Command(BaseCommand):
+    help = 'Recreate the full-text search tables and triggers and repopulate them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild (default: "default")'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor not in SUPPORTED_VENDORS:
+            raise CommandError(f'Full-text search is not available on {connection.vendor}')
+
+        for index in SEARCH_INDEXES:
+            index.create(connection)
+            indexed = index.rebuild(connection)
+            self.stdout.write(self.style.SUCCESS(f'✓ Indexed {indexed} rows into {index.name}'))
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from mainapp.recurrence import materialize
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming preventive maintenance requests from the equipment maintenance schedules'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days',
+            type=int,
+            default=30,
+            help='How many days ahead of today to create requests for (default 30)'
+        )
+        parser.add_argument(
+            '--date',
+            help='Run as if today were this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be created without writing anything'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of requests inserted per INSERT statement'
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['date']:
+            try:
+                today = parse_date(options['date'])
+            except ValueError:
+                today = None
+            if today is None:
+                raise CommandError('--date must be a valid YYYY-MM-DD date')
+        if options['horizon_days'] < 0:
+            raise CommandError('--horizon-days must not be negative')
+
+        started = time.perf_counter()
+        self.stdout.write(f"Materializing preventive maintenance from {today} for {options['horizon_days']} days")
+        result = materialize(
+            horizon_days=options['horizon_days'],
+            today=today,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Checked {result.schedules} schedules ({result.calendar_rules} calendar, "
+            f"{result.hour_rules_due} hour rules due) in {elapsed:.2f}s."
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run: would create {result.requests} requests.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Created {result.requests} preventive maintenance requests.'))
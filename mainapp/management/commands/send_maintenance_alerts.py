@@ -1,55 +1,133 @@
+import time
+from collections import defaultdict
+
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 from django.utils import timezone
+from mainapp.metrics import ALERT_LAST_RUN, ALERT_NOTIFICATIONS, ALERT_REQUESTS, ALERT_RUN_DURATION
 from mainapp.models import MaintenanceRequest, Notification, UserProfile
-from django.contrib.auth.models import User
+from mainapp.signals import notification_event, publish_on_commit
+
+# Supported by SQLite (3.35+) and PostgreSQL. Rows the unique
+# (alert_date, related_request, recipient) constraint rejects are skipped,
+# so only ids this statement inserted come back.
+INSERT_SQL = '''
+    INSERT INTO notifications (recipient_id, message, is_read, related_request_id, alert_date, created_at, updated_at)
+    VALUES {rows}
+    ON CONFLICT DO NOTHING
+    RETURNING id
+'''
+
+
+def insert_alerts(alerts, day, now):
+    """Insert one notification per (recipient id, message, request id); returns the new ids"""
+    ops = connection.ops
+    alert_date = ops.adapt_datefield_value(day)
+    timestamp = ops.adapt_datetimefield_value(now)
+    params = []
+    for recipient_id, message, request_id in alerts:
+        params += [recipient_id, message, False, request_id, alert_date, timestamp, timestamp]
+    with connection.cursor() as cursor:
+        cursor.execute(INSERT_SQL.format(rows=', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(alerts))), params)
+        return [notification_id for notification_id, in cursor.fetchall()]
+
 
 class Command(BaseCommand):
     help = 'Send alerts for scheduled maintenance requests'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be sent without writing notifications'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of notifications inserted per INSERT statement'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
         today = timezone.now().date()
+        dry_run = options['dry_run']
         self.stdout.write(f"Checking for maintenance requests scheduled for: {today}")
 
-        requests = MaintenanceRequest.objects.filter(scheduled_date=today)
-        count = 0
+        requests = list(
+            MaintenanceRequest.objects.filter(scheduled_date=today).order_by('id').values(
+                'id', 'subject', 'scheduled_date', 'team_id', 'technician_id',
+                'technician__username', 'equipment__name',
+            )
+        )
 
+        # Team members are only needed for requests without an assigned technician
+        unassigned_teams = {req['team_id'] for req in requests if not req['technician_id']}
+        team_technicians = defaultdict(list)
+        if unassigned_teams:
+            profiles = UserProfile.objects.filter(
+                role='technician', team_id__in=unassigned_teams
+            ).values_list('team_id', 'user_id', 'user__username')
+            for team_id, user_id, username in profiles:
+                team_technicians[team_id].append((user_id, username))
+
+        # Everything already alerted today, fetched in one query
+        already_sent = set(
+            Notification.objects.filter(alert_date=today).order_by().values_list(
+                'related_request_id', 'recipient_id'
+            )
+        )
+
+        pending = []
+        skipped = 0
         for req in requests:
             # Determine recipients: Assigned Technician or Team members if no tech assigned
-            recipients = []
-            
-            if req.technician:
-                recipients.append(req.technician)
-            elif req.team:
-                # Get all technicians in the team
-                team_techs = UserProfile.objects.filter(team=req.team, role='technician')
-                for profile in team_techs:
-                    recipients.append(profile.user)
-            
-            # Additional fallback: Admins/Managers? For now, stick to direct assignees/team.
-
-            for user in recipients:
-                # Check if notification already exists for this request today
-                # This prevents duplicate alerts if command runs multiple times
-                exists = Notification.objects.filter(
-                    recipient=user, 
-                    related_request=req,
-                    created_at__date=today
-                ).exists()
-
-                if not exists:
-                    message = (
-                        f"Reminder: Scheduled maintenance '{req.subject}' for equipment "
-                        f"'{req.equipment.name}' is due today ({req.scheduled_date})."
-                    )
-                    
-                    Notification.objects.create(
-                        recipient=user,
-                        message=message,
-                        related_request=req
-                    )
-                    self.stdout.write(f"  - Sent notification to {user.username} for request #{req.id}")
-                    count += 1
-                else:
-                    self.stdout.write(f"  - Notification already sent to {user.username} for request #{req.id}")
-
-        self.stdout.write(self.style.SUCCESS(f'Successfully processed. Sent {count} new notifications.'))
+            if req['technician_id']:
+                recipients = [(req['technician_id'], req['technician__username'])]
+            else:
+                recipients = team_technicians.get(req['team_id'], [])
+
+            message = (
+                f"Reminder: Scheduled maintenance '{req['subject']}' for equipment "
+                f"'{req['equipment__name']}' is due today ({req['scheduled_date']})."
+            )
+            for user_id, username in recipients:
+                if (req['id'], user_id) in already_sent:
+                    skipped += 1
+                    if options['verbosity'] >= 2:
+                        self.stdout.write(f"  - Notification already sent to {username} for request #{req['id']}")
+                    continue
+                pending.append((user_id, message, req['id']))
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f"  - Sending notification to {username} for request #{req['id']}")
+
+        sent = 0
+        if not dry_run and pending:
+            # The unique (alert_date, related_request, recipient) constraint keeps
+            # concurrent or repeated runs from inserting duplicates.
+            # RETURNING reports exactly the rows this run inserted.
+            now = timezone.now()
+            batch_size = options['batch_size']
+            with transaction.atomic():
+                inserted_ids = []
+                for start in range(0, len(pending), batch_size):
+                    inserted_ids += insert_alerts(pending[start:start + batch_size], today, now)
+                sent = len(inserted_ids)
+                # Raw inserts send no post_save, so publish to the change feed here
+                for notification in Notification.objects.filter(id__in=inserted_ids).order_by('id'):
+                    publish_on_commit(notification_event(notification))
+
+        elapsed = time.perf_counter() - started
+        ALERT_RUN_DURATION.observe(elapsed)
+        ALERT_REQUESTS.inc(len(requests))
+        ALERT_NOTIFICATIONS.labels('dry_run' if dry_run else 'sent').inc(len(pending) if dry_run else sent)
+        ALERT_NOTIFICATIONS.labels('skipped').inc(skipped)
+        ALERT_LAST_RUN.set_to_current_time()
+        self.stdout.write(
+            f"Processed {len(requests)} requests in {elapsed:.2f}s "
+            f"({skipped} notifications already sent)."
+        )
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'Dry run: would send {len(pending)} new notifications.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Successfully processed. Sent {sent} new notifications.'))
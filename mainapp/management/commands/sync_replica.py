@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from mainapp.replicas import replica_alias
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database over the local replica stand-in'
+
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if alias is None:
+            raise CommandError('No replica database is configured (set SQLITE_REPLICA_PATH)')
+        primary, replica = connections['default'], connections[alias]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('Only a SQLite stand-in can be refreshed; a real replica is kept current by the server')
+
+        primary.ensure_connection()
+        replica.ensure_connection()
+        # Online backup: consistent even while the primary is being written to
+        primary.connection.backup(replica.connection)
+        self.stdout.write(self.style.SUCCESS(f"✓ Copied {primary.settings_dict['NAME']} to {replica.settings_dict['NAME']}"))
@@ -0,0 +1,128 @@
+"""Prometheus metrics, served in the text format at /metrics.
+
+A single process keeps its samples in memory. Servers with several worker
+processes set ``PROMETHEUS_MULTIPROC_DIR`` (gunicorn.conf.py does) before
+the workers start: every process then writes its samples to memory-mapped
+files there and /metrics adds up the files of all processes, so any worker
+can answer the scrape. The launcher empties the directory on start and
+marks exited workers dead; counters would otherwise carry on from previous
+runs. Management commands run with the same variable (e.g.
+send_maintenance_alerts from cron) add their samples to the server's.
+
+Request metrics are labelled by ``view``: ``<basename>-<action>`` for
+viewset routes (e.g. ``maintenance-request-by_status``), the URL name for
+other views and ``unmatched`` for everything else, which keeps label
+cardinality bounded.
+"""
+import os
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse
+
+# prometheus_client picks the multiprocess value class when the variable is set
+MULTIPROCESS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if MULTIPROCESS_DIR:
+    os.makedirs(MULTIPROCESS_DIR, exist_ok=True)
+
+from prometheus_client import (  # noqa: E402  (needs the directory above)
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+REQUESTS = Counter(
+    'gardgear_http_requests_total', 'HTTP requests handled', ['view', 'method', 'status']
+)
+REQUEST_DURATION = Histogram(
+    'gardgear_http_request_duration_seconds', 'Time to produce the response', ['view', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSE_SIZE = Histogram(
+    'gardgear_http_response_size_bytes', 'Response body size (streamed responses excluded)', ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+DB_QUERIES = Histogram(
+    'gardgear_http_db_queries', 'SQL statements per request', ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+DB_DURATION = Counter(
+    'gardgear_http_db_duration_seconds', 'Time spent in SQL while handling requests', ['view']
+)
+CACHE_LOOKUPS = Counter(
+    'gardgear_cache_lookups_total', 'Generation cache lookups by viewset and result (hit/miss)', ['cache', 'result']
+)
+ALERT_RUN_DURATION = Histogram(
+    'gardgear_maintenance_alerts_duration_seconds', 'send_maintenance_alerts run time',
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+ALERT_REQUESTS = Counter(
+    'gardgear_maintenance_alerts_requests_total', 'Scheduled maintenance requests processed by send_maintenance_alerts'
+)
+ALERT_NOTIFICATIONS = Counter(
+    'gardgear_maintenance_alerts_notifications_total',
+    'Notifications handled by send_maintenance_alerts by outcome (sent/skipped/dry_run)', ['outcome'],
+)
+ALERT_LAST_RUN = Gauge(
+    'gardgear_maintenance_alerts_last_run_timestamp_seconds', 'End of the last send_maintenance_alerts run',
+    multiprocess_mode='max',
+)
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    actions = getattr(match.func, 'actions', None)
+    if actions:
+        basename = match.func.initkwargs.get('basename')
+        action = actions.get(request.method.lower())
+        if basename and action:
+            return f'{basename}-{action}'
+    return match.url_name or match.view_name or 'unmatched'
+
+
+def observe_request(request, response, duration):
+    view = view_label(request)
+    REQUESTS.labels(view, request.method, response.status_code).inc()
+    REQUEST_DURATION.labels(view, request.method).observe(duration)
+    if not response.streaming:
+        RESPONSE_SIZE.labels(view).observe(len(response.content))
+    # Set by QueryInstrumentationMiddleware, which runs inside this one
+    recorder = getattr(request, '_query_recorder', None)
+    if recorder is not None:
+        DB_QUERIES.labels(view).observe(recorder.count)
+        DB_DURATION.labels(view).inc(recorder.duration)
+
+
+class MetricsMiddleware:
+    """Record request count, latency, response size and SQL use per view"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = perf_counter()
+        response = self.get_response(request)
+        observe_request(request, response, perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = perf_counter()
+        response = await self.get_response(request)
+        observe_request(request, response, perf_counter() - started)
+        return response
+
+
+def metrics_view(request):
+    """Samples of every process (or of this one), in the Prometheus text format"""
+    registry = REGISTRY
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
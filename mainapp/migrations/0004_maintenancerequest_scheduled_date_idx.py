@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mainapp", "0003_notification"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="maintenancerequest",
+            index=models.Index(
+                fields=["scheduled_date"], name="mreq_scheduled_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mainapp", "0004_maintenancerequest_scheduled_date_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="equipment",
+            index=models.Index(
+                fields=["maintenance_team", "is_active"], name="equip_team_active_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="maintenancerequest",
+            index=models.Index(fields=["created_at", "id"], name="mreq_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="maintenancerequest",
+            index=models.Index(
+                fields=["status", "created_at", "id"], name="mreq_status_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="maintenancerequest",
+            index=models.Index(
+                fields=["team", "created_at"], name="mreq_team_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="maintenancerequest",
+            index=models.Index(
+                fields=["technician", "created_at"], name="mreq_tech_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="maintenancerequest",
+            index=models.Index(
+                fields=["status", "due_date"], name="mreq_status_due_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["recipient", "created_at"], name="notif_recipient_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(fields=["role", "team"], name="users_role_team_idx"),
+        ),
+    ]
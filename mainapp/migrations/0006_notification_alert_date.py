@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mainapp", "0005_access_pattern_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="alert_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="notification",
+            constraint=models.UniqueConstraint(
+                fields=("alert_date", "related_request", "recipient"),
+                name="notif_unique_daily_alert",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mainapp", "0006_notification_alert_date"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["recipient", "is_read"], name="notif_recipient_read_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mainapp", "0007_notification_recipient_read_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="equipment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="maintenancerequest",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="maintenanceteam",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="equipment",
+            index=models.Index(fields=["updated_at"], name="equip_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="maintenancerequest",
+            index=models.Index(fields=["updated_at"], name="mreq_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="maintenanceteam",
+            index=models.Index(fields=["updated_at"], name="team_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(fields=["updated_at"], name="notif_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(fields=["updated_at"], name="users_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mainapp", "0008_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=50)),
+                ("object_id", models.BigIntegerField()),
+                ("recipient_id", models.IntegerField(blank=True, null=True)),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "tombstones",
+                "indexes": [
+                    models.Index(
+                        fields=["deleted_at", "id"], name="tombstone_deleted_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:48
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mainapp", "0009_tombstone"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="equipment",
+            name="operating_hours",
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=10),
+        ),
+        migrations.CreateModel(
+            name="MaintenanceSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=255)),
+                (
+                    "interval",
+                    models.PositiveIntegerField(
+                        validators=[django.core.validators.MinValueValidator(1)]
+                    ),
+                ),
+                (
+                    "unit",
+                    models.CharField(
+                        choices=[
+                            ("days", "Days"),
+                            ("weeks", "Weeks"),
+                            ("months", "Months"),
+                            ("hours", "Operating hours"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                (
+                    "start_hours",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=10),
+                ),
+                (
+                    "duration_hours",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=5, null=True
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("materialized_until", models.DateField(blank=True, null=True)),
+                (
+                    "materialized_hours",
+                    models.DecimalField(
+                        blank=True, decimal_places=1, max_digits=10, null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "equipment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="maintenance_schedules",
+                        to="mainapp.equipment",
+                    ),
+                ),
+                (
+                    "technician",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="maintenance_schedules",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "maintenance_schedule",
+            },
+        ),
+        migrations.AddField(
+            model_name="maintenancerequest",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="maintenance_requests",
+                to="mainapp.maintenanceschedule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="maintenancerequest",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "scheduled_date"), name="mreq_unique_schedule_date"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="maintenanceschedule",
+            index=models.Index(
+                fields=["is_active", "unit"], name="schedule_active_unit_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="maintenanceschedule",
+            index=models.Index(fields=["updated_at"], name="schedule_updated_idx"),
+        ),
+    ]
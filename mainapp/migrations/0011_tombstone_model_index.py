@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mainapp", "0010_maintenance_schedule"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["model", "deleted_at"], name="tombstone_model_idx"
+            ),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -5,9 +6,13 @@ from django.contrib.auth.models import User
 class MaintenanceTeam(models.Model):
     """Model for maintenance teams"""
     team_name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'maintenance_team'
+        indexes = [
+            models.Index(fields=['updated_at'], name='team_updated_idx'),
+        ]
     
     def __str__(self):
         return self.team_name
@@ -25,9 +30,15 @@ class UserProfile(models.Model):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='user')
     team = models.ForeignKey(MaintenanceTeam, on_delete=models.SET_NULL, null=True, blank=True)
     avatar_url = models.CharField(max_length=255, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'users'
+        indexes = [
+            # technicians / by_team lookups
+            models.Index(fields=['role', 'team'], name='users_role_team_idx'),
+            models.Index(fields=['updated_at'], name='users_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username} ({self.get_role_display()})"
@@ -57,9 +68,17 @@ class Equipment(models.Model):
         related_name='equipment'
     )
     is_active = models.BooleanField(default=True)
+    # Hour meter reading, for maintenance schedules counted in operating hours
+    operating_hours = models.DecimalField(max_digits=10, decimal_places=1, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'equipment'
+        indexes = [
+            # EquipmentViewSet.by_team and the is_active list filter
+            models.Index(fields=['maintenance_team', 'is_active'], name='equip_team_active_idx'),
+            models.Index(fields=['updated_at'], name='equip_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.serial_number})"
@@ -102,22 +121,103 @@ class MaintenanceRequest(models.Model):
     scheduled_date = models.DateField(null=True, blank=True)
     duration_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     due_date = models.DateField(null=True, blank=True)
+    # Recurrence rule a preventive request was materialized from
+    schedule = models.ForeignKey(
+        'MaintenanceSchedule',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='maintenance_requests'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'maintenance_request'
         ordering = ['-created_at']
+        indexes = [
+            # Default list ordering (plus id as a tie-breaker for cursors)
+            models.Index(fields=['created_at', 'id'], name='mreq_created_idx'),
+            # Status / team / technician filters keep the -created_at order
+            models.Index(fields=['status', 'created_at', 'id'], name='mreq_status_created_idx'),
+            models.Index(fields=['team', 'created_at'], name='mreq_team_created_idx'),
+            models.Index(fields=['technician', 'created_at'], name='mreq_tech_created_idx'),
+            # Overdue counts: open statuses with a past due_date
+            models.Index(fields=['status', 'due_date'], name='mreq_status_due_idx'),
+            # Calendar range scans and the daily alert job
+            models.Index(fields=['scheduled_date'], name='mreq_scheduled_date_idx'),
+            models.Index(fields=['updated_at'], name='mreq_updated_idx'),
+        ]
+        constraints = [
+            # One request per schedule and day, so repeated materialization runs are harmless
+            models.UniqueConstraint(
+                fields=['schedule', 'scheduled_date'],
+                name='mreq_unique_schedule_date',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.subject} - {self.equipment.name}"
 
 
+class MaintenanceSchedule(models.Model):
+    """Recurrence rule for preventive maintenance of one piece of equipment
+
+    Calendar rules fall on ``start_date`` and every ``interval`` days, weeks
+    or months after it. Hour rules fall due each time the equipment's
+    ``operating_hours`` pass another ``interval`` hours beyond ``start_hours``.
+    See mainapp.recurrence for how requests are materialized from them.
+    """
+    UNIT_CHOICES = [
+        ('days', 'Days'),
+        ('weeks', 'Weeks'),
+        ('months', 'Months'),
+        ('hours', 'Operating hours'),
+    ]
+
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='maintenance_schedules'
+    )
+    subject = models.CharField(max_length=255)
+    interval = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    unit = models.CharField(max_length=10, choices=UNIT_CHOICES)
+    start_date = models.DateField()
+    start_hours = models.DecimalField(max_digits=10, decimal_places=1, default=0)
+    technician = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='maintenance_schedules'
+    )
+    duration_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    # Progress of materialization: last scheduled_date created (calendar rules)
+    # and last hour mark a request was created for (hour rules)
+    materialized_until = models.DateField(null=True, blank=True)
+    materialized_hours = models.DecimalField(max_digits=10, decimal_places=1, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'maintenance_schedule'
+        indexes = [
+            models.Index(fields=['is_active', 'unit'], name='schedule_active_unit_idx'),
+            models.Index(fields=['updated_at'], name='schedule_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} every {self.interval} {self.get_unit_display().lower()} - {self.equipment.name}"
+
+
 class Notification(models.Model):
     """Model for system notifications"""
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     related_request = models.ForeignKey(
         MaintenanceRequest, 
         on_delete=models.CASCADE, 
@@ -125,11 +225,45 @@ class Notification(models.Model):
         blank=True,
         related_name='notifications'
     )
+    # Day a scheduled-maintenance alert was sent for; NULL for other notifications
+    alert_date = models.DateField(null=True, blank=True)
 
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
+        indexes = [
+            # Per-user notification list, newest first
+            models.Index(fields=['recipient', 'created_at'], name='notif_recipient_created_idx'),
+            # Unread badge count and mark_all_read
+            models.Index(fields=['recipient', 'is_read'], name='notif_recipient_read_idx'),
+            models.Index(fields=['updated_at'], name='notif_updated_idx'),
+        ]
+        constraints = [
+            # One scheduled-maintenance alert per recipient, request and day
+            models.UniqueConstraint(
+                fields=['alert_date', 'related_request', 'recipient'],
+                name='notif_unique_daily_alert',
+            ),
+        ]
 
     def __str__(self):
         return f"Notification for {self.recipient.username}: {self.message[:50]}..."
 
+
+class Tombstone(models.Model):
+    """Record of a deleted row, so delta sync clients can drop it"""
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    # Owner of a deleted notification; only they are told about it
+    recipient_id = models.IntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'tombstones'
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+            models.Index(fields=['model', 'deleted_at'], name='tombstone_model_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted at {self.deleted_at}"
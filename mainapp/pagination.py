@@ -0,0 +1,166 @@
+import base64
+import binascii
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(created_at, pk):
+    """Encode a (created_at, id) position as an opaque URL-safe token"""
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a token produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        position = (parse_datetime(created_at), int(pk))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if position[0] is None:
+        raise ValueError('Invalid cursor')
+    return position
+
+
+def row_position(row):
+    """(created_at, id) of a model instance or a values() row"""
+    if isinstance(row, dict):
+        return row['created_at'], row['id']
+    return row.created_at, row.pk
+
+
+def rows_after(queryset, cursor):
+    """Rows that come after the cursor position in (-created_at, -id) order"""
+    created_at, pk = decode_cursor(cursor)
+    return queryset.filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+    )
+
+
+def estimate_count(queryset, cap=10000):
+    """Cheap row-count estimate for a queryset
+
+    PostgreSQL answers from the planner's row estimate; other engines count
+    at most ``cap`` rows so the cost stays bounded on huge tables.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    return queryset[:cap].count()
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination that async actions can also use, via ``apaginate_queryset``"""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Count up front, so the paginator never runs the query synchronously
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class KeysetPagination(AsyncPageNumberPagination):
+    """Page numbers by default, keyset pages on (created_at, id) when opted in
+
+    Sending ``?cursor=`` (empty for the first page) switches to keyset mode:
+    results are ordered newest first, no COUNT(*) is run and the response
+    carries a ``next`` link with the cursor of the following page. Add
+    ``?estimate_count=1`` for an ``estimated_count``. Clients that use
+    ``?page=`` keep getting the usual page-number responses.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'CURSOR_PAGINATION_MAX_PAGE_SIZE', 100)
+    estimate_cap = getattr(settings, 'CURSOR_PAGINATION_ESTIMATE_CAP', 10000)
+    ordering = ('-created_at', '-id')
+
+    def keyset_queryset(self, queryset, request):
+        """Ordered queryset of the requested keyset page, plus one row to detect a next page"""
+        self.request = request
+        self.keyset_page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        self.want_estimate = request.query_params.get('estimate_count') in ('1', 'true')
+        self.estimated_count = None
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                return queryset, rows_after(queryset, cursor)[:self.keyset_page_size + 1]
+            except ValueError:
+                raise NotFound('Invalid cursor')
+        return queryset, queryset[:self.keyset_page_size + 1]
+
+    def keyset_page(self, rows):
+        self.next_cursor = None
+        if len(rows) > self.keyset_page_size:
+            rows = rows[:self.keyset_page_size]
+            self.next_cursor = encode_cursor(*row_position(rows[-1]))
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_keyset = self.cursor_query_param in request.query_params
+        if not self.use_keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        queryset, page = self.keyset_queryset(queryset, request)
+        if self.want_estimate:
+            self.estimated_count = estimate_count(queryset, self.estimate_cap)
+        return self.keyset_page(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.use_keyset = self.cursor_query_param in request.query_params
+        if not self.use_keyset:
+            return await super().apaginate_queryset(queryset, request, view)
+
+        queryset, page = self.keyset_queryset(queryset, request)
+        if self.want_estimate:
+            self.estimated_count = await sync_to_async(estimate_count)(queryset, self.estimate_cap)
+        return self.keyset_page([row async for row in page])
+
+    def get_next_link(self):
+        if not getattr(self, 'use_keyset', False):
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        if not self.use_keyset:
+            return super().get_paginated_response(data)
+        body = {'next': self.get_next_link(), 'results': data}
+        if self.estimated_count is not None:
+            body['estimated_count'] = self.estimated_count
+        return Response(body)
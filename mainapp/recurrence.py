@@ -0,0 +1,204 @@
+"""Materialization of preventive maintenance requests from MaintenanceSchedule rules.
+
+A run costs a fixed number of statements however many schedules there
+are. One SELECT reads every active rule with its equipment's hour meter.
+Python works out the (schedule, date) pairs that are due, which is plain
+date arithmetic. INSERT ... SELECT statements, one per batch of pairs,
+then build the requests in the database by joining the pairs to the
+schedule and equipment tables. One UPDATE moves the calendar rules'
+``materialized_until`` to the horizon, and UPDATE ... FROM statements, one
+per batch, record the hour marks of the hour rules whose request was
+inserted. No model instance is built per row, which keeps tens of thousands
+of schedules to seconds.
+
+Runs are idempotent. Calendar rules only get dates after
+``materialized_until``, hour rules only hour marks above
+``materialized_hours``, and the unique (schedule, scheduled_date)
+constraint drops whatever a concurrent run already inserted. Past dates
+are never backfilled: a calendar rule resumes at its first date from
+today on, and an hour rule that passed several marks since the last run
+gets one request, for the highest mark. An hour rule that already got a
+request today keeps its mark unrecorded when the meter passes another one,
+and the next day's run creates that request.
+
+Like the other bulk writers this skips model signals, so the new rows
+reach clients through delta sync and list refreshes rather than the live
+change feed.
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import MaintenanceSchedule
+
+CALENDAR_UNITS = ('days', 'weeks', 'months')
+
+# Supported by SQLite (3.35+) and PostgreSQL; "WHERE true" keeps SQLite from
+# reading ON CONFLICT as part of the join. Only inserted rows are returned.
+INSERT_SQL = '''
+    INSERT INTO maintenance_request (
+        subject, request_type, equipment_id, team_id, technician_id, status,
+        scheduled_date, due_date, duration_hours, schedule_id, created_at, updated_at
+    )
+    SELECT s.subject, 'Preventive', s.equipment_id, e.maintenance_team_id, s.technician_id, 'New',
+           due.column2, due.column2, s.duration_hours, s.id, %s, %s
+    FROM (VALUES {pairs}) AS due
+    JOIN maintenance_schedule s ON s.id = due.column1
+    JOIN equipment e ON e.id = s.equipment_id
+    WHERE true
+    ON CONFLICT DO NOTHING
+    RETURNING schedule_id
+'''
+
+# UPDATE ... FROM needs SQLite 3.33+
+MARK_HOURS_SQL = '''
+    UPDATE maintenance_schedule SET materialized_hours = due.column2
+    FROM (VALUES {marks}) AS due
+    WHERE maintenance_schedule.id = due.column1
+'''
+
+
+@dataclass
+class MaterializeResult:
+    schedules: int = 0
+    calendar_rules: int = 0
+    hour_rules_due: int = 0
+    # Requests inserted (or due, for a dry run)
+    requests: int = 0
+
+
+def add_months(day, months):
+    """``day`` moved by ``months``, clamped to the end of shorter months"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence(rule, index):
+    """Date of the ``index``-th occurrence (0 is ``start_date``) of a calendar rule"""
+    if rule['unit'] == 'months':
+        return add_months(rule['start_date'], index * rule['interval'])
+    days = rule['interval'] * (7 if rule['unit'] == 'weeks' else 1)
+    return rule['start_date'] + timedelta(days=index * days)
+
+
+def calendar_dates(rule, first, last):
+    """Occurrence dates of a calendar rule between ``first`` and ``last`` (inclusive)"""
+    if rule['start_date'] >= first:
+        index = 0
+    elif rule['unit'] == 'months':
+        elapsed = (first.year - rule['start_date'].year) * 12 + first.month - rule['start_date'].month
+        # Month-end clamping can land a step one occurrence short of ``first``
+        index = max(0, elapsed // rule['interval'] - 1)
+    else:
+        step = rule['interval'] * (7 if rule['unit'] == 'weeks' else 1)
+        index = -(-(first - rule['start_date']).days // step)
+
+    dates = []
+    while (day := occurrence(rule, index)) <= last:
+        if day >= first:
+            dates.append(day)
+        index += 1
+    return dates
+
+
+def due_hour_mark(rule):
+    """Highest hour mark the equipment's meter has passed, or None if not due"""
+    completed = int((rule['equipment__operating_hours'] - rule['start_hours']) // rule['interval'])
+    if completed < 1:
+        return None
+    mark = rule['start_hours'] + completed * rule['interval']
+    if rule['materialized_hours'] is not None and mark <= rule['materialized_hours']:
+        return None
+    return mark
+
+
+def insert_requests(pairs, now):
+    """Insert one request per (schedule id, date) pair; returns the schedule ids of the new rows"""
+    ops = connection.ops
+    timestamp = ops.adapt_datetimefield_value(now)
+    params = [timestamp, timestamp]
+    for schedule_id, day in pairs:
+        params += [schedule_id, ops.adapt_datefield_value(day)]
+    with connection.cursor() as cursor:
+        cursor.execute(INSERT_SQL.format(pairs=', '.join(['(%s, %s)'] * len(pairs))), params)
+        return [schedule_id for schedule_id, in cursor.fetchall()]
+
+
+def mark_hours(marks):
+    """Record the hour mark each (schedule id, hours) pair was materialized for"""
+    params = [value for mark in marks for value in mark]
+    with connection.cursor() as cursor:
+        cursor.execute(MARK_HOURS_SQL.format(marks=', '.join(['(%s, %s)'] * len(marks))), params)
+
+
+def materialize(horizon_days=30, today=None, batch_size=1000, dry_run=False):
+    """Create the preventive requests due from today through ``horizon_days`` ahead"""
+    today = today or timezone.localdate()
+    horizon = today + timedelta(days=horizon_days)
+    result = MaterializeResult()
+
+    with transaction.atomic():
+        # Rule edits after this point are picked up by the next run
+        snapshot = timezone.now()
+        rules = MaintenanceSchedule.objects.filter(
+            Q(unit='hours') | Q(materialized_until__isnull=True) | Q(materialized_until__lt=horizon),
+            is_active=True,
+            equipment__is_active=True,
+        ).order_by('id').values(
+            'id', 'interval', 'unit', 'start_date', 'start_hours', 'materialized_until', 'materialized_hours',
+            'equipment__operating_hours',
+        )
+
+        pairs = []
+        due_marks = {}
+        # Marks are only recorded for requests that were inserted: today's
+        # request of an hour rule may already exist from an earlier run
+        hour_marks = []
+
+        def flush():
+            if dry_run:
+                result.requests += len(pairs)
+            elif pairs:
+                inserted = insert_requests(pairs, snapshot)
+                result.requests += len(inserted)
+                hour_marks.extend(
+                    (schedule_id, due_marks.pop(schedule_id)) for schedule_id in inserted
+                    if schedule_id in due_marks
+                )
+            pairs.clear()
+
+        for rule in rules.iterator(chunk_size=batch_size):
+            result.schedules += 1
+            if rule['unit'] in CALENDAR_UNITS:
+                result.calendar_rules += 1
+                first = today
+                if rule['materialized_until'] is not None:
+                    first = max(first, rule['materialized_until'] + timedelta(days=1))
+                pairs.extend((rule['id'], day) for day in calendar_dates(rule, first, horizon))
+            else:
+                mark = due_hour_mark(rule)
+                if mark is not None:
+                    result.hour_rules_due += 1
+                    pairs.append((rule['id'], today))
+                    due_marks[rule['id']] = mark
+            if len(pairs) >= batch_size:
+                flush()
+        flush()
+        if dry_run:
+            return result
+
+        MaintenanceSchedule.objects.filter(
+            Q(materialized_until__isnull=True) | Q(materialized_until__lt=horizon),
+            is_active=True,
+            equipment__is_active=True,
+            unit__in=CALENDAR_UNITS,
+            updated_at__lte=snapshot,
+        ).update(materialized_until=horizon)
+        for start in range(0, len(hour_marks), batch_size):
+            mark_hours(hour_marks[start:start + batch_size])
+    return result
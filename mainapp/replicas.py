@@ -0,0 +1,104 @@
+"""Read/write splitting between the primary database and a read replica.
+
+ReplicaRoutingMiddleware marks safe-method (GET/HEAD/OPTIONS) requests
+under ``REPLICA_ROUTED_PATHS``, except those under ``REPLICA_PRIMARY_PATHS``,
+as replica reads, and PrimaryReplicaRouter
+sends their queries to the ``REPLICA_DATABASE`` alias. Writes, and every
+query of any other request, go to ``default``.
+
+A successful write request gets a short-lived cookie back that keeps that
+client's reads on the primary for ``REPLICA_STICKY_SECONDS``, so a user
+always sees their own changes while the replica catches up.
+
+Nothing is routed unless ``REPLICA_DATABASE`` names a configured database.
+"""
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'primary_until'
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def replica_alias():
+    alias = settings.REPLICA_DATABASE
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def reading_from_replica():
+    """Whether reads in the current request go to the replica"""
+    return _read_from_replica.get() and replica_alias() is not None
+
+
+class PrimaryReplicaRouter:
+    """Database router: replica reads inside requests marked by the middleware"""
+
+    def db_for_read(self, model, **hints):
+        if reading_from_replica():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """Route safe API requests to the replica unless the client wrote recently"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.paths = tuple(settings.REPLICA_ROUTED_PATHS)
+        self.primary_paths = tuple(settings.REPLICA_PRIMARY_PATHS)
+        self.sticky_seconds = settings.REPLICA_STICKY_SECONDS
+
+    def use_replica(self, request):
+        if request.method not in SAFE_METHODS or not request.path.startswith(self.paths):
+            return False
+        if request.path.startswith(self.primary_paths):
+            return False
+        try:
+            return float(request.COOKIES.get(STICKY_COOKIE, 0)) < time.time()
+        except ValueError:
+            return True
+
+    def stick_to_primary(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE,
+                f'{time.time() + self.sticky_seconds:.0f}',
+                max_age=self.sticky_seconds,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _read_from_replica.set(self.use_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_from_replica.reset(token)
+        return self.stick_to_primary(request, response)
+
+    async def __acall__(self, request):
+        token = _read_from_replica.set(self.use_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_from_replica.reset(token)
+        return self.stick_to_primary(request, response)
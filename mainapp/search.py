@@ -0,0 +1,260 @@
+"""Full-text search indexes behind the ``?search=`` parameter.
+
+SQLite gets an FTS5 virtual table per index and PostgreSQL a table with a
+GIN-indexed tsvector. Both are keyed by the source row id and kept in sync
+by database triggers, so queryset.update() and bulk_create() are covered as
+well as save(). SQLite drops a table's triggers whenever a migration
+rebuilds it, so the index is (re)installed idempotently after every
+``migrate`` rather than in a migration, and repopulated when its row count
+no longer matches the source table. ``manage.py rebuild_search_index``
+repopulates it explicitly.
+
+Every search term is matched as a prefix and all terms must match.
+Matches are ordered by relevance unless ``?ordering=`` is given. Other
+database engines fall back to DRF's ``LIKE`` search.
+"""
+import re
+
+from django.db import connections, transaction
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+
+TERM = re.compile(r'\w+')
+
+
+class SearchIndex:
+    """A full-text index over ``source_table`` rows, defined per database vendor"""
+
+    def __init__(self, name, source_table, sqlite, postgresql):
+        self.name = name
+        self.source_table = source_table
+        self.sql = {'sqlite': sqlite, 'postgresql': postgresql}
+
+    def create(self, connection):
+        """Create the index table and its triggers if they are missing"""
+        with connection.cursor() as cursor:
+            for statement in self.sql[connection.vendor]['install']:
+                cursor.execute(statement)
+
+    def install(self, connection):
+        """Create the index if missing and fill it if it is out of date"""
+        self.create(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {self.name}')
+            indexed = cursor.fetchone()[0]
+            cursor.execute(f'SELECT COUNT(*) FROM {self.source_table}')
+            total = cursor.fetchone()[0]
+        if indexed != total:
+            self.rebuild(connection)
+
+    def rebuild(self, connection):
+        """Repopulate the index from the source table; returns the number of rows indexed"""
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.name}')
+            cursor.execute(self.sql[connection.vendor]['populate'])
+            cursor.execute(f'SELECT COUNT(*) FROM {self.name}')
+            return cursor.fetchone()[0]
+
+    def filter(self, queryset, terms, ranked):
+        """Restrict ``queryset`` to rows matching every term; order by relevance if ``ranked``"""
+        vendor = connections[queryset.db].vendor
+        if vendor == 'sqlite':
+            # Quoted so FTS5 operators in user input are taken literally
+            match = ' '.join(f'"{term}"*' for term in terms)
+            ids = f'SELECT rowid FROM {self.name} WHERE {self.name} MATCH %s'
+            # bm25() is lower for better matches; subject is weighted above equipment name
+            rank = (f'SELECT bm25({self.name}, 2.0, 1.0) FROM {self.name} '
+                    f'WHERE {self.name} MATCH %s AND rowid = {self.source_table}.id')
+        else:
+            match = ' & '.join(f'{term}:*' for term in terms)
+            ids = f"SELECT id FROM {self.name} WHERE document @@ to_tsquery('simple', %s)"
+            rank = (f"SELECT -ts_rank(document, to_tsquery('simple', %s)) FROM {self.name} "
+                    f"WHERE id = {self.source_table}.id")
+
+        queryset = queryset.filter(pk__in=RawSQL(ids, [match]))
+        if ranked:
+            queryset = queryset.annotate(search_rank=RawSQL(rank, [match])).order_by('search_rank', 'pk')
+        return queryset
+
+
+MAINTENANCE_REQUEST_INDEX = SearchIndex(
+    name='maintenance_request_search',
+    source_table='maintenance_request',
+    sqlite={
+        'install': [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS maintenance_request_search USING fts5("
+            "subject, equipment_name, tokenize = 'unicode61 remove_diacritics 2')",
+            """CREATE TRIGGER IF NOT EXISTS maintenance_request_search_insert
+            AFTER INSERT ON maintenance_request BEGIN
+                INSERT INTO maintenance_request_search (rowid, subject, equipment_name)
+                VALUES (new.id, new.subject, (SELECT name FROM equipment WHERE id = new.equipment_id));
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS maintenance_request_search_update
+            AFTER UPDATE OF subject, equipment_id ON maintenance_request BEGIN
+                UPDATE maintenance_request_search
+                SET subject = new.subject,
+                    equipment_name = (SELECT name FROM equipment WHERE id = new.equipment_id)
+                WHERE rowid = new.id;
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS maintenance_request_search_delete
+            AFTER DELETE ON maintenance_request BEGIN
+                DELETE FROM maintenance_request_search WHERE rowid = old.id;
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS maintenance_request_search_equipment
+            AFTER UPDATE OF name ON equipment BEGIN
+                UPDATE maintenance_request_search SET equipment_name = new.name
+                WHERE rowid IN (SELECT id FROM maintenance_request WHERE equipment_id = new.id);
+            END""",
+        ],
+        'populate': """
+            INSERT INTO maintenance_request_search (rowid, subject, equipment_name)
+            SELECT r.id, r.subject, e.name
+            FROM maintenance_request r LEFT JOIN equipment e ON e.id = r.equipment_id
+        """,
+    },
+    postgresql={
+        'install': [
+            """CREATE TABLE IF NOT EXISTS maintenance_request_search (
+                id bigint PRIMARY KEY,
+                document tsvector NOT NULL
+            )""",
+            """CREATE INDEX IF NOT EXISTS maintenance_request_search_document_idx
+            ON maintenance_request_search USING GIN (document)""",
+            """CREATE OR REPLACE FUNCTION maintenance_request_search_document(subject text, equipment_name text)
+            RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+                SELECT setweight(to_tsvector('simple', coalesce(subject, '')), 'A')
+                    || setweight(to_tsvector('simple', coalesce(equipment_name, '')), 'B')
+            $$""",
+            """CREATE OR REPLACE FUNCTION maintenance_request_search_sync() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    DELETE FROM maintenance_request_search WHERE id = OLD.id;
+                ELSE
+                    INSERT INTO maintenance_request_search (id, document)
+                    SELECT NEW.id, maintenance_request_search_document(NEW.subject, e.name)
+                    FROM (SELECT 1) AS one LEFT JOIN equipment e ON e.id = NEW.equipment_id
+                    ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document;
+                END IF;
+                RETURN NULL;
+            END
+            $$""",
+            """CREATE OR REPLACE TRIGGER maintenance_request_search_sync
+            AFTER INSERT OR DELETE OR UPDATE OF subject, equipment_id ON maintenance_request
+            FOR EACH ROW EXECUTE FUNCTION maintenance_request_search_sync()""",
+            """CREATE OR REPLACE FUNCTION maintenance_request_search_equipment() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                UPDATE maintenance_request_search s
+                SET document = maintenance_request_search_document(r.subject, NEW.name)
+                FROM maintenance_request r
+                WHERE r.id = s.id AND r.equipment_id = NEW.id;
+                RETURN NULL;
+            END
+            $$""",
+            """CREATE OR REPLACE TRIGGER maintenance_request_search_equipment
+            AFTER UPDATE OF name ON equipment
+            FOR EACH ROW EXECUTE FUNCTION maintenance_request_search_equipment()""",
+        ],
+        'populate': """
+            INSERT INTO maintenance_request_search (id, document)
+            SELECT r.id, maintenance_request_search_document(r.subject, e.name)
+            FROM maintenance_request r LEFT JOIN equipment e ON e.id = r.equipment_id
+        """,
+    },
+)
+
+EQUIPMENT_INDEX = SearchIndex(
+    name='equipment_search',
+    source_table='equipment',
+    sqlite={
+        'install': [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS equipment_search USING fts5("
+            "name, serial_number, owner_name, tokenize = 'unicode61 remove_diacritics 2')",
+            """CREATE TRIGGER IF NOT EXISTS equipment_search_insert
+            AFTER INSERT ON equipment BEGIN
+                INSERT INTO equipment_search (rowid, name, serial_number, owner_name)
+                VALUES (new.id, new.name, new.serial_number, new.owner_name);
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS equipment_search_update
+            AFTER UPDATE OF name, serial_number, owner_name ON equipment BEGIN
+                UPDATE equipment_search
+                SET name = new.name, serial_number = new.serial_number, owner_name = new.owner_name
+                WHERE rowid = new.id;
+            END""",
+            """CREATE TRIGGER IF NOT EXISTS equipment_search_delete
+            AFTER DELETE ON equipment BEGIN
+                DELETE FROM equipment_search WHERE rowid = old.id;
+            END""",
+        ],
+        'populate': """
+            INSERT INTO equipment_search (rowid, name, serial_number, owner_name)
+            SELECT id, name, serial_number, owner_name FROM equipment
+        """,
+    },
+    postgresql={
+        'install': [
+            """CREATE TABLE IF NOT EXISTS equipment_search (
+                id bigint PRIMARY KEY,
+                document tsvector NOT NULL
+            )""",
+            """CREATE INDEX IF NOT EXISTS equipment_search_document_idx
+            ON equipment_search USING GIN (document)""",
+            """CREATE OR REPLACE FUNCTION equipment_search_document(name text, serial_number text, owner_name text)
+            RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+                SELECT setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+                    || setweight(to_tsvector('simple', coalesce(serial_number, '')), 'A')
+                    || setweight(to_tsvector('simple', coalesce(owner_name, '')), 'B')
+            $$""",
+            """CREATE OR REPLACE FUNCTION equipment_search_sync() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    DELETE FROM equipment_search WHERE id = OLD.id;
+                ELSE
+                    INSERT INTO equipment_search (id, document)
+                    VALUES (NEW.id, equipment_search_document(NEW.name, NEW.serial_number, NEW.owner_name))
+                    ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document;
+                END IF;
+                RETURN NULL;
+            END
+            $$""",
+            """CREATE OR REPLACE TRIGGER equipment_search_sync
+            AFTER INSERT OR DELETE OR UPDATE OF name, serial_number, owner_name ON equipment
+            FOR EACH ROW EXECUTE FUNCTION equipment_search_sync()""",
+        ],
+        'populate': """
+            INSERT INTO equipment_search (id, document)
+            SELECT id, equipment_search_document(name, serial_number, owner_name) FROM equipment
+        """,
+    },
+)
+
+SEARCH_INDEXES = [MAINTENANCE_REQUEST_INDEX, EQUIPMENT_INDEX]
+
+
+def install_search_indexes(using='default', **kwargs):
+    """post_migrate handler: make sure every index and its triggers exist"""
+    connection = connections[using]
+    if connection.vendor not in SUPPORTED_VENDORS:
+        return
+    for index in SEARCH_INDEXES:
+        index.install(connection)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """``?search=`` backed by the view's ``search_index``, falling back to ``search_fields``"""
+
+    def filter_queryset(self, request, queryset, view):
+        index = getattr(view, 'search_index', None)
+        if index is None or connections[queryset.db].vendor not in SUPPORTED_VENDORS:
+            return super().filter_queryset(request, queryset, view)
+
+        terms = TERM.findall(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+        ranked = not request.query_params.get(api_settings.ORDERING_PARAM)
+        return index.filter(queryset, terms, ranked)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
 from .models import MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest, Notification
 
 
@@ -52,7 +54,7 @@ class EquipmentSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'serial_number', 'department', 'owner_name',
             'location', 'purchase_date', 'warranty_end', 'maintenance_team',
-            'maintenance_team_name', 'is_active'
+            'maintenance_team_name', 'is_active', 'operating_hours'
         ]
     
     def get_maintenance_team_name(self, obj):
@@ -88,3 +90,134 @@ class MaintenanceRequestSerializer(serializers.ModelSerializer):
         if obj.technician:
             return obj.technician.get_full_name() or obj.technician.username
         return None
+
+
+def full_name_expression(prefix):
+    """SQL equivalent of ``user.get_full_name() or user.username`` for the user at ``prefix``"""
+    full_name = Trim(Concat(
+        f'{prefix}__first_name', Value(' '), f'{prefix}__last_name', output_field=CharField()
+    ))
+    return Coalesce(NullIf(full_name, Value('')), f'{prefix}__username')
+
+
+class ValuesListSerializer:
+    """Read-only list serializer that renders rows straight from ``queryset.values()``
+
+    Produces the same JSON as ``serializer_class`` without instantiating
+    models or calling SerializerMethodFields: ``expressions`` computes those
+    columns in the query and ``nested`` names nested serializers whose
+    fields are read through the relation of the same name.
+    """
+    serializer_class = None
+    expressions = {}
+    nested = ()
+
+    def __init__(self):
+        self.columns = []
+        self.lookups = []
+        self.nested_columns = {}
+        self.converters = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in self.nested:
+                subfields = [sub for sub, subfield in field.fields.items() if not subfield.write_only]
+                self.nested_columns[name] = [(sub, f'{name}__{sub}') for sub in subfields]
+                self.lookups.extend(lookup for _, lookup in self.nested_columns[name])
+                self.columns.append((name, None))
+                continue
+            if name not in self.expressions:
+                self.lookups.append(field.source)
+            self.columns.append((name, name if name in self.expressions else field.source))
+            if isinstance(field, (serializers.DateField, serializers.DateTimeField, serializers.DecimalField)):
+                # Use the serializer's own formatting for dates and decimals
+                self.converters.append((name, field.to_representation))
+
+    def values(self, queryset):
+        return queryset.values(*self.lookups, **self.expressions)
+
+    def to_representation(self, rows):
+        data = []
+        for row in rows:
+            item = {}
+            for name, key in self.columns:
+                if key is None:
+                    item[name] = {sub: row[lookup] for sub, lookup in self.nested_columns[name]}
+                else:
+                    item[name] = row[key]
+            for name, convert in self.converters:
+                if item[name] is not None:
+                    item[name] = convert(item[name])
+            data.append(item)
+        return data
+
+
+class UserProfileValuesSerializer(ValuesListSerializer):
+    serializer_class = UserProfileSerializer
+    nested = ('user',)
+    expressions = {
+        'team_name': F('team__team_name'),
+        'full_name': full_name_expression('user'),
+    }
+
+
+class EquipmentValuesSerializer(ValuesListSerializer):
+    serializer_class = EquipmentSerializer
+    expressions = {
+        'maintenance_team_name': F('maintenance_team__team_name'),
+    }
+
+
+class MaintenanceRequestValuesSerializer(ValuesListSerializer):
+    serializer_class = MaintenanceRequestSerializer
+    expressions = {
+        'equipment_name': F('equipment__name'),
+        'equipment_serial': F('equipment__serial_number'),
+        'team_name': F('team__team_name'),
+        'technician_name': full_name_expression('technician'),
+    }
+
+
+class NotificationValuesSerializer(ValuesListSerializer):
+    serializer_class = NotificationSerializer
+
+
+class EquipmentImportSerializer(serializers.ModelSerializer):
+    """Field validation for one imported equipment record
+
+    The team is resolved by name and serial numbers are checked for
+    uniqueness per batch by the importer, so neither is looked up here.
+    """
+    class Meta:
+        model = Equipment
+        fields = [
+            'name', 'serial_number', 'department', 'owner_name', 'location',
+            'purchase_date', 'warranty_end', 'is_active'
+        ]
+        extra_kwargs = {'serial_number': {'validators': []}}
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField that resolves ids from ``context['prefetched'][model]`` when present
+
+    Lets a batch of serializers share one ``in_bulk()`` query per related
+    model instead of running one lookup per item and field.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.get_queryset().model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return prefetched[int(data)]
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class MaintenanceRequestBulkSerializer(MaintenanceRequestSerializer):
+    """Validates one item of a bulk operation against prefetched related objects"""
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
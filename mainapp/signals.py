@@ -0,0 +1,132 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .events import get_broker
+from .models import MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest, Notification, Tombstone
+from .serializers import MaintenanceRequestValuesSerializer, NotificationSerializer
+
+
+def publish_on_commit(event):
+    # Only broadcast changes that actually made it into the database
+    transaction.on_commit(lambda: get_broker().publish(event))
+
+
+def publish_requests_on_commit(event_type, pks):
+    """Broadcast ``event_type`` for the requests ``pks`` once committed
+
+    The payload is the request as the list endpoint renders it, names of
+    the equipment, team and technician included, so clients can replace
+    their copy with it. One query covers the whole batch.
+    """
+    def publish():
+        serializer = MaintenanceRequestValuesSerializer()
+        rows = serializer.values(MaintenanceRequest.objects.filter(pk__in=pks).order_by('id'))
+        broker = get_broker()
+        for data in serializer.to_representation(rows):
+            broker.publish({'type': event_type, 'id': data['id'], 'team': data['team'], 'data': data})
+    transaction.on_commit(publish)
+
+
+def notification_event(notification):
+    """Change-feed payload for a new notification, rendered like the list endpoint"""
+    return {
+        'type': 'notification.created',
+        'id': notification.pk,
+        'user': notification.recipient_id,
+        'data': NotificationSerializer(notification).data,
+    }
+
+
+@receiver(post_save, sender=MaintenanceRequest)
+def publish_request_saved(sender, instance, created, **kwargs):
+    event_type = 'maintenance_request.created' if created else 'maintenance_request.updated'
+    publish_requests_on_commit(event_type, [instance.pk])
+
+
+@receiver(post_delete, sender=MaintenanceRequest)
+def publish_request_deleted(sender, instance, **kwargs):
+    publish_on_commit({
+        'type': 'maintenance_request.deleted',
+        'id': instance.pk,
+        'team': instance.team_id,
+        'data': {'id': instance.pk},
+    })
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification_created(sender, instance, created, **kwargs):
+    if created:
+        publish_on_commit(notification_event(instance))
+
+
+# Serializers copy these fields of a referenced row into the rows that point
+# at it (equipment_name, team_name, technician_name, the nested user...).
+# Delta sync only sees a row's own updated_at, so a change to one of them
+# bumps updated_at on every row that shows it.
+DENORMALIZED_FIELDS = {
+    Equipment: (['name', 'serial_number'], [(MaintenanceRequest, 'equipment')]),
+    MaintenanceTeam: (
+        ['team_name'],
+        [(MaintenanceRequest, 'team'), (Equipment, 'maintenance_team'), (UserProfile, 'team')],
+    ),
+    User: (
+        ['username', 'first_name', 'last_name', 'email'],
+        [(MaintenanceRequest, 'technician'), (UserProfile, 'user')],
+    ),
+}
+
+
+@receiver(pre_save, sender=Equipment)
+@receiver(pre_save, sender=MaintenanceTeam)
+@receiver(pre_save, sender=User)
+def detect_denormalized_change(sender, instance, update_fields=None, **kwargs):
+    fields, _ = DENORMALIZED_FIELDS[sender]
+    instance._denormalized_changed = False
+    if instance._state.adding or (update_fields is not None and not update_fields.intersection(fields)):
+        return
+    old = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._denormalized_changed = old is not None and any(
+        old[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_save, sender=MaintenanceTeam)
+@receiver(post_save, sender=User)
+def touch_rows_showing_names(sender, instance, **kwargs):
+    if not getattr(instance, '_denormalized_changed', False):
+        return
+    now = timezone.now()
+    for model, field in DENORMALIZED_FIELDS[sender][1]:
+        model.objects.filter(**{field: instance}).update(updated_at=now)
+
+
+@receiver(post_delete, sender=MaintenanceRequest)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_delete, sender=MaintenanceTeam)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_delete, sender=Notification)
+def record_tombstone(sender, instance, **kwargs):
+    """Remember deletions so /api/sync/ can report them"""
+    Tombstone.objects.create(
+        model=sender._meta.model_name,
+        object_id=instance.pk,
+        recipient_id=instance.recipient_id if sender is Notification else None,
+    )
+
+
+# ON DELETE SET NULL is applied with a plain UPDATE that skips auto_now, so
+# bump updated_at on the affected rows before the referenced row goes away.
+
+@receiver(pre_delete, sender=User)
+def touch_rows_referencing_user(sender, instance, **kwargs):
+    MaintenanceRequest.objects.filter(technician=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=MaintenanceTeam)
+def touch_rows_referencing_team(sender, instance, **kwargs):
+    UserProfile.objects.filter(team=instance).update(updated_at=timezone.now())
+
@@ -0,0 +1,142 @@
+"""Delta sync: rows changed and ids deleted since a client watermark.
+
+A sync token stores, per collection, the (updated_at, id) of the last row
+the client has seen, plus the same position in the tombstone table. Each
+call returns at most ``SYNC_MAX_ROWS`` rows per collection in
+(updated_at, id) order and sets ``has_more`` when a collection was cut
+short. Rows changed in the last ``SYNC_SETTLE_SECONDS`` are held back
+until the next call, so a transaction that commits a little after it
+stamped updated_at is not skipped. Rows that show the name of a row they
+reference get a new updated_at when that name changes (see
+``DENORMALIZED_FIELDS`` in signals), so renames reach clients too.
+
+Clients load their first screen from the paginated list endpoints and
+start syncing from ``start_token()``; the full snapshot that a call
+without a token returns is meant for small data sets.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest, Notification, Tombstone
+from .serializers import (
+    MaintenanceTeamSerializer, UserProfileSerializer, EquipmentSerializer,
+    MaintenanceRequestSerializer, NotificationSerializer
+)
+
+ORIGIN = (datetime(1970, 1, 1, tzinfo=dt_timezone.utc), 0)
+
+
+class SyncTokenExpired(Exception):
+    """The token is older than the tombstone retention window"""
+
+
+def encode_token(positions):
+    raw = json.dumps({key: [ts.isoformat(), pk] for key, (ts, pk) in positions.items()})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    """Decode a sync token, raising ValueError if it is malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        positions = {key: (parse_datetime(ts), int(pk)) for key, (ts, pk) in raw.items()}
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError, AttributeError):
+        raise ValueError('Invalid sync token')
+    if any(ts is None for ts, _ in positions.values()):
+        raise ValueError('Invalid sync token')
+    return positions
+
+
+def changed_since(queryset, field, position, cutoff, limit):
+    """Rows after ``position`` in (field, id) order, changed before ``cutoff``"""
+    ts, pk = position
+    rows = list(
+        queryset.filter(Q(**{f'{field}__gt': ts}) | Q(**{field: ts, 'id__gt': pk}))
+        .filter(**{f'{field}__lt': cutoff})
+        .order_by(field, 'id')[:limit + 1]
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def collections_for(user):
+    """(name, queryset, serializer class, tombstone model name) for every synced collection"""
+    notifications = Notification.objects.filter(recipient=user) if user.is_authenticated else Notification.objects.none()
+    return [
+        ('requests', MaintenanceRequest.objects.select_related('equipment', 'team', 'technician'),
+         MaintenanceRequestSerializer, 'maintenancerequest'),
+        ('equipment', Equipment.objects.select_related('maintenance_team'), EquipmentSerializer, 'equipment'),
+        ('teams', MaintenanceTeam.objects.all(), MaintenanceTeamSerializer, 'maintenanceteam'),
+        ('technicians', UserProfile.objects.select_related('user', 'team'), UserProfileSerializer, 'userprofile'),
+        ('notifications', notifications, NotificationSerializer, 'notification'),
+    ]
+
+
+def settle_cutoff(now):
+    return now - timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', 2))
+
+
+def start_token(user):
+    """Token for a client that is about to load its data from the list endpoints
+
+    Every position starts at the settle cutoff, so the next call returns
+    what changed while the lists were read (some rows twice, which merging
+    absorbs) and nothing older.
+    """
+    cutoff = settle_cutoff(timezone.now())
+    names = [name for name, *_ in collections_for(user)] + ['tombstones']
+    return encode_token({name: (cutoff, 0) for name in names})
+
+
+def collect_changes(user, token=None):
+    """Build the sync payload for ``user`` from an optional token"""
+    positions = decode_token(token) if token else {}
+    limit = getattr(settings, 'SYNC_MAX_ROWS', 1000)
+    now = timezone.now()
+    cutoff = settle_cutoff(now)
+
+    tombstone_position = positions.get('tombstones', ORIGIN)
+    retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    if token and tombstone_position[0] < now - retention:
+        raise SyncTokenExpired()
+
+    payload = {}
+    has_more = False
+    new_positions = {}
+    collections = collections_for(user)
+    for name, queryset, serializer_class, _ in collections:
+        rows, truncated = changed_since(queryset, 'updated_at', positions.get(name, ORIGIN), cutoff, limit)
+        has_more = has_more or truncated
+        new_positions[name] = (rows[-1].updated_at, rows[-1].id) if rows else positions.get(name, ORIGIN)
+        deleted = []
+        if name == 'technicians':
+            # A profile that stops being a technician disappears from this collection
+            deleted = [row.id for row in rows if row.role != 'technician']
+            rows = [row for row in rows if row.role == 'technician']
+        payload[name] = {'updated': serializer_class(rows, many=True).data, 'deleted': deleted}
+
+    tombstones = []
+    if token:
+        # A full snapshot has nothing to delete on the client
+        tombstones = Tombstone.objects.filter(Q(recipient_id__isnull=True) | Q(recipient_id=user.pk))
+        tombstones, truncated = changed_since(tombstones, 'deleted_at', tombstone_position, cutoff, limit)
+        has_more = has_more or truncated
+    by_model = {model: name for name, _, _, model in collections}
+    for tombstone in tombstones:
+        name = by_model.get(tombstone.model)
+        if name:
+            payload[name]['deleted'].append(tombstone.object_id)
+    new_positions['tombstones'] = (
+        (tombstones[-1].deleted_at, tombstones[-1].id) if tombstones
+        # Nothing new: move up to the cutoff so the token does not look expired later
+        else max(tombstone_position, (cutoff, 0))
+    )
+
+    return {'token': encode_token(new_positions), 'has_more': has_more, **payload}
@@ -1,3 +1,861 @@
-from django.test import TestCase
+import re
+import unittest
+from unittest import mock
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import parse_http_date
+
+from .events import get_broker
+from .models import (
+    MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest, MaintenanceSchedule, Notification, Tombstone,
+)
+from .pagination import encode_cursor, rows_after
+from .recurrence import calendar_dates, due_hour_mark, materialize
+from .replicas import STICKY_COOKIE, ReplicaRoutingMiddleware, reading_from_replica
+from .search import EQUIPMENT_INDEX, MAINTENANCE_REQUEST_INDEX
+from .views import MaintenanceRequestViewSet, EquipmentViewSet, UserProfileViewSet
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTests(TestCase):
+    """Hot queries must be answered from an index, never a full table scan"""
+
+    FULL_SCAN = re.compile(r'\bSCAN \w+\s*$')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        cls.tech = User.objects.create_user(username='tech')
+        UserProfile.objects.create(user=cls.tech, role='technician', team=cls.team)
+        cls.equipment = Equipment.objects.create(
+            name='Lathe', serial_number='LTH-1', maintenance_team=cls.team
+        )
+        for i in range(20):
+            request = MaintenanceRequest.objects.create(
+                subject=f'Request {i}',
+                request_type='Corrective',
+                equipment=cls.equipment,
+                team=cls.team,
+                technician=cls.tech if i % 2 else None,
+                status='New',
+                scheduled_date=date.today() + timedelta(days=i),
+                due_date=date.today() + timedelta(days=i - 10),
+            )
+            Notification.objects.create(recipient=cls.tech, message='m', related_request=request)
+
+    def assertIndexed(self, queryset, ordered=True):
+        plan = queryset.explain()
+        scans = [line for line in plan.splitlines() if self.FULL_SCAN.search(line)]
+        self.assertEqual(scans, [], f'full table scan in:\n{plan}')
+        if ordered:
+            self.assertNotIn('TEMP B-TREE', plan, f'ORDER BY not served by an index:\n{plan}')
+
+    def test_request_list_queries(self):
+        requests = MaintenanceRequestViewSet.queryset
+        self.assertIndexed(requests[:10])
+        self.assertIndexed(requests.filter(status='New')[:10])
+        self.assertIndexed(requests.filter(team=self.team)[:10])
+        self.assertIndexed(requests.filter(technician=self.tech)[:10])
+
+    def test_keyset_page_query(self):
+        last = MaintenanceRequest.objects.order_by('-created_at', '-id')[5]
+        page = rows_after(
+            MaintenanceRequestViewSet.queryset.order_by('-created_at', '-id'),
+            encode_cursor(last.created_at, last.id),
+        )
+        self.assertIndexed(page[:10])
+
+    def test_kanban_column_query(self):
+        column = MaintenanceRequestViewSet.queryset.filter(status='New').order_by('-created_at', '-id')
+        self.assertIndexed(column[:20])
+
+    def test_calendar_and_alert_queries(self):
+        today = date.today()
+        self.assertIndexed(
+            MaintenanceRequest.objects.filter(
+                scheduled_date__range=(today, today + timedelta(days=30))
+            ).order_by('scheduled_date', 'id')
+        )
+        self.assertIndexed(MaintenanceRequest.objects.filter(scheduled_date=today), ordered=False)
+        self.assertIndexed(Notification.objects.filter(alert_date=today).order_by(), ordered=False)
+
+    def test_overdue_count_query(self):
+        overdue = MaintenanceRequest.objects.filter(
+            status__in=['New', 'In Progress'], due_date__lt=date.today()
+        ).order_by()
+        self.assertIndexed(overdue, ordered=False)
+
+    def test_notification_list_query(self):
+        self.assertIndexed(Notification.objects.filter(recipient=self.tech)[:10])
+        self.assertIndexed(
+            Notification.objects.filter(recipient=self.tech, is_read=False).order_by(), ordered=False
+        )
+
+    def test_reference_data_queries(self):
+        self.assertIndexed(
+            EquipmentViewSet.queryset.filter(maintenance_team=self.team, is_active=True),
+            ordered=False,
+        )
+        self.assertIndexed(
+            UserProfileViewSet.queryset.filter(role='technician', team=self.team), ordered=False
+        )
+        self.assertIndexed(UserProfileViewSet.queryset.filter(role='technician'), ordered=False)
+
+    def test_tombstone_validator_query(self):
+        self.assertIndexed(
+            Tombstone.objects.filter(model__in=['maintenancerequest', 'equipment']).order_by(), ordered=False
+        )
+
+    def test_search_queries(self):
+        # Ranked results need a sort, but the match itself must come from the FTS index
+        requests = MAINTENANCE_REQUEST_INDEX.filter(MaintenanceRequestViewSet.queryset, ['lath'], ranked=True)
+        self.assertIndexed(requests, ordered=False)
+        self.assertEqual(requests.count(), 20)
+        equipment = EQUIPMENT_INDEX.filter(EquipmentViewSet.queryset, ['LTH'], ranked=False)
+        self.assertIndexed(equipment, ordered=False)
+        self.assertEqual(list(equipment), [self.equipment])
+
+
+# Count every query on one connection, even with a read replica configured
+@override_settings(REPLICA_DATABASE=None)
+class QueryCountTests(TestCase):
+    """No endpoint may run more SQL as the data grows
+
+    Every endpoint is called once with SMALL and once with LARGE rows in each
+    table; a per-row query (a missing select_related, a SerializerMethodField
+    reading related rows) makes the two counts differ. The counts are also
+    pinned, including the session and user lookups of the logged-in client,
+    so any new query shows up here: if it is intended, update the number.
+    """
+    SMALL = 3
+    LARGE = 15
+
+    def setUp(self):
+        # Measure the uncached path of generation-cached endpoints
+        cache.clear()
+        self.team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        self.user = User.objects.create_user(username='tech')
+        UserProfile.objects.create(user=self.user, role='technician', team=self.team)
+        self.client.force_login(self.user)
+        self.rows = 0
+
+    def add_rows(self, total):
+        """Top every table up to ``total`` rows"""
+        today = date.today()
+        statuses = [key for key, _ in MaintenanceRequest.STATUS_CHOICES]
+        for i in range(self.rows, total):
+            MaintenanceTeam.objects.create(team_name=f'Team {i}')
+            user = User.objects.create_user(username=f'user{i}', first_name='Tech', last_name=str(i))
+            UserProfile.objects.create(user=user, role='technician', team=self.team)
+            equipment = Equipment.objects.create(
+                name=f'Press {i}', serial_number=f'PRS-{i}', maintenance_team=self.team
+            )
+            request = MaintenanceRequest.objects.create(
+                subject=f'Hydraulic leak {i}',
+                request_type='Preventive' if i % 2 else 'Corrective',
+                equipment=equipment,
+                team=self.team,
+                technician=user,
+                status=statuses[i % len(statuses)],
+                scheduled_date=today + timedelta(days=i % 7),
+                due_date=today - timedelta(days=i % 3),
+                duration_hours=2,
+            )
+            Notification.objects.create(recipient=self.user, message=f'Alert {i}', related_request=request)
+        self.rows = total
+
+    def endpoints(self):
+        """(name, method, url, data, pinned query count)"""
+        team = self.team.pk
+        request = MaintenanceRequest.objects.order_by('id').first().pk
+        equipment = Equipment.objects.order_by('id').first().pk
+        profile = UserProfile.objects.order_by('id').first().pk
+        notification = Notification.objects.order_by('id').first().pk
+        today = date.today()
+        everything = [
+            {'op': 'update', 'id': pk, 'data': {'duration_hours': '3.00'}}
+            for pk in MaintenanceRequest.objects.values_list('id', flat=True)
+        ]
+        return [
+            ('team-list', 'get', '/api/teams/', {}, 8),
+            ('team-detail', 'get', f'/api/teams/{team}/', {}, 5),
+            ('user-list', 'get', '/api/users/', {}, 7),
+            ('user-detail', 'get', f'/api/users/{profile}/', {}, 6),
+            ('user-technicians', 'get', '/api/users/technicians/', {}, 9),
+            ('user-by-team', 'get', '/api/users/by_team/', {'team_id': team}, 9),
+            ('equipment-list', 'get', '/api/equipment/', {}, 7),
+            ('equipment-list[search]', 'get', '/api/equipment/', {'search': 'press'}, 7),
+            ('equipment-detail', 'get', f'/api/equipment/{equipment}/', {}, 6),
+            ('equipment-by-team', 'get', '/api/equipment/by_team/', {'team_id': team}, 9),
+            ('equipment-export', 'get', '/api/equipment/export/', {'format': 'csv'}, 3),
+            ('maintenance-request-list', 'get', '/api/maintenance-requests/', {}, 9),
+            ('maintenance-request-list[cursor]', 'get', '/api/maintenance-requests/', {'cursor': ''}, 8),
+            ('maintenance-request-list[search]', 'get', '/api/maintenance-requests/', {'search': 'leak'}, 9),
+            ('maintenance-request-detail', 'get', f'/api/maintenance-requests/{request}/', {}, 8),
+            ('maintenance-request-by-status', 'get', '/api/maintenance-requests/by_status/', {}, 12),
+            ('maintenance-request-calendar', 'get', '/api/maintenance-requests/calendar/',
+             {'start': today, 'end': today + timedelta(days=30)}, 8),
+            ('maintenance-request-stats', 'get', '/api/maintenance-requests/stats/', {}, 12),
+            ('maintenance-request-export', 'get', '/api/maintenance-requests/export/', {'format': 'ndjson'}, 3),
+            ('notification-list', 'get', '/api/notifications/', {}, 6),
+            ('notification-unread-count', 'get', '/api/notifications/unread_count/', {}, 3),
+            ('notification-export', 'get', '/api/notifications/export/', {'format': 'csv'}, 3),
+            ('sync-list', 'get', '/api/sync/', {}, 7),
+            ('notification-mark-read', 'post', f'/api/notifications/{notification}/mark_read/', {}, 3),
+            ('notification-mark-all-read', 'post', '/api/notifications/mark_all_read/', {}, 3),
+            ('maintenance-request-bulk', 'post', '/api/maintenance-requests/bulk/',
+             {'operations': everything}, 7),
+        ]
+
+    def query_count(self, method, url, data):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'get':
+                response = self.client.get(url, data)
+            else:
+                response = self.client.post(url, data, content_type='application/json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 300, f'{method.upper()} {url}: {response.status_code}')
+        return len(queries)
+
+    def test_query_counts(self):
+        counts = {}
+        for size in (self.SMALL, self.LARGE):
+            self.add_rows(size)
+            for name, method, url, data, _ in self.endpoints():
+                counts.setdefault(name, []).append(self.query_count(method, url, data))
+
+        for name, _, _, _, pinned in self.endpoints():
+            small, large = counts[name]
+            with self.subTest(endpoint=name):
+                self.assertEqual(large, small, f'{name} runs {large - small} more queries with more rows')
+                self.assertEqual(small, pinned, f'{name} query count changed')
+
+
+class RecurrenceTests(TestCase):
+    """Preventive requests materialized from MaintenanceSchedule rules"""
+
+    TODAY = date(2026, 11, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        cls.equipment = Equipment.objects.create(
+            name='Compressor', serial_number='CMP-1', maintenance_team=cls.team, operating_hours=Decimal('880')
+        )
+
+    def schedule(self, interval, unit, start_date=date(2026, 1, 1), **fields):
+        return MaintenanceSchedule.objects.create(
+            equipment=self.equipment, subject=f'Every {interval} {unit}', interval=interval, unit=unit,
+            start_date=start_date, **fields
+        )
+
+    def dates(self, schedule):
+        return list(
+            schedule.maintenance_requests.order_by('scheduled_date').values_list('scheduled_date', flat=True)
+        )
+
+    def test_calendar_dates(self):
+        def rule(interval, unit, start_date):
+            return {'interval': interval, 'unit': unit, 'start_date': start_date}
+
+        self.assertEqual(
+            calendar_dates(rule(10, 'days', date(2026, 10, 1)), date(2026, 11, 1), date(2026, 11, 30)),
+            [date(2026, 11, 10), date(2026, 11, 20), date(2026, 11, 30)],
+        )
+        self.assertEqual(
+            calendar_dates(rule(2, 'weeks', date(2026, 1, 5)), date(2026, 11, 1), date(2026, 11, 30)),
+            [date(2026, 11, 9), date(2026, 11, 23)],
+        )
+        # Month ends are clamped per occurrence, not carried over from the previous one
+        self.assertEqual(
+            calendar_dates(rule(1, 'months', date(2025, 10, 31)), date(2026, 11, 1), date(2027, 3, 31)),
+            [date(2026, 11, 30), date(2026, 12, 31), date(2027, 1, 31), date(2027, 2, 28), date(2027, 3, 31)],
+        )
+        # Rules starting after the window's first day begin at their start date
+        self.assertEqual(
+            calendar_dates(rule(3, 'months', date(2026, 12, 15)), date(2026, 11, 1), date(2027, 6, 30)),
+            [date(2026, 12, 15), date(2027, 3, 15), date(2027, 6, 15)],
+        )
+
+    def test_hour_marks(self):
+        def rule(start_hours, materialized_hours=None):
+            return {
+                'interval': 250, 'start_hours': Decimal(start_hours), 'materialized_hours': materialized_hours,
+                'equipment__operating_hours': Decimal('880'),
+            }
+
+        self.assertEqual(due_hour_mark(rule('100')), Decimal('850'))
+        self.assertIsNone(due_hour_mark(rule('700')))
+        self.assertIsNone(due_hour_mark(rule('100', materialized_hours=Decimal('850'))))
+        self.assertEqual(due_hour_mark(rule('100', materialized_hours=Decimal('600'))), Decimal('850'))
+
+    def test_materialize(self):
+        weekly = self.schedule(1, 'weeks', start_date=date(2026, 10, 5))
+        hourly = self.schedule(250, 'hours', start_hours=Decimal('100'))
+
+        dry_run = materialize(horizon_days=14, today=self.TODAY, dry_run=True)
+        self.assertEqual(dry_run.requests, 3)
+        self.assertFalse(MaintenanceRequest.objects.exists())
+
+        result = materialize(horizon_days=14, today=self.TODAY)
+        self.assertEqual((result.schedules, result.calendar_rules, result.hour_rules_due), (2, 1, 1))
+        self.assertEqual(result.requests, 3)
+        self.assertEqual(self.dates(weekly), [date(2026, 11, 2), date(2026, 11, 9)])
+        self.assertEqual(self.dates(hourly), [self.TODAY])
+        request = hourly.maintenance_requests.get()
+        self.assertEqual(
+            (request.request_type, request.status, request.team_id, request.due_date),
+            ('Preventive', 'New', self.team.pk, self.TODAY),
+        )
+        weekly.refresh_from_db()
+        hourly.refresh_from_db()
+        self.assertEqual(weekly.materialized_until, self.TODAY + timedelta(days=14))
+        self.assertEqual(hourly.materialized_hours, Decimal('850'))
+
+    def test_rerun_is_idempotent(self):
+        self.schedule(1, 'days')
+        self.schedule(250, 'hours', start_hours=Decimal('100'))
+        self.assertEqual(materialize(horizon_days=7, today=self.TODAY).requests, 9)
+        self.assertEqual(materialize(horizon_days=7, today=self.TODAY).requests, 0)
+        # Even with its progress lost, the unique (schedule, date) constraint holds
+        MaintenanceSchedule.objects.update(materialized_until=None, materialized_hours=None)
+        self.assertEqual(materialize(horizon_days=7, today=self.TODAY).requests, 0)
+        self.assertEqual(MaintenanceRequest.objects.count(), 9)
+
+    def test_hour_mark_passed_twice_in_a_day(self):
+        hourly = self.schedule(250, 'hours', start_hours=Decimal('100'))
+        materialize(horizon_days=0, today=self.TODAY)
+        Equipment.objects.filter(pk=self.equipment.pk).update(operating_hours=Decimal('1120'))
+
+        # Today's request already exists, so the 1100 mark waits for tomorrow
+        self.assertEqual(materialize(horizon_days=0, today=self.TODAY).requests, 0)
+        hourly.refresh_from_db()
+        self.assertEqual(hourly.materialized_hours, Decimal('850'))
+
+        tomorrow = self.TODAY + timedelta(days=1)
+        self.assertEqual(materialize(horizon_days=0, today=tomorrow).requests, 1)
+        hourly.refresh_from_db()
+        self.assertEqual(hourly.materialized_hours, Decimal('1100'))
+        self.assertEqual(self.dates(hourly), [self.TODAY, tomorrow])
+
+
+class MaintenanceAlertTests(TestCase):
+    """send_maintenance_alerts notifies each recipient once per request and day"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        cls.equipment = Equipment.objects.create(name='Lathe', serial_number='LTH-1', maintenance_team=cls.team)
+        cls.technicians = []
+        for i in range(2):
+            user = User.objects.create_user(username=f'tech{i}')
+            UserProfile.objects.create(user=user, role='technician', team=cls.team)
+            cls.technicians.append(user)
+        for technician in (cls.technicians[0], None):
+            MaintenanceRequest.objects.create(
+                subject='Oil change', request_type='Preventive', equipment=cls.equipment, team=cls.team,
+                technician=technician, status='New', scheduled_date=date.today(),
+            )
+
+    def run_alerts(self, *args):
+        out = StringIO()
+        call_command('send_maintenance_alerts', *args, stdout=out)
+        return re.search(r'(?:Sent|would send) (\d+) new', out.getvalue()).group(1)
+
+    def test_second_run_sends_nothing(self):
+        self.assertEqual(self.run_alerts('--dry-run'), '3')
+        self.assertFalse(Notification.objects.exists())
+        # The assigned technician, then both members of the unassigned request's team
+        self.assertEqual(self.run_alerts(), '3')
+        self.assertEqual(self.run_alerts(), '0')
+        self.assertEqual(Notification.objects.filter(alert_date=date.today()).count(), 3)
+
+    def test_concurrent_inserts_are_not_counted(self):
+        from mainapp.management.commands import send_maintenance_alerts
+        real_insert = send_maintenance_alerts.insert_alerts
+        concurrent = []
+
+        def insert_after_another_run(alerts, day, now):
+            # Another run alerts the assigned technician, and an unrelated
+            # notification is added, after this run read what was sent
+            request = MaintenanceRequest.objects.get(technician=self.technicians[0])
+            concurrent.append(Notification.objects.create(
+                recipient=self.technicians[0], message='Other run', related_request=request, alert_date=day,
+            ))
+            concurrent.append(Notification.objects.create(recipient=self.technicians[1], message='Unrelated'))
+            return real_insert(alerts, day, now)
+
+        with mock.patch.object(get_broker(), 'publish') as publish, \
+                mock.patch.object(send_maintenance_alerts, 'insert_alerts', side_effect=insert_after_another_run):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.run_alerts(), '2')
+        published = {
+            event['id'] for event in (call.args[0] for call in publish.call_args_list)
+            if event['type'] == 'notification.created'
+        } - {notification.pk for notification in concurrent}
+        expected = Notification.objects.filter(alert_date=date.today()).exclude(pk=concurrent[0].pk)
+        self.assertEqual(published, set(expected.values_list('pk', flat=True)))
+        self.assertEqual(len(published), 2)
+
+
+class ChangeFeedTests(TestCase):
+    """Events carry what the list endpoints render, however the rows were written"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        cls.equipment = Equipment.objects.create(name='Lathe', serial_number='LTH-1', maintenance_team=cls.team)
+        cls.technician = User.objects.create_user(username='tech', first_name='Ada', last_name='Lovelace')
+        UserProfile.objects.create(user=cls.technician, role='technician', team=cls.team)
+
+    def published(self, write):
+        with mock.patch.object(get_broker(), 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+        return [call.args[0] for call in publish.call_args_list]
+
+    def client_row(self, request):
+        """``request`` as the list endpoint returns it"""
+        self.client.force_login(self.technician)
+        response = self.client.get('/api/maintenance-requests/', HTTP_ACCEPT='application/json')
+        return next(row for row in response.json()['results'] if row['id'] == request.pk)
+
+    def test_request_events_include_names(self):
+        request = MaintenanceRequest(
+            subject='Oil change', request_type='Preventive', equipment=self.equipment, team=self.team,
+            status='New', scheduled_date=date.today(),
+        )
+        [created] = self.published(request.save)
+        self.assertEqual(created['type'], 'maintenance_request.created')
+        self.assertEqual(created['data']['equipment_name'], 'Lathe')
+        self.assertEqual(created['data']['team_name'], 'Mechanical')
+        self.assertIsNone(created['data']['technician_name'])
+
+        request.technician = self.technician
+        [updated] = self.published(request.save)
+        self.assertEqual(updated['data']['technician_name'], 'Ada Lovelace')
+        self.assertEqual(updated['data'], self.client_row(request))
+
+    def test_alerts_publish_notifications(self):
+        MaintenanceRequest.objects.create(
+            subject='Oil change', request_type='Preventive', equipment=self.equipment, team=self.team,
+            technician=self.technician, status='New', scheduled_date=date.today(),
+        )
+        events = self.published(lambda: call_command('send_maintenance_alerts', stdout=StringIO()))
+        [event] = [event for event in events if event['type'] == 'notification.created']
+        notification = Notification.objects.get()
+        self.assertEqual((event['id'], event['user']), (notification.pk, self.technician.pk))
+        self.assertEqual(event['data']['message'], notification.message)
+
+    def test_no_stream_under_wsgi(self):
+        self.assertEqual(self.client.get('/api/events/status/').json(), {'streaming': False})
+        response = self.client.get('/api/events/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    async def test_stream_offered_under_asgi(self):
+        response = await self.async_client.get('/api/events/status/')
+        self.assertEqual(response.json(), {'streaming': True})
+
+
+# The replica alias points at the primary; rewinding a row stands in for replica lag
+@override_settings(REPLICA_DATABASE='default')
+class ReplicaCacheTests(TestCase):
+    """Rows read from a lagging replica never reach the generation cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        self.writer = Client()
+        self.reader = Client()
+
+    def team_names(self, client):
+        response = client.get('/api/teams/', HTTP_ACCEPT='application/json')
+        return response['X-Cache'], [row['team_name'] for row in response.json()['results']]
+
+    def test_writer_reads_its_own_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.writer.patch(
+                f'/api/teams/{self.team.pk}/', {'team_name': 'Electrical'}, content_type='application/json'
+            )
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        # The replica has not caught up yet when another client reads
+        MaintenanceTeam.objects.filter(pk=self.team.pk).update(team_name='Mechanical')
+        self.assertEqual(self.team_names(self.reader), ('MISS', ['Mechanical']))
+        MaintenanceTeam.objects.filter(pk=self.team.pk).update(team_name='Electrical')
+
+        # Still sticky, the writer reads the primary, and that payload is cached for everyone
+        self.assertEqual(self.team_names(self.writer), ('MISS', ['Electrical']))
+        self.assertEqual(self.team_names(self.reader), ('HIT', ['Electrical']))
+
+    def test_sync_reads_primary(self):
+        middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse(str(reading_from_replica())))
+        factory = RequestFactory()
+        self.assertEqual(middleware(factory.get('/api/teams/')).content, b'True')
+        self.assertEqual(middleware(factory.get('/api/sync/', {'since': 'x'})).content, b'False')
+
+
+class GenerationCacheTests(TestCase):
+    """Every committed write makes the next read of dependent payloads a miss"""
+
+    def setUp(self):
+        cache.clear()
+        self.team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        self.equipment = Equipment.objects.create(name='Lathe', serial_number='LTH-1', maintenance_team=self.team)
+
+    def get(self, url, data=None):
+        response = self.client.get(url, data, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        return response['X-Cache'], body['results'] if isinstance(body, dict) else body
+
+    def team_names(self):
+        cached, rows = self.get('/api/teams/')
+        return cached, [row['team_name'] for row in rows]
+
+    def equipment_by_team(self):
+        cached, rows = self.get('/api/equipment/by_team/', {'team_id': self.team.pk})
+        return cached, [(row['name'], row['maintenance_team_name']) for row in rows]
+
+    def test_update(self):
+        self.assertEqual(self.team_names(), ('MISS', ['Mechanical']))
+        self.assertEqual(self.team_names(), ('HIT', ['Mechanical']))
+        self.assertEqual(self.equipment_by_team(), ('MISS', [('Lathe', 'Mechanical')]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f'/api/teams/{self.team.pk}/', {'team_name': 'Electrical'}, content_type='application/json'
+            )
+        self.assertEqual(self.team_names(), ('MISS', ['Electrical']))
+        # Payloads built from the team through a relation are invalidated too
+        self.assertEqual(self.equipment_by_team(), ('MISS', [('Lathe', 'Electrical')]))
+
+    def test_bulk_update(self):
+        self.assertEqual(self.equipment_by_team(), ('MISS', [('Lathe', 'Mechanical')]))
+        upload = SimpleUploadedFile('equipment.csv', b'name,serial_number,maintenance_team\nCNC Lathe,LTH-1,Mechanical\n')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/equipment/import/', {'file': upload, 'upsert': 'true'})
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual(self.equipment_by_team(), ('MISS', [('CNC Lathe', 'Mechanical')]))
+
+    def test_delete(self):
+        team = MaintenanceTeam.objects.create(team_name='Electrical')
+        self.team_names()
+        self.assertEqual(self.team_names(), ('HIT', ['Mechanical', 'Electrical']))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/teams/{team.pk}/')
+        self.assertEqual(self.team_names(), ('MISS', ['Mechanical']))
+
+    def test_write_from_another_process(self):
+        # A queryset update runs no signals, like a write from another worker or a cron command
+        self.assertEqual(self.equipment_by_team(), ('MISS', [('Lathe', 'Mechanical')]))
+        Equipment.objects.filter(pk=self.equipment.pk).update(name='CNC Lathe', updated_at=timezone.now())
+        self.assertEqual(self.equipment_by_team(), ('MISS', [('CNC Lathe', 'Mechanical')]))
+
+    def test_user_rename(self):
+        user = User.objects.create_user(username='tech')
+        UserProfile.objects.create(user=user, role='technician', team=self.team)
+        self.get('/api/users/technicians/')
+        self.assertEqual(self.get('/api/users/technicians/')[0], 'HIT')
+        user.username = 'lead-tech'
+        user.save()
+        cached, rows = self.get('/api/users/technicians/')
+        self.assertEqual((cached, [row['user']['username'] for row in rows]), ('MISS', ['lead-tech']))
+
+
+class ConditionalGetTests(TestCase):
+    """ETag / Last-Modified follow the database, whichever process wrote to it"""
+
+    def setUp(self):
+        team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        equipment = Equipment.objects.create(name='Lathe', serial_number='LTH-1', maintenance_team=team)
+        for i in range(3):
+            MaintenanceRequest.objects.create(subject=f'Request {i}', equipment=equipment, team=team)
+        # Rows written a while ago, so any change lands in a later second
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        for model in (MaintenanceTeam, Equipment, MaintenanceRequest):
+            model.objects.update(updated_at=an_hour_ago)
+        self.first = MaintenanceRequest.objects.order_by('id').first()
+
+    def get(self, **headers):
+        return self.client.get('/api/maintenance-requests/', {'cursor': ''}, HTTP_ACCEPT='application/json', **headers)
+
+    def test_not_modified(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_update_without_signals(self):
+        # A queryset update runs no signals and bumps nothing, as in another worker or a cron command
+        response = self.get()
+        MaintenanceRequest.objects.filter(pk=self.first.pk).update(subject='Renamed', updated_at=timezone.now())
+        changed = self.get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+        self.assertIn('Renamed', [row['subject'] for row in changed.json()['results']])
+
+    def test_delete(self):
+        response = self.get()
+        self.client.delete(f'/api/maintenance-requests/{self.first.pk}/')
+        changed = self.get(HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertGreater(parse_http_date(changed['Last-Modified']), parse_http_date(response['Last-Modified']))
+        self.assertEqual(len(changed.json()['results']), 2)
+
+
+class BulkOperationTests(TestCase):
+    """POST /api/maintenance-requests/bulk/ applies every operation or none"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        cls.equipment = Equipment.objects.create(name='Lathe', serial_number='LTH-1', maintenance_team=cls.team)
+        cls.requests = [
+            MaintenanceRequest.objects.create(
+                subject=f'Request {i}', request_type='Corrective', equipment=cls.equipment, team=cls.team,
+                status='New',
+            )
+            for i in range(2)
+        ]
+
+    def bulk(self, operations):
+        return self.client.post(
+            '/api/maintenance-requests/bulk/', {'operations': operations}, content_type='application/json'
+        )
+
+    def test_applies_all_operations(self):
+        updated, deleted = self.requests
+        response = self.bulk([
+            {'op': 'create', 'data': {
+                'subject': 'Belt check', 'request_type': 'Preventive', 'equipment': self.equipment.pk,
+                'team': self.team.pk,
+            }},
+            {'op': 'update', 'id': updated.pk, 'data': {'status': 'In Progress'}},
+            {'op': 'delete', 'id': deleted.pk},
+        ])
+        self.assertEqual(response.status_code, 200)
+        created, update, delete = response.json()['results']
+        self.assertTrue(all(result['ok'] for result in (created, update, delete)))
+        self.assertEqual(created['data']['subject'], 'Belt check')
+        self.assertEqual(created['data']['equipment_name'], 'Lathe')
+        self.assertEqual(update['data']['status'], 'In Progress')
+
+        self.assertTrue(MaintenanceRequest.objects.filter(pk=created['id'], subject='Belt check').exists())
+        updated.refresh_from_db()
+        self.assertEqual((updated.status, updated.subject), ('In Progress', 'Request 0'))
+        self.assertFalse(MaintenanceRequest.objects.filter(pk=deleted.pk).exists())
+
+    def test_invalid_operation_applies_nothing(self):
+        first, second = self.requests
+        response = self.bulk([
+            {'op': 'update', 'id': first.pk, 'data': {'status': 'Repaired'}},
+            {'op': 'update', 'id': second.pk, 'data': {'equipment': 999999}},
+            {'op': 'delete', 'id': first.pk},
+            {'op': 'delete', 'id': 999999},
+            {'op': 'archive', 'id': second.pk},
+            {'op': 'create', 'data': {'subject': 'No equipment'}},
+        ])
+        self.assertEqual(response.status_code, 400)
+        results = response.json()['results']
+        self.assertEqual([result['ok'] for result in results], [True, False, False, False, False, False])
+        self.assertIn('equipment', results[1]['errors'])
+        self.assertEqual(results[2]['errors'], {'id': ['Appears more than once in this batch.']})
+        self.assertEqual(results[3]['errors'], {'id': ['Not found.']})
+        self.assertIn('op', results[4]['errors'])
+        self.assertIn('request_type', results[5]['errors'])
+
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'New')
+        self.assertEqual(MaintenanceRequest.objects.count(), 2)
+
+    def test_rejects_malformed_body(self):
+        self.assertEqual(self.bulk('not a list').json(), {'error': 'operations must be a list'})
+        response = self.bulk([{'op': 'delete', 'id': self.requests[0].pk}] * 101)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(MaintenanceRequest.objects.count(), 2)
+
+
+class EquipmentImportTests(TestCase):
+    """POST /api/equipment/import/ imports valid records and reports the others"""
+
+    CSV = (
+        'name,serial_number,maintenance_team,purchase_date\n'
+        'CNC Lathe,LTH-1,mechanical,2024-03-01\n'
+        'Drill Press,DRL-1,Mechanical,\n'
+        'Welder,WLD-1,Plumbing,\n'
+        'Grinder,GRD-1,,\n'
+        'Drill Press copy,DRL-1,Mechanical,\n'
+        'Saw,SAW-1,Mechanical,yesterday\n'
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        Equipment.objects.create(name='Lathe', serial_number='LTH-1', maintenance_team=cls.team)
+
+    def upload(self, content, name='equipment.csv', **data):
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post('/api/equipment/import/', {'file': upload, **data})
+
+    def assertReported(self, report, created, updated, errors):
+        self.assertEqual((report['created'], report['updated']), (created, updated))
+        self.assertEqual({error['record']: error['errors'] for error in report['errors']}, errors)
+        self.assertEqual(report['error_count'], len(errors))
+
+    def test_insert(self):
+        response = self.upload(self.CSV)
+        self.assertEqual(response.status_code, 200)
+        self.assertReported(response.json(), 1, 0, {
+            1: {'serial_number': ['Equipment with this serial number already exists.']},
+            3: {'maintenance_team': ['Unknown team "Plumbing".']},
+            4: {'maintenance_team': ['This field is required.']},
+            5: {'serial_number': ['Appears more than once in this file.']},
+            6: {'purchase_date': [mock.ANY]},
+        })
+        self.assertEqual(
+            sorted(Equipment.objects.values_list('serial_number', 'name')),
+            [('DRL-1', 'Drill Press'), ('LTH-1', 'Lathe')],
+        )
+
+    def test_upsert(self):
+        report = self.upload(self.CSV, upsert='true').json()
+        self.assertReported(report, 1, 1, {
+            3: {'maintenance_team': ['Unknown team "Plumbing".']},
+            4: {'maintenance_team': ['This field is required.']},
+            5: {'serial_number': ['Appears more than once in this file.']},
+            6: {'purchase_date': [mock.ANY]},
+        })
+        lathe = Equipment.objects.get(serial_number='LTH-1')
+        self.assertEqual((lathe.name, lathe.purchase_date), ('CNC Lathe', date(2024, 3, 1)))
+        self.assertEqual(Equipment.objects.count(), 2)
+
+    def test_upsert_keeps_columns_not_in_file(self):
+        Equipment.objects.filter(serial_number='LTH-1').update(
+            department='Workshop', owner_name='Ada', location='Bay 2',
+            purchase_date=date(2020, 1, 1), is_active=False,
+        )
+        report = self.upload(
+            'name,serial_number,maintenance_team\nCNC Lathe,LTH-1,Mechanical\nPress,PRS-1,Mechanical\n',
+            upsert='true',
+        ).json()
+        self.assertReported(report, 1, 1, {})
+        lathe = Equipment.objects.get(serial_number='LTH-1')
+        self.assertEqual(
+            (lathe.name, lathe.department, lathe.owner_name, lathe.location, lathe.purchase_date, lathe.is_active),
+            ('CNC Lathe', 'Workshop', 'Ada', 'Bay 2', date(2020, 1, 1), False),
+        )
+        self.assertTrue(Equipment.objects.get(serial_number='PRS-1').is_active)
+
+    def test_ndjson(self):
+        content = (
+            '{"name": "Press", "serial_number": "PRS-1", "maintenance_team_name": "Mechanical"}\n'
+            'not json\n'
+            '\n'
+            '["a list"]\n'
+        )
+        report = self.upload(content, name='equipment.ndjson').json()
+        self.assertReported(report, 1, 0, {
+            2: {'non_field_errors': ['Expected an object.']},
+            3: {'non_field_errors': ['Expected an object.']},
+        })
+        self.assertTrue(Equipment.objects.filter(serial_number='PRS-1', maintenance_team=self.team).exists())
+
+    def test_rejects_unknown_format(self):
+        response = self.upload('x', file_format='xlsx')
+        self.assertEqual(response.json(), {'error': 'file_format must be csv or ndjson'})
+        self.assertEqual(Equipment.objects.count(), 1)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class DeltaSyncTests(TestCase):
+    """Renaming a referenced row resends every row that shows its name"""
+
+    def setUp(self):
+        self.team = MaintenanceTeam.objects.create(team_name='Mechanical')
+        self.technician = User.objects.create_user(username='tech', first_name='Ada', last_name='Lovelace')
+        UserProfile.objects.create(user=self.technician, role='technician', team=self.team)
+        self.equipment = Equipment.objects.create(name='Lathe', serial_number='LTH-1', maintenance_team=self.team)
+        self.request = MaintenanceRequest.objects.create(
+            subject='Oil change', request_type='Preventive', equipment=self.equipment, team=self.team,
+            technician=self.technician, status='New',
+        )
+        self.client.force_login(self.technician)
+        self.token = self.sync()['token']
+
+    def sync(self, token=None):
+        response = self.client.get('/api/sync/', {'since': token} if token else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def changes(self):
+        payload = self.sync(self.token)
+        return {
+            name: [row['id'] for row in payload[name]['updated']]
+            for name in ('requests', 'equipment', 'teams', 'technicians')
+        }, payload
+
+    def test_unrelated_save_sends_nothing(self):
+        self.equipment.operating_hours = 120
+        self.equipment.save()
+        self.technician.save(update_fields=['last_login'])
+        changed, _ = self.changes()
+        self.assertEqual(changed, {'requests': [], 'equipment': [self.equipment.pk], 'teams': [], 'technicians': []})
+
+    def test_equipment_rename(self):
+        self.equipment.name = 'CNC Lathe'
+        self.equipment.save()
+        changed, payload = self.changes()
+        self.assertEqual(changed['requests'], [self.request.pk])
+        self.assertEqual(payload['requests']['updated'][0]['equipment_name'], 'CNC Lathe')
+
+    def test_team_rename(self):
+        self.team.team_name = 'Electrical'
+        self.team.save()
+        changed, payload = self.changes()
+        self.assertEqual(changed, {
+            'requests': [self.request.pk], 'equipment': [self.equipment.pk], 'teams': [self.team.pk],
+            'technicians': [self.technician.profile.pk],
+        })
+        self.assertEqual(payload['requests']['updated'][0]['team_name'], 'Electrical')
+        self.assertEqual(payload['equipment']['updated'][0]['maintenance_team_name'], 'Electrical')
+        self.assertEqual(payload['technicians']['updated'][0]['team_name'], 'Electrical')
+
+    def test_technician_rename(self):
+        self.technician.last_name = 'Byron'
+        self.technician.save()
+        changed, payload = self.changes()
+        self.assertEqual(changed['requests'], [self.request.pk])
+        self.assertEqual(payload['requests']['updated'][0]['technician_name'], 'Ada Byron')
+        self.assertEqual(payload['technicians']['updated'][0]['full_name'], 'Ada Byron')
+
+    def test_start_token_skips_existing_rows(self):
+        start = self.sync('now')
+        self.assertEqual(set(start), {'token', 'has_more'})
+        self.equipment.name = 'CNC Lathe'
+        self.equipment.save()
+        payload = self.sync(start['token'])
+        self.assertEqual([row['id'] for row in payload['equipment']['updated']], [self.equipment.pk])
+        self.assertEqual(payload['requests']['updated'][0]['id'], self.request.pk)
+        self.assertEqual(payload['teams']['updated'], [])
+
+    def test_equipment_upsert_import(self):
+        upload = SimpleUploadedFile('equipment.csv', b'name,serial_number,maintenance_team\nCNC Lathe,LTH-1,Mechanical\n')
+        self.client.post('/api/equipment/import/', {'file': upload, 'upsert': 'true'})
+        changed, payload = self.changes()
+        self.assertEqual(changed['requests'], [self.request.pk])
+        self.assertEqual(payload['requests']['updated'][0]['equipment_name'], 'CNC Lathe')
@@ -8,7 +8,10 @@ router.register(r'users', views.UserProfileViewSet, basename='user')
 router.register(r'equipment', views.EquipmentViewSet, basename='equipment')
 router.register(r'maintenance-requests', views.MaintenanceRequestViewSet, basename='maintenance-request')
 router.register(r'notifications', views.NotificationViewSet, basename='notification')
+router.register(r'sync', views.SyncViewSet, basename='sync')
 
 urlpatterns = [
+    path('events/', views.event_stream, name='event-stream'),
+    path('events/status/', views.event_stream_status, name='event-stream-status'),
     path('', include(router.urls)),
 ]
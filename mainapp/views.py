@@ -1,20 +1,107 @@
+import asyncio
+import json
+
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from asgiref.sync import sync_to_async
+from decimal import Decimal
 from .models import MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest
 from .serializers import (
     MaintenanceTeamSerializer, UserProfileSerializer, EquipmentSerializer,
-    MaintenanceRequestSerializer, NotificationSerializer
+    MaintenanceRequestSerializer, NotificationSerializer,
+    UserProfileValuesSerializer, EquipmentValuesSerializer, MaintenanceRequestValuesSerializer,
+    NotificationValuesSerializer
 )
 from .models import MaintenanceTeam, UserProfile, Equipment, MaintenanceRequest, Notification
+from .pagination import KeysetPagination, encode_cursor, row_position, rows_after
+from .events import get_broker
+from .conditional import ConditionalGetMixin, conditional
+from .cache import GenerationCacheMixin, generation_cached
+from .sync import SyncTokenExpired, collect_changes, start_token
+from .bulk import BulkValidationError, apply_operations
+from .export import ExportMixin
+from .imports import EquipmentImporter, guess_format, read_records
+from .search import EQUIPMENT_INDEX, MAINTENANCE_REQUEST_INDEX, FullTextSearchFilter
+
+
+class ValuesListMixin:
+    """Read-only fast path: list rows come from queryset.values() via ``values_serializer_class``"""
+    values_serializer_class = None
+    _values_serializer = None
+
+    def get_values_serializer(self):
+        cls = type(self)
+        if cls._values_serializer is None:
+            cls._values_serializer = self.values_serializer_class()
+        return cls._values_serializer
+
+    def serialize_rows(self, queryset):
+        """Serialize a queryset (or an already fetched list of values() rows)"""
+        fast = self.get_values_serializer()
+        if not isinstance(queryset, list):
+            queryset = fast.values(queryset)
+        return fast.to_representation(queryset)
+
+    def list(self, request, *args, **kwargs):
+        fast = self.get_values_serializer()
+        queryset = fast.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast.to_representation(page))
+        return Response(fast.to_representation(queryset))
+
+    async def alist(self, request, *args, **kwargs):
+        fast = self.get_values_serializer()
+        queryset = fast.values(await self.afilter_queryset(self.get_queryset()))
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast.to_representation(page))
+        return Response(fast.to_representation([row async for row in queryset]))
+
+
+class AsyncReadMixin:
+    """Async counterparts of read actions, served under ASGI by mainapp.async_views
+
+    ``a<action>`` returns the same Response as ``<action>`` but awaits the
+    ORM instead of holding a worker thread while the database answers.
+    """
+
+    async def afilter_queryset(self, queryset):
+        # Filter backends may look choices up in the database (e.g. ?team=)
+        return await sync_to_async(self.filter_queryset)(queryset)
 
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
 
-class NotificationViewSet(viewsets.ModelViewSet):
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer([obj async for obj in queryset], many=True).data)
+
+
+class NotificationViewSet(ConditionalGetMixin, ExportMixin, ValuesListMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """ViewSet for Notification CRUD operations"""
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    values_serializer_class = NotificationValuesSerializer
+    pagination_class = KeysetPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at']
 
@@ -28,94 +115,507 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Mark notification as read"""
-        notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        try:
+            updated = self.get_queryset().filter(pk=pk).update(is_read=True, updated_at=timezone.now())
+        except (TypeError, ValueError):
+            updated = 0
+        if not updated:
+            raise NotFound()
         return Response({'status': 'marked as read'})
 
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Number of unread notifications for the current user"""
+        return Response({'unread': self.get_queryset().filter(is_read=False).count()})
+
+    async def aunread_count(self, request):
+        return Response({'unread': await self.get_queryset().filter(is_read=False).acount()})
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """Mark all unread notifications as read in a single UPDATE
 
+        Optionally limited to a list of ``ids`` and/or to notifications
+        created at or before ``before`` (ISO 8601 datetime).
+        """
+        notifications = self.get_queryset().filter(is_read=False)
 
-class MaintenanceTeamViewSet(viewsets.ModelViewSet):
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+                return Response({'error': 'ids must be a list of integers'}, status=400)
+            notifications = notifications.filter(id__in=ids)
+
+        before = request.data.get('before')
+        if before is not None:
+            try:
+                before = parse_datetime(before)
+            except (TypeError, ValueError):
+                before = None
+            if before is None:
+                return Response({'error': 'before must be an ISO 8601 datetime'}, status=400)
+            if timezone.is_naive(before):
+                before = timezone.make_aware(before)
+            notifications = notifications.filter(created_at__lte=before)
+
+        updated = notifications.update(is_read=True, updated_at=timezone.now())
+        return Response({'status': 'marked as read', 'updated': updated})
+
+
+class MaintenanceTeamViewSet(ConditionalGetMixin, GenerationCacheMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """ViewSet for MaintenanceTeam CRUD operations"""
     queryset = MaintenanceTeam.objects.all()
     serializer_class = MaintenanceTeamSerializer
+    cache_dependencies = [MaintenanceTeam]
+    cache_list = True
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['team_name']
     ordering_fields = ['team_name']
 
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(ConditionalGetMixin, GenerationCacheMixin, ValuesListMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """ViewSet for UserProfile CRUD operations"""
     queryset = UserProfile.objects.select_related('user', 'team').all()
     serializer_class = UserProfileSerializer
+    values_serializer_class = UserProfileValuesSerializer
+    etag_dependencies = [MaintenanceTeam]
+    # Renaming a user touches updated_at of their profile (signals.DENORMALIZED_FIELDS)
+    cache_dependencies = [UserProfile, MaintenanceTeam]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['role', 'team']
     search_fields = ['user__username', 'user__first_name', 'user__last_name']
     ordering_fields = ['user__username', 'role']
     
-    @action(detail=False, methods=['get'])
-    def technicians(self, request):
-        """Get all users with technician role"""
+    def technicians_queryset(self, request):
         technicians = self.queryset.filter(role='technician')
         team_id = request.query_params.get('team_id')
         if team_id:
             technicians = technicians.filter(team_id=team_id)
-        serializer = self.get_serializer(technicians, many=True)
-        return Response(serializer.data)
+        return technicians
+
+    @action(detail=False, methods=['get'])
+    @conditional
+    @generation_cached
+    def technicians(self, request):
+        """Get all users with technician role"""
+        return Response(self.serialize_rows(self.technicians_queryset(request)))
+
+    @conditional
+    @generation_cached
+    async def atechnicians(self, request):
+        rows = self.get_values_serializer().values(self.technicians_queryset(request))
+        return Response(self.serialize_rows([row async for row in rows]))
     
     @action(detail=False, methods=['get'])
+    @conditional
+    @generation_cached
     def by_team(self, request):
         """Get users by team ID"""
         team_id = request.query_params.get('team_id')
         if not team_id:
             return Response({'error': 'team_id parameter is required'}, status=400)
         users = self.queryset.filter(team_id=team_id)
-        serializer = self.get_serializer(users, many=True)
-        return Response(serializer.data)
+        return Response(self.serialize_rows(users))
 
 
-class EquipmentViewSet(viewsets.ModelViewSet):
+class EquipmentViewSet(ConditionalGetMixin, GenerationCacheMixin, ExportMixin, ValuesListMixin, viewsets.ModelViewSet):
     """ViewSet for Equipment CRUD operations"""
     queryset = Equipment.objects.select_related('maintenance_team').all()
     serializer_class = EquipmentSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    values_serializer_class = EquipmentValuesSerializer
+    etag_dependencies = [MaintenanceTeam]
+    cache_dependencies = [Equipment, MaintenanceTeam]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['maintenance_team', 'department', 'is_active']
     search_fields = ['name', 'serial_number', 'owner_name']
+    search_index = EQUIPMENT_INDEX
     ordering_fields = ['name', 'purchase_date']
     
     @action(detail=False, methods=['get'])
+    @conditional
+    @generation_cached
     def by_team(self, request):
         """Get equipment by team ID"""
         team_id = request.query_params.get('team_id')
         if not team_id:
             return Response({'error': 'team_id parameter is required'}, status=400)
         equipment = self.queryset.filter(maintenance_team_id=team_id, is_active=True)
-        serializer = self.get_serializer(equipment, many=True)
-        return Response(serializer.data)
+        return Response(self.serialize_rows(equipment))
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_records(self, request):
+        """Import equipment from an uploaded CSV or NDJSON ``file``
+
+        The team is given by name in ``maintenance_team`` (or
+        ``maintenance_team_name``). Invalid records are reported and skipped;
+        with ``upsert=true`` records whose serial number exists update it.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=400)
+        file_format = request.data.get('file_format') or guess_format(upload.name)
+        if file_format not in ('csv', 'ndjson'):
+            return Response({'error': 'file_format must be csv or ndjson'}, status=400)
+        upsert = str(request.data.get('upsert', '')).lower() in ('1', 'true', 'yes')
 
+        importer = EquipmentImporter(upsert=upsert)
+        try:
+            report = importer.run(read_records(upload, file_format))
+        except UnicodeDecodeError:
+            report = importer.report()
+            report['error'] = 'file is not valid UTF-8; records before the invalid data were imported'
+            return Response(report, status=400)
+        return Response(report)
 
-class MaintenanceRequestViewSet(viewsets.ModelViewSet):
+
+class MaintenanceRequestViewSet(ConditionalGetMixin, ExportMixin, ValuesListMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """ViewSet for MaintenanceRequest CRUD operations"""
     queryset = MaintenanceRequest.objects.select_related(
         'equipment', 'team', 'technician'
     ).all()
     serializer_class = MaintenanceRequestSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    values_serializer_class = MaintenanceRequestValuesSerializer
+    pagination_class = KeysetPagination
+    etag_dependencies = [Equipment, MaintenanceTeam, UserProfile]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'request_type', 'team', 'technician']
     search_fields = ['subject', 'equipment__name']
+    search_index = MAINTENANCE_REQUEST_INDEX
     ordering_fields = ['created_at', 'due_date', 'scheduled_date']
     
+    KANBAN_PAGE_SIZE = 20
+    KANBAN_MAX_PAGE_SIZE = 100
+
     @action(detail=False, methods=['get'])
+    @conditional
     def by_status(self, request):
-        """Get maintenance requests grouped by status (for Kanban board)"""
+        """Get maintenance requests grouped by status (for Kanban board)
+
+        Counts for every column come from one grouped query and only the
+        newest ``limit`` cards of each column are returned. Pass ``status``
+        together with a column's ``next`` cursor to load more of that column.
+        """
+        params = self.kanban_params(request)
+        if isinstance(params, Response):
+            return params
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            counts, columns = self.kanban_querysets(queryset, *params)
+        except ValueError:
+            return Response({'error': 'Invalid cursor'}, status=400)
+        columns = {key: (label, list(rows)) for key, (label, rows) in columns.items()}
+        return self.kanban_board(params[0], dict(counts), columns)
+
+    @conditional
+    async def aby_status(self, request):
+        params = self.kanban_params(request)
+        if isinstance(params, Response):
+            return params
+        queryset = await self.afilter_queryset(self.get_queryset())
+        try:
+            counts, columns = self.kanban_querysets(queryset, *params)
+        except ValueError:
+            return Response({'error': 'Invalid cursor'}, status=400)
+        counts = {key: count async for key, count in counts}
+        columns = {key: (label, [row async for row in rows]) for key, (label, rows) in columns.items()}
+        return self.kanban_board(params[0], counts, columns)
+
+    def kanban_params(self, request):
+        """(limit, statuses, cursor) of a Kanban request, or an error Response"""
+        try:
+            limit = min(int(request.query_params.get('limit', self.KANBAN_PAGE_SIZE)),
+                        self.KANBAN_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=400)
+        if limit < 1:
+            return Response({'error': 'limit must be positive'}, status=400)
+
         statuses = dict(MaintenanceRequest.STATUS_CHOICES)
-        result = {}
+        only_status = request.query_params.get('status')
+        cursor = request.query_params.get('cursor')
+        if cursor and not only_status:
+            return Response({'error': 'cursor requires a status parameter'}, status=400)
+        if only_status:
+            if only_status not in statuses:
+                return Response({'error': 'Unknown status'}, status=400)
+            statuses = {only_status: statuses[only_status]}
+        return limit, statuses, cursor
+
+    def kanban_querysets(self, queryset, limit, statuses, cursor):
+        """Unevaluated (status, count) rows and ``{status: (label, rows)}`` per column
+
+        Each column fetches one row more than ``limit`` to tell whether there
+        is a next page. Raises ValueError for an invalid cursor.
+        """
+        counts = queryset.order_by().values_list('status').annotate(count=Count('id'))
+        columns = {}
         for status_key, status_label in statuses.items():
-            requests = self.queryset.filter(status=status_key)
-            serializer = self.get_serializer(requests, many=True)
+            column = queryset.filter(status=status_key).order_by('-created_at', '-id')
+            if cursor:
+                column = rows_after(column, cursor)
+            columns[status_key] = (status_label, self.get_values_serializer().values(column)[:limit + 1])
+        return counts, columns
+
+    def kanban_board(self, limit, counts, columns):
+        result = {}
+        for status_key, (status_label, items) in columns.items():
+            has_more = len(items) > limit
+            items = items[:limit]
             result[status_key] = {
                 'label': status_label,
-                'count': requests.count(),
-                'items': serializer.data
+                'count': counts.get(status_key, 0),
+                'items': self.serialize_rows(items),
+                'next': encode_cursor(*row_position(items[-1])) if has_more else None,
             }
         return Response(result)
+
+    CALENDAR_MAX_DAYS = 92
+
+    @action(detail=False, methods=['get'])
+    @conditional
+    def calendar(self, request):
+        """Get compact request cards bucketed by scheduled_date (for Calendar)
+
+        Requires ``start`` and ``end`` (inclusive, YYYY-MM-DD); the usual list
+        filters such as ``team`` and ``technician`` also apply.
+        """
+        params = self.calendar_range(request)
+        if isinstance(params, Response):
+            return params
+        rows = self.calendar_rows(self.filter_queryset(self.get_queryset()), *params)
+        return self.calendar_days(*params, rows)
+
+    @conditional
+    async def acalendar(self, request):
+        params = self.calendar_range(request)
+        if isinstance(params, Response):
+            return params
+        rows = self.calendar_rows(await self.afilter_queryset(self.get_queryset()), *params)
+        return self.calendar_days(*params, [row async for row in rows])
+
+    def calendar_range(self, request):
+        """(start, end) dates of a calendar request, or an error Response"""
+        try:
+            start = parse_date(request.query_params.get('start', ''))
+            end = parse_date(request.query_params.get('end', ''))
+        except ValueError:
+            start = end = None
+        if not start or not end:
+            return Response({'error': 'start and end dates (YYYY-MM-DD) are required'}, status=400)
+        if end < start:
+            return Response({'error': 'end must not be before start'}, status=400)
+        if (end - start).days >= self.CALENDAR_MAX_DAYS:
+            return Response(
+                {'error': f'date range must be at most {self.CALENDAR_MAX_DAYS} days'}, status=400
+            )
+        return start, end
+
+    def calendar_rows(self, queryset, start, end):
+        return queryset.filter(
+            scheduled_date__range=(start, end)
+        ).order_by('scheduled_date', 'id').values(
+            'id', 'subject', 'request_type', 'status', 'scheduled_date', 'duration_hours',
+            'equipment', 'equipment__name', 'technician', 'technician__username',
+            'technician__first_name', 'technician__last_name',
+        )
+
+    def calendar_days(self, start, end, rows):
+        days = {}
+        for row in rows:
+            day = days.setdefault(row['scheduled_date'].isoformat(), {
+                'count': 0,
+                'duration_hours': Decimal('0'),
+                'items': [],
+            })
+            technician_name = None
+            if row['technician']:
+                full_name = f"{row['technician__first_name']} {row['technician__last_name']}".strip()
+                technician_name = full_name or row['technician__username']
+            day['count'] += 1
+            if row['duration_hours'] is not None:
+                day['duration_hours'] += row['duration_hours']
+            day['items'].append({
+                'id': row['id'],
+                'subject': row['subject'],
+                'request_type': row['request_type'],
+                'status': row['status'],
+                'duration_hours': row['duration_hours'],
+                'equipment': row['equipment'],
+                'equipment_name': row['equipment__name'],
+                'technician': row['technician'],
+                'technician_name': technician_name,
+            })
+
+        for day in days.values():
+            day['duration_hours'] = f"{day['duration_hours']:.2f}"
+            for item in day['items']:
+                if item['duration_hours'] is not None:
+                    item['duration_hours'] = f"{item['duration_hours']:.2f}"
+
+        return Response({'start': start, 'end': end, 'days': days})
+
+    @action(detail=False, methods=['get'])
+    @conditional
+    def stats(self, request):
+        """Dashboard aggregates computed in the database (for Reports)
+
+        Accepts the same filter/search params as the list endpoint.
+        """
+        # Clear the default -created_at ordering, otherwise it leaks into GROUP BY
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        today = timezone.localdate()
+        open_statuses = ['New', 'In Progress']
+
+        totals = queryset.aggregate(
+            total=Count('id'),
+            overdue=Count('id', filter=Q(status__in=open_statuses, due_date__lt=today)),
+        )
+
+        by_status = {key: 0 for key, _ in MaintenanceRequest.STATUS_CHOICES}
+        for row in queryset.values('status').annotate(count=Count('id')):
+            by_status[row['status']] = row['count']
+
+        by_request_type = {key: 0 for key, _ in MaintenanceRequest.REQUEST_TYPE_CHOICES}
+        for row in queryset.values('request_type').annotate(count=Count('id')):
+            by_request_type[row['request_type']] = row['count']
+
+        by_team = [
+            {
+                'team': row['team'],
+                'team_name': row['team__team_name'],
+                'count': row['count'],
+                'overdue': row['overdue'],
+            }
+            for row in queryset.values('team', 'team__team_name').annotate(
+                count=Count('id'),
+                overdue=Count('id', filter=Q(status__in=open_statuses, due_date__lt=today)),
+            ).order_by('team__team_name')
+        ]
+
+        by_department = [
+            {'department': row['equipment__department'], 'count': row['count']}
+            for row in queryset.values('equipment__department').annotate(
+                count=Count('id')
+            ).order_by('-count')
+        ]
+
+        return Response({
+            'total': totals['total'],
+            'overdue': totals['overdue'],
+            'by_status': by_status,
+            'by_request_type': by_request_type,
+            'by_team': by_team,
+            'by_department': by_department,
+        })
+
+    BULK_MAX_OPERATIONS = 100
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Apply a batch of create/update/delete operations in one transaction
+
+        Body: ``{"operations": [{"op": "create", "data": {...}},
+        {"op": "update", "id": 1, "data": {...}}, {"op": "delete", "id": 2}]}``
+        (updates are partial). Returns one result per operation, in order.
+        If any operation is invalid nothing is applied and the 400 response
+        carries the per-item errors.
+        """
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        if not isinstance(operations, list):
+            return Response({'error': 'operations must be a list'}, status=400)
+        if len(operations) > self.BULK_MAX_OPERATIONS:
+            return Response(
+                {'error': f'at most {self.BULK_MAX_OPERATIONS} operations per request'}, status=400
+            )
+
+        try:
+            results = apply_operations(operations, self.get_serializer_context())
+        except BulkValidationError as e:
+            return Response({'error': 'Invalid operations, nothing was applied', 'results': e.results}, status=400)
+
+        changed = [result['id'] for result in results if result['op'] != 'delete']
+        rows = {row['id']: row for row in self.serialize_rows(self.get_queryset().filter(pk__in=changed))}
+        for result in results:
+            if result['op'] != 'delete':
+                result['data'] = rows[result['id']]
+        return Response({'results': results})
+
+
+class SyncViewSet(viewsets.ViewSet):
+    """Delta sync of requests, equipment, teams, technicians and notifications"""
+
+    def list(self, request):
+        """Rows changed and ids deleted since ``?since=<token>`` (full snapshot without it)
+
+        ``?since=now`` returns only a token to sync from, for clients that
+        load their data from the list endpoints.
+        """
+        if request.query_params.get('since') == 'now':
+            return Response({'token': start_token(request.user), 'has_more': False})
+        try:
+            changes = collect_changes(request.user, request.query_params.get('since'))
+        except ValueError:
+            return Response({'error': 'Invalid sync token'}, status=400)
+        except SyncTokenExpired:
+            return Response({'error': 'Sync token expired, reload all data'}, status=410)
+        return Response(changes)
+
+
+def streams_events(request):
+    # Under WSGI an open stream would hold a worker for as long as the tab stays open
+    return isinstance(request, ASGIRequest)
+
+
+@require_GET
+def event_stream_status(request):
+    """Whether this server holds /api/events/ streams; clients only subscribe if it does"""
+    return JsonResponse({'streaming': streams_events(request)})
+
+
+@require_GET
+async def event_stream(request):
+    """Server-Sent Events feed of request and notification changes (served under ASGI)
+
+    ``?team=<id>`` limits maintenance request events to one team; notification
+    events are only sent to their (authenticated) recipient. Under WSGI the
+    answer is 204, which tells EventSource not to reconnect.
+    """
+    if not streams_events(request):
+        return HttpResponse(status=204)
+    team_id = request.GET.get('team')
+    if team_id is not None:
+        try:
+            team_id = int(team_id)
+        except ValueError:
+            return HttpResponseBadRequest('team must be an integer')
+    user = await request.auser()
+    user_id = user.id if user.is_authenticated else None
+    keepalive = getattr(settings, 'EVENT_STREAM_KEEPALIVE', 15)
+
+    async def stream():
+        broker = get_broker()
+        subscription = broker.subscribe(team_id=team_id, user_id=user_id)
+        try:
+            yield ': connected\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if subscription.overflowed:
+                    # Events were dropped; the client has to reload its data
+                    subscription.overflowed = False
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    yield 'event: resync\ndata: {}\n\n'
+                    continue
+                data = json.dumps(event, cls=DjangoJSONEncoder)
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
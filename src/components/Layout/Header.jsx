@@ -4,11 +4,13 @@ import { Bell, Settings, User, Moon, Sun } from 'lucide-react';
 import './Header.css';
 
 const Header = () => {
-    const { getStatusCounts, notifications, markNotificationAsRead, theme, toggleTheme } = useApp();
+    const {
+        getStatusCounts, notifications, unreadCount, markNotificationAsRead, markAllNotificationsAsRead,
+        theme, toggleTheme,
+    } = useApp();
     const [showNotifications, setShowNotifications] = React.useState(false);
     const [showSettings, setShowSettings] = React.useState(false);
     const stats = getStatusCounts();
-    const unreadCount = notifications.filter(n => !n.is_read).length;
 
     const handleNotificationClick = (id) => {
         markNotificationAsRead(id);
@@ -55,7 +57,15 @@ const Header = () => {
                             <div className="notification-dropdown">
                                 <div className="notification-header">
                                     <h3>Notifications</h3>
-                                    {unreadCount > 0 && <span className="badge-pill">{unreadCount} new</span>}
+                                    {unreadCount > 0 && (
+                                        <span
+                                            className="badge-pill"
+                                            title="Mark all as read"
+                                            onClick={markAllNotificationsAsRead}
+                                        >
+                                            {unreadCount} new
+                                        </span>
+                                    )}
                                 </div>
                                 <div className="notification-list">
                                     {notifications.length > 0 ? (
@@ -1,17 +1,34 @@
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useRef } from 'react';
 import {
     fetchMaintenanceRequests,
-    fetchRequestsByStatus,
     fetchEquipment,
     fetchTechnicians,
     fetchTeams,
+    fetchNotifications,
     updateMaintenanceRequest,
     createMaintenanceRequest,
     deleteMaintenanceRequest,
-    fetchNotifications,
     markNotificationRead,
+    fetchUnreadNotificationCount,
+    markAllNotificationsRead,
+    subscribeToEvents,
+    fetchEventStreamStatus,
+    fetchSync,
 } from '../utils/api';
 
+const SYNC_INTERVAL_MS = 60000;
+
+// Merge a {updated, deleted} change set from /api/sync/ into a collection
+const applyChanges = (setter, { updated, deleted }, keep = () => true) => {
+    if (!updated.length && !deleted.length) return;
+    setter(prev => {
+        const changed = new Set(updated.map(row => row.id));
+        const removed = new Set(deleted);
+        const kept = prev.filter(row => !changed.has(row.id) && !removed.has(row.id));
+        return [...updated.filter(keep), ...kept];
+    });
+};
+
 const AppContext = createContext();
 
 export const useApp = () => {
@@ -28,6 +45,7 @@ export const AppProvider = ({ children }) => {
     const [technicians, setTechnicians] = useState([]);
     const [teams, setTeams] = useState([]);
     const [notifications, setNotifications] = useState([]);
+    const [unreadCount, setUnreadCount] = useState(0);
     const [theme, setTheme] = useState(localStorage.getItem('theme') || 'dark');
     const [selectedDate, setSelectedDate] = useState(new Date());
     const [loading, setLoading] = useState(true);
@@ -42,25 +60,56 @@ export const AppProvider = ({ children }) => {
         setTheme(prev => prev === 'dark' ? 'light' : 'dark');
     };
 
-    // Fetch initial data
+    const syncToken = useRef(null);
+
+    // Load the first page of each collection from the list endpoints. The
+    // sync token is taken first, so changes made while the lists load still
+    // arrive with the next sync.
+    const loadCollections = async () => {
+        const { token } = await fetchSync('now');
+        const [requestsData, equipmentData, techniciansData, teamsData, notificationsData] = await Promise.all([
+            fetchMaintenanceRequests(),
+            fetchEquipment({ is_active: true }),
+            fetchTechnicians(),
+            fetchTeams(),
+            fetchNotifications(),
+        ]);
+        setRequests(requestsData.results || requestsData);
+        setEquipment(equipmentData.results || equipmentData);
+        setTechnicians(techniciansData.results || techniciansData);
+        setTeams(teamsData.results || teamsData);
+        setNotifications(notificationsData.results || notificationsData);
+        syncToken.current = token;
+    };
+
+    // Fetch what changed since the last sync, reloading the lists without a token
+    const syncData = async () => {
+        if (!syncToken.current) {
+            await loadCollections();
+            return;
+        }
+        let changes;
+        do {
+            changes = await fetchSync(syncToken.current);
+            syncToken.current = changes.token;
+            applyChanges(setRequests, changes.requests);
+            applyChanges(setEquipment, changes.equipment, item => item.is_active);
+            applyChanges(setTechnicians, changes.technicians);
+            applyChanges(setTeams, changes.teams);
+            applyChanges(setNotifications, changes.notifications);
+        } while (changes.has_more);
+    };
+
+    // Fetch initial data, then only what changed since the last sync
     useEffect(() => {
         const loadData = async () => {
             try {
                 setLoading(true);
-                const [requestsData, equipmentData, techniciansData, teamsData, notificationsData] = await Promise.all([
-                    fetchMaintenanceRequests(),
-                    fetchEquipment({ is_active: true }),
-                    fetchTechnicians(),
-                    fetchTeams(),
-                    fetchNotifications(),
+                const [unreadData] = await Promise.all([
+                    fetchUnreadNotificationCount(),
+                    syncData(),
                 ]);
-
-                // Handle paginated responses (extract results array if present)
-                setRequests(requestsData.results || requestsData);
-                setEquipment(equipmentData.results || equipmentData);
-                setTechnicians(techniciansData.results || techniciansData);
-                setTeams(teamsData.results || teamsData);
-                setNotifications(notificationsData.results || notificationsData);
+                setUnreadCount(unreadData.unread);
             } catch (error) {
                 console.error('Error loading data:', error);
             } finally {
@@ -69,6 +118,55 @@ export const AppProvider = ({ children }) => {
         };
 
         loadData();
+        const interval = setInterval(() => {
+            syncData().catch(error => {
+                console.error('Error syncing data:', error);
+                // Token expired or invalid: start over from the list endpoints
+                syncToken.current = null;
+            });
+        }, SYNC_INTERVAL_MS);
+        return () => clearInterval(interval);
+    }, []);
+
+    // Apply changes pushed by the server instead of reloading whole collections.
+    // Only servers that can hold the stream open (ASGI) offer it; elsewhere the
+    // periodic sync above keeps the data current.
+    useEffect(() => {
+        const upsertRequest = ({ data }) => {
+            setRequests(prev => prev.some(req => req.id === data.id)
+                ? prev.map(req => req.id === data.id ? { ...req, ...data } : req)
+                : [data, ...prev]);
+        };
+
+        const handlers = {
+            // The server dropped events for this client: catch up through sync
+            resync: () => {
+                syncData().catch(error => console.error('Error syncing data:', error));
+            },
+            'maintenance_request.created': upsertRequest,
+            'maintenance_request.updated': upsertRequest,
+            'maintenance_request.deleted': ({ id }) => {
+                setRequests(prev => prev.filter(req => req.id !== id));
+            },
+            'notification.created': ({ data }) => {
+                setNotifications(prev => prev.some(n => n.id === data.id) ? prev : [data, ...prev]);
+                setUnreadCount(prev => prev + 1);
+            },
+        };
+
+        let unsubscribe = null;
+        let cancelled = false;
+        fetchEventStreamStatus()
+            .then(({ streaming }) => {
+                if (!streaming || cancelled) return;
+                unsubscribe = subscribeToEvents(handlers);
+            })
+            .catch(error => console.error('Error checking live updates:', error));
+
+        return () => {
+            cancelled = true;
+            if (unsubscribe) unsubscribe();
+        };
     }, []);
 
     // Map backend status to frontend status format
@@ -127,7 +225,8 @@ export const AppProvider = ({ children }) => {
     const createRequest = async (requestData) => {
         try {
             const newRequest = await createMaintenanceRequest(requestData);
-            setRequests(prevRequests => [...prevRequests, newRequest]);
+            // The change feed may already have delivered this request
+            setRequests(prevRequests => [...prevRequests.filter(req => req.id !== newRequest.id), newRequest]);
             return newRequest;
         } catch (error) {
             console.error('Error creating request:', error);
@@ -209,15 +308,30 @@ export const AppProvider = ({ children }) => {
     // Mark notification as read
     const markNotificationAsRead = async (id) => {
         try {
+            const notification = notifications.find(n => n.id === id);
             await markNotificationRead(id);
             setNotifications(prev =>
                 prev.map(n => n.id === id ? { ...n, is_read: true } : n)
             );
+            if (notification && !notification.is_read) {
+                setUnreadCount(prev => Math.max(prev - 1, 0));
+            }
         } catch (error) {
             console.error('Error marking notification as read:', error);
         }
     };
 
+    // Mark every unread notification as read
+    const markAllNotificationsAsRead = async () => {
+        try {
+            await markAllNotificationsRead();
+            setNotifications(prev => prev.map(n => ({ ...n, is_read: true })));
+            setUnreadCount(0);
+        } catch (error) {
+            console.error('Error marking notifications as read:', error);
+        }
+    };
+
     const value = {
         // State
         requests,
@@ -244,7 +358,9 @@ export const AppProvider = ({ children }) => {
 
         // Notifications
         notifications,
+        unreadCount,
         markNotificationAsRead,
+        markAllNotificationsAsRead,
 
         // Theme
         theme,
@@ -1,5 +1,6 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useApp } from '../context/AppContext';
+import { fetchRequestCalendar } from '../utils/api';
 import { ChevronLeft, ChevronRight, Plus, X, Clock, User } from 'lucide-react';
 import NewRequestModal from '../components/Kanban/NewRequestModal';
 import './CalendarView.css';
@@ -9,6 +10,38 @@ const CalendarView = () => {
     const [currentDate, setCurrentDate] = useState(new Date());
     const [showNewRequestModal, setShowNewRequestModal] = useState(false);
     const [selectedDayDetails, setSelectedDayDetails] = useState(null);
+    const [calendarDays, setCalendarDays] = useState({});
+
+    const toDateStr = (date) => date.toISOString().split('T')[0];
+    const rangeStart = toDateStr(new Date(currentDate.getFullYear(), currentDate.getMonth(), 1));
+    const rangeEnd = toDateStr(new Date(currentDate.getFullYear(), currentDate.getMonth() + 1, 0));
+    const [reloadCount, setReloadCount] = useState(0);
+    const seenRequests = useRef(requests);
+
+    // Load only the visible month, already bucketed by day on the server
+    useEffect(() => {
+        fetchRequestCalendar(rangeStart, rangeEnd)
+            .then(data => setCalendarDays(data.days || {}))
+            .catch(error => console.error('Error loading calendar:', error));
+    }, [rangeStart, rangeEnd, reloadCount]);
+
+    // Live events and sync merges replace only the rows that changed, so
+    // reload the month only when an added, edited or removed request is
+    // (or was) scheduled inside it
+    useEffect(() => {
+        const previous = new Map(seenRequests.current.map(req => [req.id, req]));
+        seenRequests.current = requests;
+        const touched = [];
+        for (const req of requests) {
+            const old = previous.get(req.id);
+            previous.delete(req.id);
+            if (old !== req) touched.push(req, old);
+        }
+        touched.push(...previous.values());
+        const inMonth = req => req?.scheduled_date
+            && req.scheduled_date >= rangeStart && req.scheduled_date <= rangeEnd;
+        if (touched.some(inMonth)) setReloadCount(count => count + 1);
+    }, [requests]);
 
     const getDaysInMonth = (date) => {
         const year = date.getFullYear();
@@ -36,8 +69,7 @@ const CalendarView = () => {
     const getRequestsForDate = (date) => {
         if (!date) return [];
         const dateStr = date.toISOString().split('T')[0];
-        // Fix: use scheduled_date instead of scheduledDate
-        return requests.filter(req => req.scheduled_date === dateStr);
+        return calendarDays[dateStr]?.items || [];
     };
 
     const getTechnicianName = (techId) => {
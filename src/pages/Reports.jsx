@@ -1,46 +1,45 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { useApp } from '../context/AppContext';
+import { fetchRequestStats } from '../utils/api';
 import { BarChart, Bar, PieChart, Pie, Cell, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { TrendingUp, Activity, AlertTriangle, CheckCircle } from 'lucide-react';
 import './Reports.css';
 
 const Reports = () => {
-    const { requests, teams, equipment } = useApp();
+    const { requests } = useApp();
+    const [stats, setStats] = useState(null);
+
+    // Aggregates come from the server so they cover every request, not just the loaded page
+    useEffect(() => {
+        fetchRequestStats()
+            .then(setStats)
+            .catch(error => console.error('Error loading stats:', error));
+    }, []);
 
-    // Analytics data
     // Status in DB is Title Case: 'New', 'In Progress', 'Repaired', 'Scrap'
+    const byStatus = stats?.by_status || {};
     const statusCounts = {
-        new: requests.filter(r => r.status === 'New').length,
-        inProgress: requests.filter(r => r.status === 'In Progress').length,
-        repaired: requests.filter(r => r.status === 'Repaired').length,
-        scrap: requests.filter(r => r.status === 'Scrap').length,
+        new: byStatus['New'] || 0,
+        inProgress: byStatus['In Progress'] || 0,
+        repaired: byStatus['Repaired'] || 0,
+        scrap: byStatus['Scrap'] || 0,
     };
+    const totalRequests = stats?.total || 0;
 
     // Requests by Team
-    // requests store 'team' as ID. teams have 'id' and 'team_name'.
-    const requestsByTeam = teams.map((team, index) => {
-        // Teams might just be {id, team_name}
-        return {
-            name: team.team_name,
-            count: requests.filter(r => r.team === team.id).length,
-            color: index % 2 === 0 ? '#667eea' : '#fbbf24', // simple alternating colors or map from a palette
-        };
-    });
+    const requestsByTeam = (stats?.by_team || []).map((team, index) => ({
+        name: team.team_name,
+        count: team.count,
+        color: index % 2 === 0 ? '#667eea' : '#fbbf24', // simple alternating colors or map from a palette
+    }));
 
     // Requests by Equipment Category/Department
-    // requests store 'equipment' as ID. equipment has 'id' and 'department'.
-    const categoryCounts = {};
-    requests.forEach(req => {
-        const equip = equipment.find(e => e.id === req.equipment);
-        if (equip && equip.department) {
-            categoryCounts[equip.department] = (categoryCounts[equip.department] || 0) + 1;
-        }
-    });
-
-    const requestsByCategory = Object.entries(categoryCounts).map(([name, value]) => ({
-        name,
-        value,
-    }));
+    const requestsByCategory = (stats?.by_department || [])
+        .filter(row => row.department)
+        .map(row => ({
+            name: row.department,
+            value: row.count,
+        }));
 
     const COLORS = ['#667eea', '#4facfe', '#f093fb', '#fbbf24', '#ff6b6b', '#20c997'];
 
@@ -61,7 +60,7 @@ const Reports = () => {
                     </div>
                     <div className="stat-info">
                         <span className="stat-label">Total Requests</span>
-                        <span className="stat-number">{requests.length}</span>
+                        <span className="stat-number">{totalRequests}</span>
                     </div>
                 </div>
 
@@ -71,13 +71,40 @@ export const deleteEquipment = (id) =>
     method: 'DELETE',
   });
 
+// CSV/NDJSON upload; teams are matched by name. Resolves to the import report.
+export const importEquipment = async (file, { upsert = false } = {}) => {
+  const body = new FormData();
+  body.append('file', file);
+  body.append('upsert', upsert ? 'true' : 'false');
+  // No JSON Content-Type here: the browser sets the multipart boundary
+  const response = await fetch(`${API_BASE_URL}/equipment/import/`, { method: 'POST', body });
+  const report = await response.json().catch(() => ({ error: 'Request failed' }));
+  if (!response.ok) {
+    throw new Error(report.error || `HTTP error! status: ${response.status}`);
+  }
+  return report;
+};
+
 // Maintenance Requests
 export const fetchMaintenanceRequests = (params = {}) => {
   const queryString = new URLSearchParams(params).toString();
   return apiFetch(`/maintenance-requests/${queryString ? `?${queryString}` : ''}`);
 };
 
-export const fetchRequestsByStatus = () => apiFetch('/maintenance-requests/by_status/');
+export const fetchRequestsByStatus = (params = {}) => {
+  const queryString = new URLSearchParams(params).toString();
+  return apiFetch(`/maintenance-requests/by_status/${queryString ? `?${queryString}` : ''}`);
+};
+
+export const fetchRequestStats = (params = {}) => {
+  const queryString = new URLSearchParams(params).toString();
+  return apiFetch(`/maintenance-requests/stats/${queryString ? `?${queryString}` : ''}`);
+};
+
+export const fetchRequestCalendar = (start, end, params = {}) => {
+  const queryString = new URLSearchParams({ start, end, ...params }).toString();
+  return apiFetch(`/maintenance-requests/calendar/?${queryString}`);
+};
 
 export const createMaintenanceRequest = (requestData) =>
   apiFetch('/maintenance-requests/', {
@@ -95,6 +122,13 @@ export const deleteMaintenanceRequest = (id) =>
   apiFetch(`/maintenance-requests/${id}/`, {
     method: 'DELETE',
   });
+
+// Multi-select actions: [{ op: 'update', id, data }, { op: 'create', data }, { op: 'delete', id }]
+export const bulkMaintenanceRequests = (operations) =>
+  apiFetch('/maintenance-requests/bulk/', {
+    method: 'POST',
+    body: JSON.stringify({ operations }),
+  });
 // Notifications
 export const fetchNotifications = () => apiFetch('/notifications/');
 
@@ -102,3 +136,30 @@ export const markNotificationRead = (id) =>
   apiFetch(`/notifications/${id}/mark_read/`, {
     method: 'POST',
   });
+
+export const fetchUnreadNotificationCount = () => apiFetch('/notifications/unread_count/');
+
+export const markAllNotificationsRead = (options = {}) =>
+  apiFetch('/notifications/mark_all_read/', {
+    method: 'POST',
+    body: JSON.stringify(options),
+  });
+
+// Delta sync: rows changed and deleted ids since `since` (full snapshot without it).
+// `since = 'now'` only returns a token to start from.
+export const fetchSync = (since = null) =>
+  apiFetch(`/sync/${since ? `?since=${encodeURIComponent(since)}` : ''}`);
+
+// Whether the server can hold a change feed open (only under ASGI)
+export const fetchEventStreamStatus = () => apiFetch('/events/status/');
+
+// Live change feed (Server-Sent Events). `handlers` maps event types such as
+// 'maintenance_request.updated' to callbacks receiving the parsed event.
+export const subscribeToEvents = (handlers, params = {}) => {
+  const queryString = new URLSearchParams(params).toString();
+  const source = new EventSource(`${API_BASE_URL}/events/${queryString ? `?${queryString}` : ''}`);
+  Object.entries(handlers).forEach(([type, handler]) => {
+    source.addEventListener(type, (message) => handler(JSON.parse(message.data)));
+  });
+  return () => source.close();
+};